@@ -0,0 +1,259 @@
+"""Append-only archive of finished games, with fast statistics queries.
+
+An archive is a directory of three files, only ever appended to:
+
+    index.bin   16-byte header, then one INDEX_DTYPE record per game
+    moves.bin   every game's moves (cell indices, uint16), back to back
+    chains.bin  the cascade length of each of those moves (uint16)
+
+Index records point into the two columns, so per-move data for any run of
+games is one contiguous slice. Queries memory-map the files and split the
+games across a process pool; each worker aggregates its slice with NumPy.
+
+    python archive.py openings --depth 2 --players 2
+    python archive.py seats
+    python archive.py chains --workers 8
+
+game.py records every finished match here; tournament.py --archive DIR
+records bot games.
+"""
+import os
+import sys
+import time
+import argparse
+import multiprocessing
+
+import numpy as np
+
+DEFAULT_DIR = "game_archive"
+MAGIC = b"CRARCHV1"
+HEADER_SIZE = 16
+INDEX_DTYPE = np.dtype([("offset", "<u8"), ("moves", "<u4"), ("time", "<u4"), ("first_move", "<i4"),
+                        ("max_chain", "<u2"), ("width", "u1"), ("height", "u1"),
+                        ("players", "u1"), ("winner", "i1")])
+NO_WINNER = -1
+MAX_CHAIN = np.iinfo(np.uint16).max
+CHUNK_GAMES = 250000  # games per query task
+
+
+class GameArchive:
+    """Appends finished games; one writer per archive at a time."""
+
+    def __init__(self, path=DEFAULT_DIR):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        index_path = os.path.join(path, "index.bin")
+        if not os.path.exists(index_path) or os.path.getsize(index_path) == 0:
+            with open(index_path, "wb") as f:
+                f.write(MAGIC + INDEX_DTYPE.itemsize.to_bytes(4, "little") + bytes(HEADER_SIZE - len(MAGIC) - 4))
+        else:
+            _check_header(index_path)
+        self.index = open(index_path, "ab")
+        self.moves = open(os.path.join(path, "moves.bin"), "ab")
+        self.chains = open(os.path.join(path, "chains.bin"), "ab")
+        self.offset = self.moves.tell() // 2
+
+    def append(self, width, height, num_players, moves, chains, winner):
+        """Record one game; chains[i] is the cascade length of moves[i]."""
+        moves = np.asarray(moves, dtype=np.uint16)
+        chains = np.minimum(np.asarray(chains, dtype=np.int64), MAX_CHAIN).astype(np.uint16)
+        if len(moves) != len(chains):
+            raise ValueError("every move needs a cascade length")
+        record = np.zeros(1, dtype=INDEX_DTYPE)
+        record["offset"] = self.offset
+        record["moves"] = len(moves)
+        record["time"] = int(time.time())
+        record["first_move"] = moves[0] if len(moves) else -1
+        record["max_chain"] = chains.max() if len(chains) else 0
+        record["width"], record["height"], record["players"] = width, height, num_players
+        record["winner"] = NO_WINNER if winner is None else winner
+        # Columns first: a game only exists once its index record is written
+        self.moves.write(moves.tobytes())
+        self.chains.write(chains.tobytes())
+        self.moves.flush()
+        self.chains.flush()
+        self.index.write(record.tobytes())
+        self.index.flush()
+        self.offset += len(moves)
+
+    def close(self):
+        for f in (self.index, self.moves, self.chains):
+            f.close()
+
+
+def _check_header(index_path):
+    with open(index_path, "rb") as f:
+        header = f.read(HEADER_SIZE)
+    if header[:len(MAGIC)] != MAGIC or int.from_bytes(header[8:12], "little") != INDEX_DTYPE.itemsize:
+        raise ValueError(f"{index_path} is not a version {MAGIC[-1:].decode()} game archive index")
+
+
+def open_index(path=DEFAULT_DIR):
+    """The index as a read-only memmap of INDEX_DTYPE records (empty if no games yet)."""
+    index_path = os.path.join(path, "index.bin")
+    _check_header(index_path)
+    count = (os.path.getsize(index_path) - HEADER_SIZE) // INDEX_DTYPE.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=INDEX_DTYPE)
+    return np.memmap(index_path, dtype=INDEX_DTYPE, mode="r", offset=HEADER_SIZE, shape=(count,))
+
+
+def open_column(path, name):
+    file_path = os.path.join(path, name)
+    if os.path.getsize(file_path) == 0:
+        return np.zeros(0, dtype=np.uint16)
+    return np.memmap(file_path, dtype=np.uint16, mode="r")
+
+
+def _filter(index, players, grid):
+    keep = np.ones(len(index), dtype=bool)
+    if players is not None:
+        keep &= index["players"] == players
+    if grid is not None:
+        keep &= (index["width"] == grid[0]) & (index["height"] == grid[1])
+    return index[keep]
+
+
+# --- Query workers: each aggregates games [lo, hi) and returns partial results ---
+
+def _openings_chunk(task):
+    path, lo, hi, depth, players, grid = task
+    games = _filter(open_index(path)[lo:hi], players, grid)
+    games = games[games["moves"] >= depth]
+    if len(games) == 0:
+        return {}
+    if depth == 1:
+        prefixes = games["first_move"][:, None].astype(np.int64)
+    else:
+        moves = open_column(path, "moves.bin")
+        prefixes = moves[games["offset"][:, None].astype(np.int64) + np.arange(depth)].astype(np.int64)
+    keys = np.column_stack([games["players"], games["width"], games["height"], prefixes])
+    cell_bits = int((games["width"].astype(np.int64) * games["height"]).max()).bit_length()
+    if 24 + depth * cell_bits <= 63:
+        # Sorting one int64 per game is far quicker than np.unique over rows
+        packed = np.zeros(len(keys), dtype=np.int64)
+        for column, bits in zip(keys.T, [8, 8, 8] + [cell_bits] * depth):
+            packed = (packed << bits) | column
+        _, first, inverse = np.unique(packed, return_index=True, return_inverse=True)
+        unique = keys[first]
+    else:
+        unique, inverse = np.unique(keys, axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+    counts = np.bincount(inverse, minlength=len(unique))
+    first_wins = np.bincount(inverse, weights=games["winner"] == 0, minlength=len(unique))
+    return {tuple(int(v) for v in key): (int(n), int(w)) for key, n, w in zip(unique, counts, first_wins)}
+
+
+def _seats_chunk(task):
+    path, lo, hi, _, players, grid = task
+    games = _filter(open_index(path)[lo:hi], players, grid)
+    result = {}
+    for count in np.unique(games["players"]):
+        winners = games["winner"][games["players"] == count]
+        result[int(count)] = (len(winners), np.bincount(winners[winners >= 0], minlength=int(count)))
+    return result
+
+
+def _chains_chunk(task):
+    path, lo, hi, _, players, grid = task
+    index = open_index(path)[lo:hi]
+    # Games are stored back to back, so the whole chunk is one slice
+    start = int(index["offset"][0])
+    end = int(index["offset"][-1]) + int(index["moves"][-1])
+    chains = open_column(path, "chains.bin")[start:end]
+    if players is None and grid is None:
+        return np.bincount(chains)
+    games = _filter(index, players, grid)
+    begins = games["offset"].astype(np.int64) - start
+    # +1 where a kept game begins, -1 where it ends: a running sum > 0 marks its moves
+    marks = np.bincount(begins, minlength=len(chains) + 1) - \
+        np.bincount(begins + games["moves"], minlength=len(chains) + 1)
+    return np.bincount(chains[np.cumsum(marks[:-1]) > 0], minlength=1)
+
+
+def _add_padded(a, b):
+    if len(a) < len(b):
+        a, b = b, a
+    a = a.copy()
+    a[:len(b)] += b
+    return a
+
+
+def run_query(worker, path, workers, depth=1, players=None, grid=None):
+    """Map worker over chunks of the index, in a process pool when workers > 1."""
+    total = len(open_index(path))
+    tasks = [(path, lo, min(total, lo + CHUNK_GAMES), depth, players, grid)
+             for lo in range(0, total, CHUNK_GAMES)]
+    if workers <= 1 or len(tasks) <= 1:
+        return [worker(task) for task in tasks]
+    with multiprocessing.Pool(min(workers, len(tasks))) as pool:
+        return pool.map(worker, tasks)
+
+
+def opening_win_rates(path=DEFAULT_DIR, depth=1, players=None, grid=None, workers=1):
+    """{(players, width, height, *first moves): (games, first-player wins)}."""
+    merged = {}
+    for part in run_query(_openings_chunk, path, workers, depth, players, grid):
+        for key, (games, wins) in part.items():
+            old = merged.get(key, (0, 0))
+            merged[key] = (old[0] + games, old[1] + wins)
+    return merged
+
+
+def seat_advantage(path=DEFAULT_DIR, players=None, grid=None, workers=1):
+    """{player count: (games, wins per seat)}; games without a winner count only in games."""
+    merged = {}
+    for part in run_query(_seats_chunk, path, workers, players=players, grid=grid):
+        for count, (games, wins) in part.items():
+            old_games, old_wins = merged.get(count, (0, np.zeros(count, dtype=np.int64)))
+            merged[count] = (old_games + games, old_wins + wins)
+    return merged
+
+
+def chain_histogram(path=DEFAULT_DIR, players=None, grid=None, workers=1):
+    """Number of moves by cascade length (index = explosions caused by the move)."""
+    histogram = np.zeros(1, dtype=np.int64)
+    for part in run_query(_chains_chunk, path, workers, players=players, grid=grid):
+        histogram = _add_padded(histogram, part)
+    return histogram
+
+
+def main():
+    from tournament import parse_grid
+    parser = argparse.ArgumentParser(description="Query the Chain Reaction game archive")
+    parser.add_argument("query", choices=("openings", "seats", "chains"))
+    parser.add_argument("--archive", default=DEFAULT_DIR, help="archive directory")
+    parser.add_argument("--players", type=int, help="only games with this many players")
+    parser.add_argument("--grid", type=parse_grid, help="only games on this WIDTHxHEIGHT grid")
+    parser.add_argument("--depth", type=int, default=1, help="opening length in moves")
+    parser.add_argument("--top", type=int, default=15, help="openings to list")
+    parser.add_argument("--min-games", type=int, default=10, help="skip rarer openings")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    games = len(_filter(open_index(args.archive), args.players, args.grid))
+    if args.query == "openings":
+        rates = opening_win_rates(args.archive, args.depth, args.players, args.grid, args.workers)
+        rows = [(wins / n, n, key) for key, (n, wins) in rates.items() if n >= args.min_games]
+        rows.sort(reverse=True)
+        print(f"{'players':>7} {'grid':>7}  {'opening':<24}{'games':>8}{'P1 win%':>9}")
+        for rate, n, key in rows[:args.top]:
+            players, width, height, *line = key
+            opening = " ".join(f"({m // width},{m % width})" for m in line)
+            print(f"{players:>7} {f'{width}x{height}':>7}  {opening:<24}{n:>8}{rate:>9.1%}")
+    elif args.query == "seats":
+        for count, (n, wins) in sorted(seat_advantage(args.archive, args.players, args.grid, args.workers).items()):
+            rates = "  ".join(f"seat {seat + 1}: {w / n:.1%}" for seat, w in enumerate(wins))
+            print(f"{count} players, {n} games  {rates}")
+    else:
+        histogram = chain_histogram(args.archive, args.players, args.grid, args.workers)
+        total = histogram.sum()
+        print(f"{total} moves; cascade length: moves")
+        for length in np.flatnonzero(histogram):
+            print(f"{length:>6}: {histogram[length]:>10}  {histogram[length] / total:.2%}")
+    print(f"{games} games queried in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
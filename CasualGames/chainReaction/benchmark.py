@@ -0,0 +1,298 @@
+"""Headless benchmark suite for Chain Reaction.
+
+Runs with the SDL dummy video/audio drivers, so it works on CI machines and
+servers without a display. Results are written as JSON and can be compared
+against a stored baseline to catch performance regressions:
+
+    python benchmark.py                      # print results
+    python benchmark.py --compare            # compare with benchmark_baseline.json
+    python benchmark.py --save-baseline      # record a new baseline
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import statistics
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+# Game loads its assets relative to the working directory
+HERE = os.path.dirname(os.path.abspath(__file__))
+os.chdir(HERE)
+sys.path.insert(0, HERE)
+
+import game  # noqa: E402
+import engine  # noqa: E402
+
+BASELINE_FILE = os.path.join(HERE, "benchmark_baseline.json")
+DEFAULT_TOLERANCE = 0.25  # allowed slowdown before a metric counts as a regression
+MAX_MOVES_PER_GAME = 2000
+
+
+def _repeat(fn, repeats):
+    """Run fn repeats times and return the median of the values it returns."""
+    return statistics.median(fn() for _ in range(repeats))
+
+
+def new_game(preset, num_players):
+    """Create a headless Game on a grid preset with sound muted."""
+    game.set_grid_size(*preset)
+    g = game.Game()
+    g.sounds = None
+    g.num_players = num_players
+    g.reset_game()
+    g.game_state = "playing"
+    return g
+
+
+def resolve_move(g, row, col):
+    """Play a move and fast-forward Game.update until the turn is over.
+
+    Returns the number of explosions the move caused.
+    """
+    if not g.place_orb(row, col):
+        raise ValueError(f"illegal move ({row}, {col}) for player {g.current_player}")
+    return g.resolve_turn()
+
+
+def legal_moves(g):
+    return [(c.row, c.col) for r in g.grid for c in r
+            if c.owner is None or c.owner == g.current_player]
+
+
+def play_random_game(g, rng):
+    """Play random legal moves until someone wins; returns (moves, explosions)."""
+    moves = explosions = 0
+    while g.game_state == "playing" and moves < MAX_MOVES_PER_GAME:
+        row, col = rng.choice(legal_moves(g))
+        explosions += resolve_move(g, row, col)
+        moves += 1
+    return moves, explosions
+
+
+def build_cascade_board(g):
+    """Fill player 0's cells to one below critical mass in reading order.
+
+    Stops before the board holds as many orbs as it has edges, which keeps the
+    cascade finite (chip-firing with fewer chips than edges always settles),
+    so a click on the top-left corner sets off the longest chain we can
+    guarantee terminates. Player 1 keeps the bottom-right corner so the game
+    is not already decided.
+    """
+    edges = grid_edges(len(g.grid[0]), len(g.grid))
+    last = g.grid[-1][-1]
+    last.owner, last.orbs = 1, 1
+    total = 1
+    for row in g.grid:
+        for cell in row:
+            fill = cell.critical_mass - 1
+            if cell is last or total + fill >= edges - 1:
+                return
+            cell.owner, cell.orbs = 0, fill
+            total += fill
+
+
+def grid_edges(width, height):
+    return width * (height - 1) + height * (width - 1)
+
+
+def bench_random_games(preset, seed, games=5, num_players=4):
+    g = new_game(preset, num_players)
+    rng = random.Random(seed)
+    random.seed(seed)  # particles and cell rotation
+    total_moves = total_explosions = 0
+    start = time.perf_counter()
+    for _ in range(games):
+        g.reset_game()
+        g.game_state = "playing"
+        moves, explosions = play_random_game(g, rng)
+        total_moves += moves
+        total_explosions += explosions
+    elapsed = time.perf_counter() - start
+    return {"moves_per_s": total_moves / elapsed, "explosions_per_s": total_explosions / elapsed,
+            "moves": total_moves}
+
+
+def bench_engine_games(preset, seed, games=50, num_players=4):
+    """Same workload as bench_random_games, through the headless engine."""
+    rng = random.Random(seed)
+    total_moves = total_explosions = 0
+    start = time.perf_counter()
+    for _ in range(games):
+        state = engine.GameState(preset[0], preset[1], num_players)
+        while not state.is_over and state.turn_count < MAX_MOVES_PER_GAME:
+            total_explosions += state.play(rng.choice(state.legal_moves()))
+            total_moves += 1
+    elapsed = time.perf_counter() - start
+    return {"engine_moves_per_s": total_moves / elapsed, "engine_explosions_per_s": total_explosions / elapsed}
+
+
+def bench_cascade(preset, repeats=5):
+    g = new_game(preset, 2)
+
+    def once():
+        random.seed(0)
+        g.reset_game()
+        g.game_state = "playing"
+        build_cascade_board(g)
+        g.turn_count = g.num_players  # late game: eliminations are checked
+        start = time.perf_counter()
+        resolve_move(g, 0, 0)
+        return time.perf_counter() - start, g.chain_length
+
+    elapsed, chain = min(once() for _ in range(repeats))
+    return {"cascade_s": elapsed, "cascade_explosions": chain}
+
+
+def build_late_game(g, rng, fill=0.75):
+    """Scatter owned cells one step short of critical at most, like a late-game board."""
+    for row in g.grid:
+        for cell in row:
+            if rng.random() < fill:
+                cell.owner = rng.randrange(g.num_players)
+                cell.orbs = rng.randint(1, cell.critical_mass - 1)
+    g.turn_count = g.num_players * 20
+
+
+def bench_draw(preset, seed, frames=120):
+    g = new_game(preset, 4)
+    rng = random.Random(seed)
+    random.seed(seed)
+    build_late_game(g, rng)
+    times = []
+    for frame in range(frames):
+        g.update(game.SIM_DT)
+        start = time.perf_counter()
+        g.draw(0.5)
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return {"draw_p50_ms": times[len(times) // 2] * 1000,
+            "draw_p99_ms": times[min(len(times) - 1, int(len(times) * 0.99))] * 1000}
+
+
+def bench_preview(preset, seed, positions=10):
+    """Cold (uncached) all-moves preview on late-game boards; must fit in a frame."""
+    g = new_game(preset, 4)
+    rng = random.Random(seed)
+    times = []
+    for _ in range(positions):
+        g.reset_game()
+        build_late_game(g, rng)
+        g.preview_cache = None
+        start = time.perf_counter()
+        g.move_preview()
+        times.append(time.perf_counter() - start)
+    return {"preview_ms": statistics.median(times) * 1000, "preview_max_ms": max(times) * 1000}
+
+
+def bench_startup(preset, repeats=3):
+    def once():
+        game.set_grid_size(*preset)
+        start = time.perf_counter()
+        game.Game()
+        return time.perf_counter() - start
+
+    return {"startup_s": _repeat(once, repeats)}
+
+
+def bench_peak_memory(preset, seed):
+    """Peak Python heap (tracemalloc) for startup plus one random game."""
+    tracemalloc.start()
+    try:
+        g = new_game(preset, 4)
+        play_random_game(g, random.Random(seed))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"python_peak_kb": peak / 1024}
+
+
+# Direction in which each metric improves
+HIGHER_IS_BETTER = {"moves_per_s", "explosions_per_s", "engine_moves_per_s", "engine_explosions_per_s"}
+INFORMATIONAL = {"moves", "cascade_explosions"}
+
+
+def run_suite(seed=1234, quick=False):
+    results = {}
+    for preset in game.GRID_PRESETS:
+        name = f"{preset[0]}x{preset[1]}"
+        section = {}
+        section.update(bench_startup(preset, repeats=1 if quick else 3))
+        section.update(bench_random_games(preset, seed, games=2 if quick else 5))
+        section.update(bench_engine_games(preset, seed, games=10 if quick else 50))
+        section.update(bench_cascade(preset, repeats=1 if quick else 5))
+        section.update(bench_draw(preset, seed, frames=30 if quick else 120))
+        section.update(bench_preview(preset, seed, positions=3 if quick else 10))
+        section.update(bench_peak_memory(preset, seed))
+        results[name] = section
+    try:
+        import resource
+        results["process"] = {"peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}
+    except ImportError:  # not available on Windows
+        pass
+    return {
+        "meta": {"python": platform.python_version(), "pygame": game.pygame.version.ver,
+                 "platform": platform.platform(), "seed": seed, "quick": quick},
+        "results": results,
+    }
+
+
+def compare(current, baseline, tolerance):
+    """Return a list of (metric, baseline, current, change) regressions."""
+    regressions = []
+    for section, metrics in baseline.get("results", {}).items():
+        for metric, old in metrics.items():
+            new = current["results"].get(section, {}).get(metric)
+            if new is None or metric in INFORMATIONAL or not old:
+                continue
+            if metric in HIGHER_IS_BETTER:
+                change = (old - new) / old
+            else:
+                change = (new - old) / old
+            if change > tolerance:
+                regressions.append((f"{section}.{metric}", old, new, change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chain Reaction headless benchmarks")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--quick", action="store_true", help="fewer repetitions, for smoke runs")
+    parser.add_argument("--output", help="write results JSON to this file")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--compare", action="store_true", help="fail if slower than the baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    current = run_suite(args.seed, args.quick)
+    text = json.dumps(current, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            f.write(text + "\n")
+        print(f"Baseline saved to {args.baseline}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.tolerance)
+        for metric, old, new, change in regressions:
+            print(f"REGRESSION {metric}: {old:.4g} -> {new:.4g} ({change:+.0%})", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print("No regressions against baseline", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
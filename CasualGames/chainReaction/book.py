@@ -0,0 +1,214 @@
+"""Opening books: the first plies of each grid preset and player count, searched offline.
+
+The builder walks the opening tree with the engine's rules. It expands every
+move for the first FULL_PLIES plies and the best BEAM moves after that, and
+scores each position's moves with the "search" bot (bots.SearchPolicy.rank).
+Mirror images are one position (engine.canonical_form), so each is searched
+and stored once.
+
+A book is one file per board and player count, an open-addressing hash table
+read through mmap, so a lookup is a hash and a probe or two with nothing
+loaded up front:
+
+    header   HEADER (magic, width, height, players, depth, slot count)
+    slots    RECORD each: 64-bit position key (0 = empty), then the
+             BOOK_MOVES best moves (cells of the canonical board) and scores
+
+    python book.py build --workers 8                  # every preset and player count
+    python book.py build --preset 10x12 --players 2 --depth 5
+    python book.py probe --preset 10x12 --players 2 --moves 0,119
+
+bots.py's "book" policy plays from these books and falls back to "search".
+"""
+import os
+import sys
+import mmap
+import time
+import struct
+import hashlib
+import argparse
+import multiprocessing
+from array import array
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from engine import GameState, canonical_form  # noqa: E402
+
+DEFAULT_DIR = "opening_books"
+PRESETS = ((8, 10), (10, 12), (12, 14))  # game.GRID_PRESETS
+PLAYER_COUNTS = range(2, 10)  # the menu's choices
+DEPTH = 4  # plies with book entries
+FULL_PLIES = 2  # plies where every move is explored
+BEAM = 2  # moves explored per position after that
+BOOK_MOVES = 4  # moves stored per position
+MAGIC = b"CRBOOK01"
+HEADER = struct.Struct("<8sBBBxII12x")  # 32 bytes
+RECORD = struct.Struct(f"<Q{BOOK_MOVES}H{BOOK_MOVES}h")
+RECORD_DTYPE = np.dtype([("key", "<u8"), ("moves", "<u2", BOOK_MOVES), ("scores", "<i2", BOOK_MOVES)])
+NO_MOVE = 0xFFFF
+SCORE_LIMIT = 2 ** 15 - 1  # scores are clamped to int16; decided games sit at the limits
+
+
+def book_path(directory, width, height, num_players):
+    return os.path.join(directory, f"{width}x{height}-{num_players}p.book")
+
+
+def position_key(state):
+    """(64-bit key, gather): a hash shared by a position's mirror images, and the mirror used."""
+    (codes, player, turn, _, _), gather = canonical_form(state)  # a book is for one board and player count
+    digest = hashlib.blake2b(array("H", codes).tobytes() + bytes((player, turn)), digest_size=8).digest()
+    return int.from_bytes(digest, "little") or 1, gather  # 0 marks an empty slot
+
+
+class OpeningBook:
+    """A built book, memory-mapped; lookups touch only the slots they probe."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.width, self.height, self.num_players, self.depth, self.slots = HEADER.unpack_from(self.data)[:6]
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an opening book")
+
+    def lookup(self, state):
+        """[(score, move), ...] for state's mover, best first; empty when the position is not in the book."""
+        board = state.board
+        if (board.width, board.height, state.num_players) != (self.width, self.height, self.num_players) \
+                or board.topology != "rect" or board.holes or state.turn_count >= self.depth:
+            return []
+        key, gather = position_key(state)
+        mask = self.slots - 1
+        slot = key & mask
+        while True:
+            record = RECORD.unpack_from(self.data, HEADER.size + slot * RECORD.size)
+            if record[0] == key:
+                moves, scores = record[1:1 + BOOK_MOVES], record[1 + BOOK_MOVES:]
+                # Book moves are cells of the canonical board; gather maps them back onto this one
+                return [(score, gather[move]) for move, score in zip(moves, scores) if move != NO_MOVE]
+            if record[0] == 0:
+                return []
+            slot = (slot + 1) & mask
+
+    def close(self):
+        self.data.close()
+
+
+def open_book(directory, width, height, num_players):
+    """The book for a board and player count, or None if it has not been built."""
+    path = book_path(directory, width, height, num_players)
+    return OpeningBook(path) if os.path.exists(path) else None
+
+
+# --- Building ---
+
+def _analyse(task):
+    """Search one position, given as the moves leading to it.
+
+    Returns (key, canonical moves and scores, children to explore as (key, moves)).
+    """
+    width, height, num_players, moves, explore = task
+    from bots import SearchPolicy
+    state = GameState(width, height, num_players)
+    for move in moves:
+        state.play(move)
+    key, gather = position_key(state)
+    ranked = sorted(SearchPolicy().rank(state), key=lambda item: item[0], reverse=True)
+    to_canonical = {cell: k for k, cell in enumerate(gather)}
+    stored = [(to_canonical[move], max(-SCORE_LIMIT, min(SCORE_LIMIT, score))) for score, move in ranked[:BOOK_MOVES]]
+    follow = state.legal_moves() if explore is None else [move for _, move in ranked[:explore]]
+    children = []
+    for move in follow:
+        child = state.copy()
+        child.play(move)
+        if not child.is_over:
+            children.append((position_key(child)[0], moves + (move,)))
+    return key, stored, children
+
+
+def build_book(pool, width, height, num_players, depth=DEPTH, full_plies=FULL_PLIES, beam=BEAM, workers=1):
+    """{key: [(canonical move, score), ...]} for the openings of one board and player count."""
+    entries = {}
+    frontier = {position_key(GameState(width, height, num_players))[0]: ()}
+    for ply in range(depth):
+        explore = None if ply < full_plies else beam
+        if ply == depth - 1:
+            explore = 0  # the last ply is stored, not expanded
+        tasks = [(width, height, num_players, moves, explore) for moves in frontier.values()]
+        frontier = {}
+        for key, stored, children in pool.imap_unordered(_analyse, tasks, chunksize=max(1, len(tasks) // (workers * 8))):
+            entries[key] = stored
+            for child_key, moves in children:
+                if child_key not in entries:
+                    frontier.setdefault(child_key, moves)
+    return entries
+
+
+def write_book(path, width, height, num_players, depth, entries):
+    """Lay entries out as a hash table at most half full and write it to path."""
+    slots = 1 << max(4, (2 * len(entries) - 1).bit_length())
+    table = np.zeros(slots, dtype=RECORD_DTYPE)
+    table["moves"] = NO_MOVE
+    for key, stored in entries.items():
+        slot = key & (slots - 1)
+        while table["key"][slot]:
+            slot = (slot + 1) & (slots - 1)
+        table["key"][slot] = key
+        for i, (move, score) in enumerate(stored):
+            table["moves"][slot, i] = move
+            table["scores"][slot, i] = score
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    partial = path + ".partial"
+    with open(partial, "wb") as f:
+        f.write(HEADER.pack(MAGIC, width, height, num_players, depth, slots))
+        f.write(table.tobytes())
+    os.replace(partial, path)  # readers never see half a book
+
+
+def main():
+    from tournament import parse_grid
+    parser = argparse.ArgumentParser(description="Build and query Chain Reaction opening books")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="search the openings and write the books")
+    build.add_argument("--preset", type=parse_grid, action="append", help="grid such as 10x12 (default: all presets)")
+    build.add_argument("--players", type=int, action="append", help="player count (default: 2-9)")
+    build.add_argument("--depth", type=int, default=DEPTH, help="plies with book entries")
+    build.add_argument("--full-plies", type=int, default=FULL_PLIES, help="plies where every move is explored")
+    build.add_argument("--beam", type=int, default=BEAM, help="moves explored per position after that")
+    build.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    probe = commands.add_parser("probe", help="print the book moves for a position")
+    probe.add_argument("--preset", type=parse_grid, default=(10, 12))
+    probe.add_argument("--players", type=int, default=2)
+    probe.add_argument("--moves", default="", help="comma-separated cells played so far")
+    for sub in (build, probe):
+        sub.add_argument("--dir", default=DEFAULT_DIR, help="book directory")
+    args = parser.parse_args()
+
+    if args.command == "probe":
+        book = open_book(args.dir, *args.preset, args.players)
+        if book is None:
+            parser.error(f"no book at {book_path(args.dir, *args.preset, args.players)}")
+        state = GameState(*args.preset, args.players)
+        for move in filter(None, args.moves.split(",")):
+            state.play(int(move))
+        width = args.preset[0]
+        entries = book.lookup(state)
+        if not entries:
+            print("position not in the book")
+        for score, move in entries:
+            print(f"({move // width},{move % width})  cell {move:<4} score {score}")
+        return
+
+    with multiprocessing.Pool(args.workers) as pool:
+        for width, height in args.preset or PRESETS:
+            for num_players in args.players or PLAYER_COUNTS:
+                start = time.perf_counter()
+                entries = build_book(pool, width, height, num_players, args.depth, args.full_plies, args.beam, args.workers)
+                path = book_path(args.dir, width, height, num_players)
+                write_book(path, width, height, num_players, args.depth, entries)
+                print(f"{path}: {len(entries)} positions in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
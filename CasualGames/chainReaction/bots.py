@@ -0,0 +1,176 @@
+"""Computer players for the headless rules engine.
+
+Policies are registered by name so tools like tournament.py can pick them
+from the command line:
+
+    @register_policy("mybot")
+    class MyBot(Policy):
+        def choose(self, state, rng):
+            return rng.choice(state.legal_moves())
+"""
+from engine import EMPTY
+
+POLICIES = {}
+WIN_SCORE = 10 ** 6
+
+
+def register_policy(name):
+    """Class decorator adding a policy to POLICIES under name."""
+    def decorator(cls):
+        cls.name = name
+        POLICIES[name] = cls
+        return cls
+    return decorator
+
+
+def make_policy(name):
+    try:
+        return POLICIES[name]()
+    except KeyError:
+        raise ValueError(f"unknown policy {name!r} (known: {', '.join(sorted(POLICIES))})")
+
+
+class Policy:
+    """Picks a move (cell index) for state.current_player."""
+    name = "policy"
+
+    def choose(self, state, rng):
+        raise NotImplementedError
+
+
+def material(state, player):
+    """Orbs held by player minus orbs held by everyone else; decided games dominate."""
+    if state.winner is not None:
+        return WIN_SCORE if state.winner == player else -WIN_SCORE
+    own = other = 0
+    for orbs, owner in zip(state.orbs, state.owner):
+        if owner == player:
+            own += orbs
+        elif owner != EMPTY:
+            other += orbs
+    return own - other
+
+
+def _best(scored, rng):
+    """Highest-scoring move, ties broken at random."""
+    top = max(score for score, _ in scored)
+    return rng.choice([move for score, move in scored if score == top])
+
+
+@register_policy("random")
+class RandomPolicy(Policy):
+    def choose(self, state, rng):
+        return rng.choice(state.legal_moves())
+
+
+@register_policy("greedy")
+class GreedyPolicy(Policy):
+    """One ply: the move that leaves the best material balance."""
+
+    def choose(self, state, rng):
+        player = state.current_player
+        scored = []
+        for move in state.legal_moves():
+            child = state.copy()
+            child.play(move)
+            scored.append((material(child, player), move))
+        return _best(scored, rng)
+
+
+@register_policy("search")
+class SearchPolicy(Policy):
+    """Two plies: the best few greedy moves, each checked against the next player's best reply."""
+    candidates = 8
+
+    def choose(self, state, rng):
+        return _best(self.rank(state), rng)
+
+    def rank(self, state):
+        """(score, move) for the candidate moves, scored from the mover's side; book.py stores these."""
+        player = state.current_player
+        first = []
+        for move in state.legal_moves():
+            child = state.copy()
+            child.play(move)
+            first.append((material(child, player), move, child))
+        first.sort(key=lambda item: item[0], reverse=True)
+
+        scored = []
+        for score, move, child in first[:self.candidates]:
+            if not child.is_over:
+                worst = None
+                opponent = child.current_player
+                for reply in child.legal_moves():
+                    grandchild = child.copy()
+                    grandchild.play(reply)
+                    value = material(grandchild, opponent)
+                    if worst is None or value > worst[0]:
+                        worst = (value, grandchild)
+                score = material(worst[1], player)
+            scored.append((score, move))
+        return scored
+
+
+@register_policy("book")
+class BookPolicy(Policy):
+    """Opening book moves (book.py) while the position is in a book, then "search"."""
+    directory = None  # book directory; None uses book.DEFAULT_DIR
+
+    def __init__(self):
+        self.books = {}  # (width, height, players) -> OpeningBook or None
+        self.fallback = SearchPolicy()
+
+    def choose(self, state, rng):
+        from book import DEFAULT_DIR, open_book
+        key = (state.board.width, state.board.height, state.num_players)
+        if key not in self.books:
+            self.books[key] = open_book(self.directory or DEFAULT_DIR, *key)
+        book = self.books[key]
+        entries = book.lookup(state) if book is not None else None
+        if entries:
+            return _best(entries, rng)
+        return self.fallback.choose(state, rng)
+
+
+@register_policy("solver")
+class SolverPolicy(Policy):
+    """Exact endgame search (solver.py) on a node budget; plays like "search" until it proves something."""
+    max_nodes = 20000
+
+    def __init__(self):
+        from solver import Solver
+        self.solver = Solver(self.max_nodes)  # the memo carries over between moves
+        self.fallback = SearchPolicy()
+
+    def choose(self, state, rng):
+        from solver import WIN, LOSS, worth_solving
+        if not worth_solving(state):
+            return self.fallback.choose(state, rng)
+        ranked = self.solver.rank_moves(state)
+        if ranked[0][0] == WIN:
+            return ranked[0][1]
+        move = self.fallback.choose(state, rng)
+        if any(result == LOSS and m == move for result, m in ranked):
+            return ranked[0][1]  # best-looking move not proven to lose
+        return move
+
+
+@register_policy("eval")
+class EvaluatorPolicy(Policy):
+    """One ply, scoring every child in a single batched evaluator.py call."""
+    weights = None  # .npz weight file; None uses the hand-tuned linear evaluator
+
+    def __init__(self):
+        from evaluator import LinearEvaluator, load_evaluator
+        self.evaluator = load_evaluator(self.weights) if self.weights else LinearEvaluator()
+
+    def choose(self, state, rng):
+        player = state.current_player
+        moves = state.legal_moves()
+        children = []
+        for move in moves:
+            child = state.copy()
+            child.play(move)
+            children.append(child)
+        scores = self.evaluator.evaluate(children, [player] * len(children))
+        return _best(list(zip(scores.tolist(), moves)), rng)
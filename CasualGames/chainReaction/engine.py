@@ -0,0 +1,424 @@
+"""Headless Chain Reaction rules engine.
+
+A fast, pygame-free implementation of the rules in game.Game: placement in
+Game.place_orb, the cascade in Game.update and turn order in Game.next_turn,
+with the animations collapsed to nothing. Boards are flat lists indexed by
+row * width + col; Board holds the neighbor tables for rectangles, tori,
+hex boards and boards with holes. fuzz.py checks this engine against the real game loop;
+run it after any change here.
+
+Positions that are mirror images of each other play out identically, so
+analysis results are cached under canonical_form() (see PositionCache).
+"""
+import zlib
+import threading
+from array import array
+from collections import deque, OrderedDict
+
+EMPTY = -1  # owner of a cell with no orbs (None in game.Cell)
+
+
+TOPOLOGIES = ("rect", "torus", "hex")
+SHAPES = ("full", "diamond", "ring", "cross")
+
+
+def critical_mass(row, col, width, height):
+    """Corners explode at 2 orbs, edges at 3, everything else at 4 (rectangular boards)."""
+    is_corner = (row in (0, height - 1)) and (col in (0, width - 1))
+    is_edge = not is_corner and (row in (0, height - 1) or col in (0, width - 1))
+    return 2 if is_corner else (3 if is_edge else 4)
+
+
+def _adjacent(row, col, width, height, topology):
+    """(row, col) of a cell's neighbors, possibly off the board for rect and hex."""
+    if topology == "hex":
+        # Odd rows sit half a cell to the right ("odd-r" offset rows, drawn as bricks)
+        shift = row & 1
+        return ((row - 1, col - 1 + shift), (row - 1, col + shift), (row + 1, col - 1 + shift),
+                (row + 1, col + shift), (row, col - 1), (row, col + 1))
+    if topology == "torus":
+        return (((row - 1) % height, col), ((row + 1) % height, col),
+                (row, (col - 1) % width), (row, (col + 1) % width))
+    # Same order as the original Game.get_neighbors: up, down, left, right
+    return (row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1)
+
+
+def shape_holes(shape, width, height, topology="rect"):
+    """Cells cut out of a width x height board: a SHAPES name or a mask.
+
+    A mask is one string per row joined by "/", "." for a cell and "#" for a
+    hole: "..../.##./....". Named shapes also lose any cell they would leave
+    with fewer than two neighbors, so every remaining cell can hold an orb.
+    """
+    if shape in (None, "", "full"):
+        return frozenset()
+    if shape not in SHAPES:
+        rows = shape.split("/")
+        if len(rows) != height or any(len(r) != width or set(r) - {".", "#"} for r in rows):
+            raise ValueError(f"mask must be {height} rows of {width} '.' or '#' joined by '/'")
+        return frozenset(r * width + c for r, text in enumerate(rows) for c, ch in enumerate(text) if ch == "#")
+    holes = set()
+    for i in range(width * height):
+        row, col = divmod(i, width)
+        # Distances from the center in units of the half sides, 0 at the middle and 1 at an edge
+        dy = abs(row + 0.5 - height / 2) / (height / 2)
+        dx = abs(col + 0.5 - width / 2) / (width / 2)
+        if shape == "diamond":
+            cut = dx + dy > 1.15
+        elif shape == "ring":
+            cut = dx < 0.4 and dy < 0.4
+        else:  # cross
+            cut = dx > 0.4 and dy > 0.4
+        if cut:
+            holes.add(i)
+    while True:
+        dead = {i for i in range(width * height) if i not in holes and len(
+            [n for n in _neighbor_cells(i, width, height, topology) if n not in holes]) < 2}
+        if not dead:
+            return frozenset(holes)
+        holes |= dead
+
+
+def _neighbor_cells(i, width, height, topology):
+    row, col = divmod(i, width)
+    return [r * width + c for r, c in _adjacent(row, col, width, height, topology)
+            if 0 <= r < height and 0 <= c < width]
+
+
+class Board:
+    """Static geometry of a board: neighbor and critical-mass tables.
+
+    Every topology comes down to the same tables, so the resolvers never
+    look at coordinates. A cell's critical mass is its neighbor count, which
+    gives the classic 2/3/4 on rectangles, 4 everywhere on a torus and up to
+    6 on hex boards. Holes are cells cut out of the board: no neighbors,
+    critical mass 0, never playable.
+
+    Neighbors are stored CSR-style, cell i's being
+    neighbor_index[neighbor_start[i]:neighbor_start[i + 1]] (int32 arrays,
+    np.frombuffer-ready); neighbors holds the same lists as tuples, the
+    quickest form to loop over in Python.
+    """
+    _cache = OrderedDict()  # least recently used first
+    CACHE_SIZE = 16  # boards kept for reuse; games hold on to their own
+    _lock = threading.Lock()
+
+    def __init__(self, width, height, topology="rect", holes=frozenset()):
+        if topology not in TOPOLOGIES:
+            raise ValueError(f"unknown topology {topology!r}")
+        if topology == "torus" and min(width, height) < 3:
+            raise ValueError("a torus needs at least 3 rows and columns")
+        self.width, self.height = width, height
+        self.topology = topology
+        self.holes = frozenset(holes)
+        self.size = width * height
+        self.neighbor_start = array("i", [0])
+        self.neighbor_index = array("i")
+        for i in range(self.size):
+            if i not in self.holes:
+                self.neighbor_index.extend(n for n in _neighbor_cells(i, width, height, topology)
+                                           if n not in self.holes)
+            self.neighbor_start.append(len(self.neighbor_index))
+        start, index = self.neighbor_start, self.neighbor_index
+        self.neighbors = tuple(tuple(index[start[i]:start[i + 1]]) for i in range(self.size))
+        self.critical = [len(cells) for cells in self.neighbors]
+        if any(c < 2 for i, c in enumerate(self.critical) if i not in self.holes):
+            raise ValueError("every cell needs at least two neighbors")
+        self.cells = tuple(i for i in range(self.size) if i not in self.holes)  # the playable ones
+        self._symmetries = None
+
+    @property
+    def key(self):
+        return (self.width, self.height, self.topology, self.holes)
+
+    @property
+    def symmetries(self):
+        """Cell gathers for each mirror of the board, identity first.
+
+        image[k] = board[gather[k]]. Candidates are the flips and half turn of
+        a rectangle plus, on square boards, the transposes and quarter turns
+        (the D4 group); only those mapping every neighbor list and hole onto
+        the board's own are kept. Plain rectangles and tori keep all of them,
+        hex boards and masks usually fewer.
+        """
+        if self._symmetries is None:
+            w, h = self.width, self.height
+            maps = [lambda r, c: (r, c), lambda r, c: (r, w - 1 - c),
+                    lambda r, c: (h - 1 - r, c), lambda r, c: (h - 1 - r, w - 1 - c)]
+            if w == h:
+                maps += [lambda r, c: (c, r), lambda r, c: (w - 1 - c, w - 1 - r),
+                         lambda r, c: (c, w - 1 - r), lambda r, c: (w - 1 - c, r)]
+            gathers = []
+            for transform in maps:
+                image = [r * w + c for r, c in (transform(*divmod(i, w)) for i in range(self.size))]
+                if all({image[n] for n in self.neighbors[i]} == set(self.neighbors[image[i]])
+                       for i in range(self.size)):
+                    gather = [0] * self.size
+                    for i, k in enumerate(image):
+                        gather[k] = i
+                    gathers.append(tuple(gather))
+            self._symmetries = tuple(gathers)
+        return self._symmetries
+
+    @classmethod
+    def get(cls, width, height, topology="rect", holes=frozenset()):
+        """Shared Board instance for a grid size, topology and set of holes."""
+        key = (width, height, topology, frozenset(holes))
+        # server.py builds boards on worker threads; the lock covers the table, not the (slow) build
+        with cls._lock:
+            board = cls._cache.get(key)
+            if board is not None:
+                cls._cache.move_to_end(key)
+                return board
+        board = cls(*key)
+        with cls._lock:
+            board = cls._cache.setdefault(key, board)
+            cls._cache.move_to_end(key)
+            # Servers build boards for any size and mask clients ask for; keep only the recent ones
+            while len(cls._cache) > cls.CACHE_SIZE:
+                cls._cache.popitem(last=False)
+        return board
+
+
+class GameState:
+    """A position plus whose turn it is; play() applies a move and its cascade."""
+    __slots__ = ("board", "num_players", "orbs", "owner", "cells_owned",
+                 "current_player", "turn_count", "winner")
+
+    def __init__(self, width, height, num_players, topology="rect", holes=frozenset()):
+        self.board = Board.get(width, height, topology, holes)
+        self.num_players = num_players
+        self.orbs = [0] * self.board.size
+        self.owner = [EMPTY] * self.board.size
+        self.cells_owned = [0] * num_players
+        self.current_player = 0
+        self.turn_count = 0
+        self.winner = None
+
+    def copy(self):
+        other = GameState.__new__(GameState)
+        other.board = self.board
+        other.num_players = self.num_players
+        other.orbs = self.orbs[:]
+        other.owner = self.owner[:]
+        other.cells_owned = self.cells_owned[:]
+        other.current_player = self.current_player
+        other.turn_count = self.turn_count
+        other.winner = self.winner
+        return other
+
+    @property
+    def is_over(self):
+        return self.winner is not None
+
+    def is_legal(self, idx):
+        owner = self.owner[idx]
+        return (self.winner is None and (owner == EMPTY or owner == self.current_player)
+                and self.board.critical[idx] > 0)
+
+    def legal_moves(self):
+        if self.winner is not None:
+            return []
+        player = self.current_player
+        if self.board.holes:
+            owner = self.owner
+            return [i for i in self.board.cells if owner[i] == EMPTY or owner[i] == player]
+        return [i for i, owner in enumerate(self.owner) if owner == EMPTY or owner == player]
+
+    def play(self, idx):
+        """Play the current player's move on cell idx; returns the chain length."""
+        if not self.is_legal(idx):
+            raise ValueError(f"illegal move {idx} for player {self.current_player}")
+        orbs, owner, cells_owned = self.orbs, self.owner, self.cells_owned
+        critical, neighbors = self.board.critical, self.board.neighbors
+        player = self.current_player
+        self.turn_count += 1
+
+        if owner[idx] == EMPTY:
+            cells_owned[player] += 1
+        owner[idx] = player
+        orbs[idx] += 1
+        chain = 0
+        if orbs[idx] >= critical[idx]:
+            queue = deque((idx,))
+            decided_after = self.turn_count >= self.num_players
+            while queue:
+                cell = queue.popleft()
+                # Game.update drops the rest of the cascade once the mover owns every cell
+                if decided_after and cells_owned[player] == sum(cells_owned):
+                    break
+                if orbs[cell] < critical[cell]:
+                    continue  # stale queue entry
+                chain += 1
+                orbs[cell] -= critical[cell]
+                if orbs[cell] == 0:
+                    owner[cell] = EMPTY
+                    cells_owned[player] -= 1
+                for n in neighbors[cell]:
+                    previous = owner[n]
+                    if previous != player:
+                        if previous != EMPTY:
+                            cells_owned[previous] -= 1
+                        cells_owned[player] += 1
+                        owner[n] = player
+                    orbs[n] += 1
+                    if orbs[n] >= critical[n]:
+                        queue.append(n)
+        self._next_turn()
+        return chain
+
+    def _next_turn(self):
+        n = self.num_players
+        cells_owned = self.cells_owned
+        if self.turn_count >= n:
+            active = [p for p in range(n) if cells_owned[p]]
+            if len(active) == 1:
+                self.winner = active[0]
+                return
+        while True:
+            self.current_player = (self.current_player + 1) % n
+            if self.turn_count < n or cells_owned[self.current_player]:
+                break
+
+    def digest(self):
+        """CRC32 of the board, stable across processes; used to check network replicas."""
+        return zlib.crc32(bytes(o & 0xFF for o in self.orbs) + bytes(o + 1 for o in self.owner))
+
+    def snapshot(self):
+        """Hashable summary used to compare positions (see fuzz.py)."""
+        return (tuple(self.orbs), tuple(self.owner), self.current_player, self.turn_count, self.winner)
+
+
+def canonical_form(state, mirrors=True):
+    """(key, gather): a key shared by every mirror image of state, and the mirror used.
+
+    Cell k of the canonical board is cell gather[k] of state. The move counter
+    only matters until everyone has moved once (nobody can be eliminated
+    before that), so later turn counts are folded together.
+
+    Mirrored positions resolve every move identically because a cascade ends
+    in the same position whatever order the cells burst in. The one exception
+    is the cut-off once the mover owns every cell, which can stop mirrored
+    cascades at different points. The winner is the same, so win/loss results
+    are exact; orb counts in previews may differ for such a game-ending move.
+    mirrors=False keys the position as it stands, for comparisons. The board's
+    key and the player count are included, so different board shapes and
+    games with more seats (which play on after a player is out) never share
+    cache entries.
+    """
+    # owner + 1 is 0..9, so each cell gets a unique code
+    codes = [orbs * 10 + owner + 1 for orbs, owner in zip(state.orbs, state.owner)]
+    best = best_gather = None
+    for gather in state.board.symmetries if mirrors else state.board.symmetries[:1]:
+        image = tuple(map(codes.__getitem__, gather))
+        if best is None or image < best:
+            best, best_gather = image, gather
+    return ((best, state.current_player, min(state.turn_count, state.num_players), state.num_players, state.board.key),
+            best_gather)
+
+
+class PositionCache:
+    """Per-position results (solver proofs, previews, evaluations) keyed by canonical form.
+
+    One LRU table shared by every tool in the process; entries are tagged with
+    a kind so different analyses can live side by side.
+    """
+
+    def __init__(self, size=1 << 20):
+        self.size = size
+        self.entries = OrderedDict()
+        self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, kind, key, default=None):
+        entry = self.entries.get((kind, key))
+        if entry is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self.entries.move_to_end((kind, key))
+        return entry
+
+    def put(self, kind, key, value):
+        self.entries[(kind, key)] = value
+        if len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+
+SHARED_CACHE = PositionCache()
+
+
+def preview_moves(state):
+    """Resolve every legal move from state in one pass.
+
+    Returns {cell: (captured, orbs_gained, eliminated)}: opponent cells the
+    mover would take, the change in the mover's orb total, and the players the
+    move would knock out.
+    """
+    player = state.current_player
+    before = state.owner
+    own_orbs = sum(o for o, w in zip(state.orbs, before) if w == player)
+    rivals = [p for p in range(state.num_players) if p != player and state.cells_owned[p]]
+    table = {}
+    for move in state.legal_moves():
+        child = state.copy()
+        child.play(move)
+        after = child.owner
+        captured = tuple(i for i, (old, new) in enumerate(zip(before, after))
+                         if new == player and old != player and old != EMPTY)
+        gained = sum(o for o, w in zip(child.orbs, after) if w == player) - own_orbs
+        eliminated = tuple(p for p in rivals if not child.cells_owned[p])
+        table[move] = (captured, gained, eliminated)
+    return table
+
+
+def critical_cells(state):
+    """Occupied cells one orb short of exploding."""
+    critical = state.board.critical
+    return [i for i, (orbs, owner) in enumerate(zip(state.orbs, state.owner))
+            if owner != EMPTY and orbs == critical[i] - 1]
+
+
+class PreviewCache:
+    """preview_moves and critical_cells results for the positions a UI shows.
+
+    Results are stored once per symmetry class in a PositionCache (canonical
+    cell numbering) and mapped back onto the board as drawn. The mapped copies
+    of the last few positions are kept too, so a frame costs one lookup.
+    """
+
+    def __init__(self, size=64, cache=None):
+        self.size = size
+        self.cache = SHARED_CACHE if cache is None else cache
+        self.entries = OrderedDict()
+
+    def get(self, state):
+        """(move table, critical cells) for state, computed on first request."""
+        snapshot = state.snapshot()
+        entry = self.entries.get(snapshot)
+        if entry is not None:
+            self.entries.move_to_end(snapshot)
+            return entry
+        key, gather = canonical_form(state)
+        canonical = self.cache.get("preview", key)
+        if canonical is None:
+            to_canonical = [0] * len(gather)
+            for k, i in enumerate(gather):
+                to_canonical[i] = k
+            canonical = ({to_canonical[move]: (tuple(sorted(to_canonical[i] for i in captured)), gained, eliminated)
+                          for move, (captured, gained, eliminated) in preview_moves(state).items()},
+                         tuple(to_canonical[i] for i in critical_cells(state)))
+            self.cache.put("preview", key, canonical)
+        table, threats = canonical
+        entry = ({gather[move]: (tuple(sorted(gather[i] for i in captured)), gained, eliminated)
+                  for move, (captured, gained, eliminated) in table.items()},
+                 sorted(gather[i] for i in threats))
+        self.entries[snapshot] = entry
+        if len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+        return entry
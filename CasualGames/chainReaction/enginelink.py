@@ -0,0 +1,339 @@
+"""Line protocol for engines running in their own process, and the driver that plays them.
+
+An engine reads commands on stdin and answers on stdout, one per line, in the
+spirit of chess's UCI. Cells are indices (row * width + col), as in net.py.
+
+    crp                                   -> id name <name>, id author <author> (optional), crpok
+    isready                               -> readyok
+    newgame 10x12 4 [topology [shape]]       board and player count, as game.py --grid/--topology/--shape
+    position startpos [moves 17 42 ...]      the game so far
+    go movetime 500                       -> bestmove 17    think for up to 500 ms
+    go time 30000 inc 200                 -> bestmove 17    the mover's clock and increment, in ms
+    stop                                     answer bestmove now
+    quit
+
+An engine may send "info ..." lines while thinking; the driver keeps the
+last one. Commands are processed in order, so the driver pipelines them: it
+sends a request as soon as a position is known and never waits on the pipe.
+EngineProcess enforces the time limits: "stop" goes out when the budget runs
+out, and an engine that has still not answered STOP_GRACE later (or runs its
+clock below zero) forfeits.
+
+    python enginelink.py serve --policy search           # bots.py policy as an engine
+    python enginelink.py match "python enginelink.py serve --policy greedy" "./my_engine" --games 20 --movetime 100
+    python game.py --engine 2="python enginelink.py serve --policy search" --movetime 500
+"""
+import os
+import sys
+import time
+import queue
+import random
+import shlex
+import argparse
+import threading
+import subprocess
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from engine import GameState, shape_holes  # noqa: E402
+
+DEFAULT_MOVETIME = 1000  # ms per move when no time control is given
+STOP_GRACE = 0.25  # seconds an engine has to answer after "stop"
+HANDSHAKE_TIMEOUT = 10  # seconds for "crpok"
+PROTOCOL = "crp"
+
+
+class EngineError(Exception):
+    """The engine crashed, broke the protocol, played an illegal move or ran out of time."""
+
+
+def parse_newgame(args):
+    """(width, height, players, topology, shape) from the arguments of a newgame command."""
+    width, height = (int(v) for v in args[0].lower().split("x"))
+    return width, height, int(args[1]), args[2] if len(args) > 2 else "rect", args[3] if len(args) > 3 else "full"
+
+
+# --- Engine side ---
+
+def serve(policy_name, stdin=sys.stdin, stdout=sys.stdout, seed=None):
+    """Answer the protocol on stdin/stdout with a bots.py policy.
+
+    Policies search to a fixed depth, so "go" limits are not consulted; the
+    driver still enforces them.
+    """
+    from bots import make_policy
+    policy = make_policy(policy_name)
+    rng = random.Random(seed)
+    setup = (10, 12, 2, "rect", "full")
+    state = None
+
+    def say(line):
+        stdout.write(line + "\n")
+        stdout.flush()
+
+    for line in stdin:
+        command, *args = line.split() or [""]
+        if command == PROTOCOL:
+            say(f"id name {policy_name}")
+            say(f"{PROTOCOL}ok")
+        elif command == "isready":
+            say("readyok")
+        elif command == "newgame":
+            setup = parse_newgame(args)
+        elif command == "position":
+            width, height, players, topology, shape = setup
+            state = GameState(width, height, players, topology, shape_holes(shape, width, height, topology))
+            for move in args[2:] if args[1:2] == ["moves"] else []:
+                state.play(int(move))
+        elif command == "go":
+            if state is None or state.is_over:
+                say("bestmove none")
+            else:
+                say(f"bestmove {policy.choose(state, rng)}")
+        elif command == "quit":
+            break
+        elif command and command != "stop":
+            say(f"info string unknown command {command}")
+
+
+# --- Driver side ---
+
+class EngineProcess:
+    """An engine subprocess playing one seat under a time control.
+
+    A reader thread queues its output, so request() and poll() never block.
+    Times are in milliseconds: movetime per move, or a clock of time plus inc
+    after every move.
+    """
+
+    def __init__(self, command, movetime=None, time=None, inc=0):
+        self.command = command
+        self.name = command
+        self.process = subprocess.Popen(shlex.split(command), stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        text=True, bufsize=1)
+        self.incoming = queue.Queue()
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._reader.start()
+        self.movetime = movetime if movetime is not None or time is not None else DEFAULT_MOVETIME
+        self.time = time
+        self.clock = time  # remaining ms, or None under movetime
+        self.inc = inc
+        self.info = ""  # last info line
+        self.handshake_deadline = _now() + HANDSHAKE_TIMEOUT
+        self.ready = False
+        self.replies = deque()  # one entry per go sent and not yet answered: True if still wanted
+        self.pending = None  # (sent, deadline) of the wanted request
+        self.stop_sent = False
+        self.send(PROTOCOL)
+
+    def _read_loop(self):
+        for line in self.process.stdout:
+            self.incoming.put(line.strip())
+        self.incoming.put(None)
+
+    def send(self, line):
+        try:
+            self.process.stdin.write(line + "\n")
+            self.process.stdin.flush()
+        except (OSError, ValueError):
+            raise EngineError(f"{self.name}: engine exited")
+
+    def new_game(self, width, height, num_players, topology="rect", shape="full"):
+        self.abandon()
+        self.clock = self.time
+        self.send(f"newgame {width}x{height} {num_players} {topology} {shape}")
+
+    def request(self, moves):
+        """Ask for a move after the cells played so far; the answer arrives through poll()."""
+        self.abandon()
+        limit = self.movetime if self.clock is None else self.clock
+        self.send("position startpos" + ("" if not moves else " moves " + " ".join(map(str, moves))))
+        self.send(f"go movetime {self.movetime}" if self.clock is None else f"go time {self.clock} inc {self.inc}")
+        self.replies.append(True)
+        sent = _now()
+        self.pending = (sent, sent + limit / 1000)
+        self.stop_sent = False
+
+    def abandon(self):
+        """Stop waiting for the current request; its answer will be discarded."""
+        if self.pending is not None:
+            self.replies[-1] = False
+            self.pending = None
+            self.send("stop")
+
+    def poll(self):
+        """The requested move once it has arrived, else None; raises EngineError on a forfeit."""
+        while True:
+            try:
+                line = self.incoming.get_nowait()
+            except queue.Empty:
+                break
+            move = self._handle(line)
+            if move is not None:
+                return move
+        self._check_time()
+        return None
+
+    def wait(self):
+        """Block until the requested move arrives (headless matches)."""
+        while True:
+            self._check_time()
+            sent, deadline = self.pending
+            timeout = max(0.0, (deadline if not self.stop_sent else deadline + STOP_GRACE) - _now())
+            try:
+                line = self.incoming.get(timeout=timeout)
+            except queue.Empty:
+                continue
+            move = self._handle(line)
+            if move is not None:
+                return move
+
+    def _handle(self, line):
+        if line is None:
+            raise EngineError(f"{self.name}: engine exited")
+        command, _, rest = line.partition(" ")
+        if command == "bestmove":
+            if not self.replies:
+                raise EngineError(f"{self.name}: bestmove without go")
+            if not self.replies.popleft():
+                return None  # answer to an abandoned request
+            sent, deadline = self.pending
+            self.pending = None
+            elapsed = _now() - sent
+            if self.clock is not None:
+                self.clock += self.inc - round(elapsed * 1000)
+                if self.clock < -STOP_GRACE * 1000:
+                    raise EngineError(f"{self.name}: lost on time")
+            elif elapsed > self.movetime / 1000 + STOP_GRACE:
+                raise EngineError(f"{self.name}: took {elapsed * 1000:.0f} ms for a {self.movetime} ms move")
+            try:
+                return int(rest)
+            except ValueError:
+                raise EngineError(f"{self.name}: bad bestmove {rest!r}")
+        if command == "id" and rest.startswith("name "):
+            self.name = rest[5:]
+        elif command == f"{PROTOCOL}ok":
+            self.ready = True
+        elif command == "info":
+            self.info = rest
+        return None
+
+    def _check_time(self):
+        now = _now()
+        if not self.ready and now > self.handshake_deadline:
+            raise EngineError(f"{self.name}: no {PROTOCOL}ok after {HANDSHAKE_TIMEOUT}s")
+        if self.pending is None:
+            return
+        if now > self.pending[1] and not self.stop_sent:
+            self.send("stop")
+            self.stop_sent = True
+        if now > self.pending[1] + STOP_GRACE:
+            raise EngineError(f"{self.name}: no bestmove in time")
+
+    def close(self):
+        try:
+            self.send("quit")
+            self.process.stdin.close()
+        except EngineError:
+            pass
+        try:
+            self.process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+def _now():
+    return time.monotonic()
+
+
+# --- Headless engine matches ---
+
+def play_match_game(engines, width, height, topology="rect", shape="full", max_moves=1000):
+    """One game between engine seats; returns (winning seat or None, moves, forfeiting seat or None)."""
+    state = GameState(width, height, len(engines), topology, shape_holes(shape, width, height, topology))
+    for engine in engines:
+        engine.new_game(width, height, len(engines), topology, shape)
+    moves = []
+    while not state.is_over and state.turn_count < max_moves:
+        seat = state.current_player
+        try:
+            engines[seat].request(moves)
+            move = engines[seat].wait()
+            if not state.is_legal(move):
+                raise EngineError(f"{engines[seat].name}: illegal move {move}")
+        except EngineError as e:
+            print(e, file=sys.stderr)
+            return None, len(moves), seat
+        state.play(move)
+        moves.append(move)
+    return state.winner, len(moves), None
+
+
+def run_match(commands, games, grid, topology, shape, time_control):
+    from tournament import rotations
+    engines = [EngineProcess(command, **time_control) for command in commands]
+    wins = [0] * len(engines)
+    forfeits = [0] * len(engines)
+    total_moves = 0
+    start = time.perf_counter()
+    try:
+        for n in range(games):
+            # Entrants rotate through the seats
+            seating = rotations(list(range(len(engines))))[n % len(engines)]
+            winner, moves, forfeit = play_match_game([engines[i] for i in seating], *grid, topology, shape)
+            total_moves += moves
+            if winner is not None:
+                wins[seating[winner]] += 1
+            if forfeit is not None:
+                forfeits[seating[forfeit]] += 1
+                # A forfeiting engine may be stuck mid-search; give it a fresh process
+                i = seating[forfeit]
+                engines[i].close()
+                engines[i] = EngineProcess(commands[i], **time_control)
+    finally:
+        for engine in engines:
+            engine.close()
+    elapsed = time.perf_counter() - start
+    for engine, w, f in zip(engines, wins, forfeits):
+        print(f"{engine.name:<30} {w:>5} wins  {f:>3} forfeits")
+    print(f"{games} games, {total_moves} moves in {elapsed:.1f}s ({total_moves / elapsed:.0f} moves/s)", file=sys.stderr)
+
+
+def time_control_args(parser):
+    """--movetime/--time/--inc, shared with game.py."""
+    parser.add_argument("--movetime", type=int, help=f"ms per engine move (default {DEFAULT_MOVETIME})")
+    parser.add_argument("--time", type=int, help="engine clock in ms, instead of --movetime")
+    parser.add_argument("--inc", type=int, default=0, help="ms added to the engine clock after each move")
+
+
+def time_control(args):
+    return {"movetime": args.movetime, "time": args.time, "inc": args.inc}
+
+
+def main():
+    from tournament import parse_grid
+    parser = argparse.ArgumentParser(description="Out-of-process Chain Reaction engines")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve_parser = commands.add_parser("serve", help="speak the protocol on stdin/stdout with a bots.py policy")
+    serve_parser.add_argument("--policy", default="greedy")
+    serve_parser.add_argument("--seed", type=int)
+    match_parser = commands.add_parser("match", help="play engines against each other, headless")
+    match_parser.add_argument("engines", nargs="+", help="engine command lines, one per seat")
+    match_parser.add_argument("--games", type=int, default=10)
+    match_parser.add_argument("--grid", type=parse_grid, default=(10, 12))
+    match_parser.add_argument("--topology", choices=("rect", "torus", "hex"), default="rect")
+    match_parser.add_argument("--shape", default="full")
+    time_control_args(match_parser)
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve(args.policy, seed=args.seed)
+    else:
+        if len(args.engines) < 2:
+            parser.error("a match needs at least two engines")
+        run_match(args.engines, args.games, args.grid, args.topology, args.shape, time_control(args))
+
+
+if __name__ == "__main__":
+    main()
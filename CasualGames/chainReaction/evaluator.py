@@ -0,0 +1,260 @@
+"""Vectorized position evaluation for the headless engine.
+
+Positions are turned into feature planes (one HxW layer per feature, from a
+given player's point of view) and scored a whole batch at a time, so all the
+children of a search node cost one matrix multiply instead of a Python loop
+per position. Two evaluators read the same planes:
+
+* LinearEvaluator: hand-tuned weights on each plane's mean; works on any grid.
+* MLPEvaluator: a small pure-NumPy multilayer perceptron for one grid size.
+
+Both save to and load from .npz weight files:
+
+    python evaluator.py --init-mlp weights.npz --grid 10x12 --hidden 128 64
+    python evaluator.py --bench --grid 12x14 --weights weights.npz
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from engine import EMPTY, GameState  # noqa: E402
+
+PLANES = ("own", "opponent", "empty", "own_fill", "opponent_fill",
+          "own_ready", "opponent_ready", "capacity")
+# Hand-tuned: orbs relative to capacity matter most, cells about to burst next
+DEFAULT_LINEAR = {"own": 1.0, "opponent": -1.0, "own_fill": 2.0, "opponent_fill": -2.0,
+                  "own_ready": 1.5, "opponent_ready": -2.5}
+
+_critical = {}  # Board.key -> critical masses as float32
+
+
+def critical_array(board):
+    if board.key not in _critical:
+        _critical[board.key] = np.array(board.critical, dtype=np.float32)
+    return _critical[board.key]
+
+
+def encode(states, players=None):
+    """Feature planes (batch, len(PLANES), height, width) as float32.
+
+    players gives each position's point of view (default: the player to move).
+    All states must share a grid size.
+    """
+    board = states[0].board
+    # bytes() is the quickest way from a list of small ints into NumPy; owners include -1
+    orbs = np.frombuffer(b"".join([bytes(s.orbs) for s in states]), dtype=np.uint8)
+    orbs = orbs.reshape(len(states), board.size).astype(np.float32)
+    owner = np.array([s.owner for s in states], dtype=np.int8)
+    if players is None:
+        players = [s.current_player for s in states]
+    player = np.asarray(players, dtype=np.int8)[:, None]
+    return _planes(orbs, owner == player, owner == EMPTY, board)
+
+
+def encode_records(orbs, relative_owner, board):
+    """Feature planes from stored (orbs, owner) planes, as written by selfplay.py.
+
+    relative_owner is 0 for empty cells, 1 for the player to move and 2+ for
+    opponents; both arrays have shape (batch, height, width) or (batch, cells).
+    """
+    batch = len(orbs)
+    orbs = np.asarray(orbs).reshape(batch, board.size).astype(np.float32)
+    relative_owner = np.asarray(relative_owner).reshape(batch, board.size)
+    return _planes(orbs, relative_owner == 1, relative_owner == 0, board)
+
+
+def _planes(orbs, own, empty, board):
+    critical = critical_array(board)
+    opponent = ~(own | empty)
+    fill = orbs / np.maximum(critical, 1)  # holes have critical mass 0 and no orbs
+    ready = orbs == critical - 1
+    planes = np.empty((len(orbs), len(PLANES), board.size), dtype=np.float32)
+    planes[:, 0] = own
+    planes[:, 1] = opponent
+    planes[:, 2] = empty
+    planes[:, 3] = own * fill
+    planes[:, 4] = opponent * fill
+    planes[:, 5] = own & ready
+    planes[:, 6] = opponent & ready
+    planes[:, 7] = critical / 4
+    return planes.reshape(len(orbs), len(PLANES), board.height, board.width)
+
+
+class Evaluator:
+    """Scores positions in [-1, 1] for a player; finished games score exactly -1 or 1."""
+    kind = None
+
+    def score_planes(self, planes):
+        raise NotImplementedError
+
+    def evaluate(self, states, players=None):
+        if not states:
+            return np.empty(0, dtype=np.float32)
+        if players is None:
+            players = [s.current_player for s in states]
+        scores = self.score_planes(encode(states, players))
+        for i, state in enumerate(states):
+            if state.winner is not None:
+                scores[i] = 1.0 if state.winner == players[i] else -1.0
+        return scores
+
+
+class LinearEvaluator(Evaluator):
+    kind = "linear"
+
+    def __init__(self, weights=None, bias=0.0):
+        if weights is None:
+            weights = [DEFAULT_LINEAR.get(name, 0.0) for name in PLANES]
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.bias = float(bias)
+
+    def score_planes(self, planes):
+        return np.tanh(planes.mean(axis=(2, 3)) @ self.weights + self.bias)
+
+    def arrays(self):
+        return {"weights": self.weights, "bias": np.float32(self.bias)}
+
+
+class MLPEvaluator(Evaluator):
+    """Fully connected ReLU layers over the flattened planes, tanh output."""
+    kind = "mlp"
+
+    def __init__(self, layers, grid):
+        self.layers = [(np.asarray(w, dtype=np.float32), np.asarray(b, dtype=np.float32)) for w, b in layers]
+        self.grid = tuple(grid)
+        expected = len(PLANES) * self.grid[0] * self.grid[1]
+        if self.layers[0][0].shape[0] != expected:
+            raise ValueError(f"first layer takes {self.layers[0][0].shape[0]} inputs, "
+                             f"a {self.grid[0]}x{self.grid[1]} board has {expected}")
+
+    @classmethod
+    def random(cls, grid, hidden=(64,), seed=0):
+        """He-initialized network, a starting point for training."""
+        rng = np.random.default_rng(seed)
+        sizes = [len(PLANES) * grid[0] * grid[1], *hidden, 1]
+        layers = [(rng.normal(0, np.sqrt(2 / n_in), (n_in, n_out)), np.zeros(n_out))
+                  for n_in, n_out in zip(sizes, sizes[1:])]
+        return cls(layers, grid)
+
+    def score_planes(self, planes):
+        x = planes.reshape(len(planes), -1)
+        for w, b in self.layers[:-1]:
+            x = np.maximum(x @ w + b, 0)
+        w, b = self.layers[-1]
+        return np.tanh(x @ w + b)[:, 0]
+
+    def arrays(self):
+        arrays = {"grid": np.array(self.grid)}
+        for i, (w, b) in enumerate(self.layers):
+            arrays[f"w{i}"], arrays[f"b{i}"] = w, b
+        return arrays
+
+
+def save_evaluator(evaluator, path):
+    np.savez(path, kind=np.array(evaluator.kind), planes=np.array(PLANES), **evaluator.arrays())
+
+
+def load_evaluator(path):
+    with np.load(path) as data:
+        if tuple(data["planes"]) != PLANES:
+            raise ValueError(f"{path} was trained on different feature planes")
+        kind = str(data["kind"])
+        if kind == "linear":
+            return LinearEvaluator(data["weights"], data["bias"])
+        if kind == "mlp":
+            layers = []
+            while f"w{len(layers)}" in data:
+                layers.append((data[f"w{len(layers)}"], data[f"b{len(layers)}"]))
+            return MLPEvaluator(layers, data["grid"])
+    raise ValueError(f"unknown evaluator kind {kind!r} in {path}")
+
+
+def python_linear(state, player, weights):
+    """LinearEvaluator's score computed one position at a time, for comparison."""
+    critical = state.board.critical
+    totals = [0.0] * len(PLANES)
+    for orbs, owner, cm in zip(state.orbs, state.owner, critical):
+        if owner == EMPTY:
+            totals[2] += 1
+        else:
+            base = 0 if owner == player else 1
+            totals[base] += 1
+            totals[3 + base] += orbs / cm
+            if orbs == cm - 1:
+                totals[5 + base] += 1
+        totals[7] += cm / 4
+    return np.tanh(sum(w * t for w, t in zip(weights, totals)) / state.board.size)
+
+
+def bench(evaluator, grid, positions=50, seed=0):
+    """Time scoring every child of midgame positions: per-position Python vs one batch."""
+    from bots import material
+    rng = random.Random(seed)
+    nodes = []
+    while len(nodes) < positions:
+        state = GameState(grid[0], grid[1], 2)
+        for _ in range(rng.randint(20, 80)):
+            if state.is_over:
+                break
+            state.play(rng.choice(state.legal_moves()))
+        if not state.is_over:
+            children = []
+            for move in state.legal_moves():
+                child = state.copy()
+                child.play(move)
+                children.append(child)
+            nodes.append((state.current_player, children))
+
+    start = time.perf_counter()
+    for player, children in nodes:
+        [material(child, player) for child in children]
+    material_s = time.perf_counter() - start
+    weights = LinearEvaluator().weights.tolist()
+    start = time.perf_counter()
+    for player, children in nodes:
+        [python_linear(child, player, weights) for child in children]
+    python_s = time.perf_counter() - start
+    start = time.perf_counter()
+    for player, children in nodes:
+        evaluator.evaluate(children, [player] * len(children))
+    batched_s = time.perf_counter() - start
+    count = sum(len(children) for _, children in nodes)
+    return {"children": count, "material_us": material_s / count * 1e6,
+            "python_linear_us": python_s / count * 1e6, "batched_us": batched_s / count * 1e6}
+
+
+def main():
+    from tournament import parse_grid
+    parser = argparse.ArgumentParser(description="Chain Reaction position evaluators")
+    parser.add_argument("--grid", type=parse_grid, default=(10, 12), help="WIDTHxHEIGHT")
+    parser.add_argument("--weights", help="evaluator .npz to load (default: hand-tuned linear)")
+    parser.add_argument("--init-mlp", metavar="PATH", help="write a freshly initialized MLP for --grid")
+    parser.add_argument("--save-linear", metavar="PATH", help="write the hand-tuned linear weights")
+    parser.add_argument("--hidden", type=int, nargs="+", default=[64])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--bench", action="store_true", help="time batched against per-position scoring")
+    args = parser.parse_args()
+
+    if args.init_mlp:
+        save_evaluator(MLPEvaluator.random(args.grid, args.hidden, args.seed), args.init_mlp)
+        print(f"wrote {args.init_mlp}")
+    if args.save_linear:
+        save_evaluator(LinearEvaluator(), args.save_linear)
+        print(f"wrote {args.save_linear}")
+    if args.bench:
+        evaluator = load_evaluator(args.weights) if args.weights else LinearEvaluator()
+        result = bench(evaluator, args.grid, seed=args.seed)
+        print(f"{evaluator.kind} on {args.grid[0]}x{args.grid[1]}, {result['children']} child positions, "
+              f"us per position: {result['batched_us']:.1f} batched, "
+              f"{result['python_linear_us']:.1f} linear heuristic in Python, "
+              f"{result['material_us']:.1f} bots.material")
+
+
+if __name__ == "__main__":
+    main()
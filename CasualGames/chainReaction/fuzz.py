@@ -0,0 +1,228 @@
+"""Differential fuzzer: a fast resolver against the real game loop.
+
+Plays seeded random games through game.Game (Game.update with animations
+fast-forwarded) and through a fast resolver, comparing the board after every
+move. Any divergence is shrunk to a minimal move list and printed as JSON.
+
+    python fuzz.py --cases 2000 --workers 4
+    python fuzz.py --resolver engine:GameState --players 9 --preset 12x14
+    python fuzz.py --topology hex --shape diamond
+
+A resolver is any callable taking (width, height, num_players, topology, holes)
+and returning an object with play(idx), legal_moves() and snapshot() like
+engine.GameState.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import importlib
+import multiprocessing
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+# Game loads its assets relative to the working directory
+HERE = os.path.dirname(os.path.abspath(__file__))
+os.chdir(HERE)
+sys.path.insert(0, HERE)
+
+import game  # noqa: E402
+
+DEFAULT_RESOLVER = "engine:GameState"
+MAX_MOVES = 600
+
+_reference = None  # one headless Game per process
+_resolver = None
+
+
+def load_resolver(spec):
+    module_name, _, attr = spec.partition(":")
+    return getattr(importlib.import_module(module_name), attr or "GameState")
+
+
+def _init_worker(resolver_spec):
+    global _reference, _resolver
+    _reference = game.Game()
+    _reference.sounds = None
+    _resolver = load_resolver(resolver_spec)
+
+
+def reference_new(preset, num_players, shape=("rect", "full")):
+    g = _reference
+    game.set_grid_size(*preset)
+    game.set_board_shape(*shape)
+    g.num_players = num_players
+    g.reset_game()
+    g.game_state = "playing"
+    return g
+
+
+def reference_snapshot(g):
+    """Same layout as engine.GameState.snapshot()."""
+    cells = [c for row in g.grid for c in row]
+    return (tuple(c.orbs for c in cells),
+            tuple(-1 if c.owner is None else c.owner for c in cells),
+            g.current_player, g.turn_count, g.winner)
+
+
+def reference_play(g, idx):
+    row, col = divmod(idx, game.GRID_WIDTH)
+    if g.game_state != "playing" or not g.place_orb(row, col):
+        raise ValueError(f"illegal move {idx}")
+    g.resolve_turn()
+
+
+def _outcome(fn):
+    """Run fn, returning ("ok", value) or ("error", exception type name)."""
+    try:
+        return ("ok", fn())
+    except Exception as e:  # a crash on either side is a divergence, not a fuzzer error
+        return ("error", type(e).__name__)
+
+
+def new_resolver(g, num_players):
+    """The resolver on the reference game's board."""
+    board = g.board
+    return _resolver(board.width, board.height, num_players, board.topology, board.holes)
+
+
+def replay(preset, num_players, moves, shape):
+    """Replay moves through both sides.
+
+    Returns None if they agree throughout, "illegal" if the reference rejects a
+    move (an invalid shrink candidate), or a dict describing the divergence.
+    """
+    width = preset[0]
+    ref = reference_new(preset, num_players, shape)
+    fast = new_resolver(ref, num_players)
+    for n, idx in enumerate(moves):
+        if ref.game_state != "playing":
+            return "illegal"
+        row, col = divmod(idx, width)
+        cell = ref.grid[row][col]
+        if cell.is_hole or (cell.owner is not None and cell.owner != ref.current_player):
+            return "illegal"
+        ref_result = _outcome(lambda: (reference_play(ref, idx), reference_snapshot(ref))[1])
+        fast_result = _outcome(lambda: (fast.play(idx), fast.snapshot())[1])
+        if ref_result != fast_result:
+            return {"move": n, "reference": _describe(ref_result), "fast": _describe(fast_result)}
+        if ref_result[0] == "error":
+            return "illegal"
+    return None
+
+
+def _describe(result):
+    kind, value = result
+    if kind == "error":
+        return {"error": value}
+    orbs, owner, player, turns, winner = value
+    return {"orbs": list(orbs), "owner": list(owner), "current_player": player,
+            "turn_count": turns, "winner": winner}
+
+
+def shrink(preset, num_players, moves, shape):
+    """Delta-debug the move list down to a minimal one that still diverges."""
+    def fails(candidate):
+        return isinstance(replay(preset, num_players, candidate, shape), dict)
+
+    chunk = max(1, len(moves) // 2)
+    while True:
+        i = 0
+        removed = False
+        while i < len(moves):
+            candidate = moves[:i] + moves[i + chunk:]
+            if candidate and fails(candidate):
+                moves = candidate
+                removed = True
+            else:
+                i += chunk
+        if chunk == 1 and not removed:
+            return moves
+        if not removed:
+            chunk = max(1, chunk // 2)
+
+
+def fuzz_case(args):
+    """Play one seeded random game through both sides; returns (moves, divergence)."""
+    seed, presets, player_counts, max_moves, shape = args
+    rng = random.Random(seed)
+    random.seed(seed)  # particle and rotation randomness inside Game
+    preset = rng.choice(presets)
+    num_players = rng.choice(player_counts)
+    width = preset[0]
+    ref = reference_new(preset, num_players, shape)
+    fast = new_resolver(ref, num_players)
+    moves = []
+    while ref.game_state == "playing" and len(moves) < max_moves:
+        legal = [c.row * width + c.col for row in ref.grid for c in row
+                 if not c.is_hole and (c.owner is None or c.owner == ref.current_player)]
+        idx = rng.choice(legal)
+        moves.append(idx)
+        ref_result = _outcome(lambda: (reference_play(ref, idx), reference_snapshot(ref))[1])
+        fast_result = _outcome(lambda: (fast.play(idx), fast.snapshot())[1])
+        if ref_result != fast_result:
+            minimal = shrink(preset, num_players, moves, shape)
+            divergence = replay(preset, num_players, minimal, shape)
+            return len(moves), {
+                "seed": seed, "preset": f"{preset[0]}x{preset[1]}", "topology": shape[0], "shape": shape[1],
+                "num_players": num_players,
+                "moves": [list(divmod(m, width)) for m in minimal], "divergence": divergence,
+            }
+        if ref_result[0] == "error":
+            break  # both sides crashed the same way; nothing more to compare
+    return len(moves), None
+
+
+def parse_preset(text):
+    for preset in game.GRID_PRESETS:
+        if text == f"{preset[0]}x{preset[1]}":
+            return preset
+    raise argparse.ArgumentTypeError(f"unknown preset {text}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Differential fuzzer for Chain Reaction resolvers")
+    parser.add_argument("--cases", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0, help="first case seed")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--resolver", default=DEFAULT_RESOLVER, help="module:callable")
+    parser.add_argument("--preset", type=parse_preset, action="append",
+                        help="grid preset such as 10x12 (default: all)")
+    parser.add_argument("--players", type=int, action="append", help="player count (default: 2-9)")
+    parser.add_argument("--max-moves", type=int, default=MAX_MOVES)
+    parser.add_argument("--topology", choices=("rect", "torus", "hex"), default="rect")
+    parser.add_argument("--shape", default="full", help="board shape or mask, as game.py --shape")
+    args = parser.parse_args()
+
+    presets = args.preset or game.GRID_PRESETS
+    player_counts = args.players or list(range(2, len(game.PLAYER_COLORS) + 1))
+    jobs = [(seed, presets, player_counts, args.max_moves, (args.topology, args.shape))
+            for seed in range(args.seed, args.seed + args.cases)]
+
+    start = time.perf_counter()
+    total_moves = 0
+    failures = []
+    # Spawned rather than forked workers, so each gets its own SDL state. SDL traps
+    # SIGTERM, which makes Pool.terminate() hang, so the pool is closed and joined instead.
+    ctx = multiprocessing.get_context("spawn")
+    pool = ctx.Pool(args.workers, initializer=_init_worker, initargs=(args.resolver,))
+    try:
+        for moves, failure in pool.imap_unordered(fuzz_case, jobs, chunksize=4):
+            total_moves += moves
+            if failure:
+                failures.append(failure)
+                print(json.dumps(failure), flush=True)
+    finally:
+        pool.close()
+        pool.join()
+    elapsed = time.perf_counter() - start
+    print(f"{args.cases} games, {total_moves} moves in {elapsed:.1f}s "
+          f"({total_moves / elapsed:.0f} moves/s), {len(failures)} divergences", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,8 +6,13 @@ import os
 import wave
 import struct
 import urllib.request
+import json
+import time
 from collections import deque
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
+import surfaces
 
 # --- Game Configuration ---
 # Get screen size and maximize grid
@@ -16,28 +21,61 @@ info = pygame.display.Info()
 AVAILABLE_WIDTH = info.current_w
 AVAILABLE_HEIGHT = info.current_h
 
+# Built-in grid presets: (columns, rows, UI strip height)
+GRID_PRESETS = [(8, 10, 120), (10, 12, 140), (12, 14, 160)]
+
+MAX_GRID_SIZE = 200  # columns or rows; bigger boards than the window get a camera
+
+def set_grid_size(grid_width, grid_height, ui_height=None):
+    """Recompute the layout globals for a grid size (affects Games created afterwards)."""
+    global GRID_WIDTH, GRID_HEIGHT, UI_HEIGHT, CELL_SIZE, SCREEN_WIDTH, SCREEN_HEIGHT, HEADER_HEIGHT
+    global VIEW_WIDTH, VIEW_HEIGHT
+    if ui_height is None:
+        # Custom sizes take the UI strip of the smallest preset they fit in
+        ui_height = next((ui for w, h, ui in GRID_PRESETS if grid_width <= w and grid_height <= h), GRID_PRESETS[-1][2])
+    GRID_WIDTH, GRID_HEIGHT, UI_HEIGHT = grid_width, grid_height, ui_height
+
+    # Make cells a reasonable size but keep a minimum for touch targets
+    CELL_SIZE = max(24, min(AVAILABLE_WIDTH // GRID_WIDTH, (AVAILABLE_HEIGHT - UI_HEIGHT) // GRID_HEIGHT))
+    # Board viewport: the whole board when it fits, otherwise as much as the display allows
+    VIEW_WIDTH = min(GRID_WIDTH * CELL_SIZE, AVAILABLE_WIDTH)
+    VIEW_HEIGHT = min(GRID_HEIGHT * CELL_SIZE, AVAILABLE_HEIGHT - UI_HEIGHT)
+    SCREEN_WIDTH = VIEW_WIDTH
+    SCREEN_HEIGHT = VIEW_HEIGHT + UI_HEIGHT
+
+    # Responsive header height used across drawing/interaction
+    HEADER_HEIGHT = max(50, int(CELL_SIZE * 1.2))
+
+MIN_WINDOW_SIZE = (320, 240)
+
+def set_window_size(width, height):
+    """Lay the current grid out for a window resized (or moved to another display) to width x height.
+
+    Unlike the startup layout the screen keeps the window's size; the camera
+    centers a board smaller than the viewport.
+    """
+    global AVAILABLE_WIDTH, AVAILABLE_HEIGHT, SCREEN_WIDTH, SCREEN_HEIGHT, VIEW_WIDTH, VIEW_HEIGHT
+    AVAILABLE_WIDTH, AVAILABLE_HEIGHT = max(MIN_WINDOW_SIZE[0], width), max(MIN_WINDOW_SIZE[1], height)
+    set_grid_size(GRID_WIDTH, GRID_HEIGHT, UI_HEIGHT)
+    SCREEN_WIDTH, SCREEN_HEIGHT = AVAILABLE_WIDTH, AVAILABLE_HEIGHT
+    VIEW_WIDTH, VIEW_HEIGHT = SCREEN_WIDTH, SCREEN_HEIGHT - UI_HEIGHT
+
+BOARD_TOPOLOGY = "rect"  # rect, torus (edges wrap around) or hex (odd rows shifted half a cell)
+BOARD_SHAPE = "full"  # or diamond, ring, cross, or a mask of holes like "..../.##./...."
+
+def set_board_shape(topology="rect", shape="full"):
+    """Pick the board topology and shape (see engine.Board and engine.shape_holes) for Games reset afterwards."""
+    global BOARD_TOPOLOGY, BOARD_SHAPE
+    BOARD_TOPOLOGY, BOARD_SHAPE = topology, shape
+
 # Calculate optimal grid size to fill screen (responsive for desktop & mobile)
 if AVAILABLE_WIDTH < 800:
     # Narrow / mobile layout
-    GRID_WIDTH = 8
-    GRID_HEIGHT = 10
-    UI_HEIGHT = 120
+    set_grid_size(*GRID_PRESETS[0])
 elif AVAILABLE_WIDTH < 1200:
-    GRID_WIDTH = 10
-    GRID_HEIGHT = 12
-    UI_HEIGHT = 140
+    set_grid_size(*GRID_PRESETS[1])
 else:
-    GRID_WIDTH = 12
-    GRID_HEIGHT = 14
-    UI_HEIGHT = 160
-
-# Make cells a reasonable size but keep a minimum for touch targets
-CELL_SIZE = max(24, min(AVAILABLE_WIDTH // GRID_WIDTH, (AVAILABLE_HEIGHT - UI_HEIGHT) // GRID_HEIGHT))
-SCREEN_WIDTH = GRID_WIDTH * CELL_SIZE
-SCREEN_HEIGHT = GRID_HEIGHT * CELL_SIZE + UI_HEIGHT
-
-# Responsive header height used across drawing/interaction
-HEADER_HEIGHT = max(50, int(CELL_SIZE * 1.2))
+    set_grid_size(*GRID_PRESETS[2])
 FPS = 60
 
 # --- Modern Gradient Colors & Theme ---
@@ -66,16 +104,44 @@ PLAYER_COLORS = [
     (171, 71, 188),    # 6: Purple
     (38, 198, 218),    # 7: Cyan
     (255, 183, 77),   # 8: Amber
+    (236, 64, 122),   # 9: Pink
 ]
 
 # --- Animation & Effect Parameters ---
 PULSATE_SPEED = 0.05
+ORBIT_DEPTH_BUCKETS = 8  # shades (and sizes) an orbiting orb is pre-rendered in, back to front
 ORB_TRAVEL_SPEED = 300
 PLACE_ANIM_DURATION = 0.25 # seconds
 EXPLOSION_DELAY = 0.15  # Delay between explosions
 SHAKE_INTENSITY = 4
 SHAKE_DURATION = 0.15
 
+# --- Simulation timing ---
+# The simulation advances in fixed steps independent of the render rate;
+# rendering interpolates between the last two simulation states.
+SIM_TICK_RATE = 120  # simulation steps per second
+SIM_DT = 1.0 / SIM_TICK_RATE
+MAX_FRAME_TIME = 0.25  # clamp long frames so a stall can't spiral into catch-up steps
+FAST_FORWARD_DT = 1.0  # one headless update() finishes an explosion delay and an orb flight
+PREMOVE_LIMIT = 4  # clicks buffered while a cascade plays out
+NETWORK_MAX_BACKLOG = 2  # remote moves waiting to animate before the current one is skipped
+PREVIEW_MAX_CELLS = 256  # bigger boards show the threat heatmap but no all-moves preview
+
+# --- Camera (pan and zoom) ---
+MIN_CELL_PIXELS = 4  # furthest zoom out
+MAX_CELL_PIXELS = 96  # furthest zoom in
+DETAIL_MAX_CELLS = 180  # with more cells in view, draw flat tiles instead of orbs (12x14 draws 168)
+ORB_CELL_PIXELS = 40  # orb sizes are drawn for cells at least this big; smaller cells shrink them
+TILE_LABEL_PIXELS = 16  # flat tiles this big also show their orb count
+ZOOM_STEP = 1.15  # per mouse-wheel notch
+PAN_SPEED = 900  # pixels per second with the arrow keys
+ARCHIVE_DIR = "game_archive"  # finished matches are appended here (see archive.py)
+
+# --- Frame profiler ---
+PROFILER_HISTORY = 240  # frames kept for rolling p50/p99
+PROFILER_TRACE_FRAMES = 600  # frames kept for Chrome-trace export
+PROFILER_TRACE_FILE = "frame_trace.json"
+
 # Dominance bar animation configuration
 DOM_WAVE_ENABLED = True
 DOM_WAVE_AMPLITUDE_FACTOR = 0.2  # fraction of bar height
@@ -199,27 +265,188 @@ class Particle:
         self.lifetime = random.uniform(0.4, 0.8)
         self.age = 0
         self.size = random.randint(4, 8)
+        self.prev_pos = self.pos.copy()
     
     def update(self, dt):
+        self.prev_pos = self.pos.copy()
         self.age += dt
         self.pos += self.vel * dt
-        self.vel *= 0.92  # Friction
+        self.vel *= 0.92 ** (dt * FPS)  # Friction, tuned per 60 FPS frame
         return self.age < self.lifetime
     
-    def draw(self, screen):
+    def draw(self, screen, camera, interp=1.0):
         alpha = 1 - (self.age / self.lifetime)
-        size = int(self.size * alpha)
+        size = int(self.size * alpha * camera.orb_scale)
         if size > 0:
+            pos = self.prev_pos.lerp(self.pos, interp)
+            if not camera.sees(pos.x, pos.y):
+                return
+            pos = pygame.Vector2(camera.to_screen(pos.x, pos.y))
             # Particle with glow
             glow_color = tuple(int(c * alpha * 0.5) for c in self.color)
             main_color = tuple(int(c * alpha) for c in self.color)
             
             # Outer glow
             if size > 2:
-                pygame.draw.circle(screen, glow_color, (int(self.pos.x), int(self.pos.y)), size + 2)
+                pygame.draw.circle(screen, glow_color, (int(pos.x), int(pos.y)), size + 2)
             
             # Main particle
-            pygame.draw.circle(screen, main_color, (int(self.pos.x), int(self.pos.y)), size)
+            pygame.draw.circle(screen, main_color, (int(pos.x), int(pos.y)), size)
+
+class _CountingSurface(pygame.Surface):
+    """pygame.Surface stand-in installed while profiling to count allocations."""
+    profiler = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if _CountingSurface.profiler is not None:
+            _CountingSurface.profiler.surface_allocs += 1
+
+
+class FrameProfiler:
+    """Times each phase of a frame and counts draw calls and Surface allocations.
+
+    Disabled by default; while enabled it wraps pygame.draw.* and pygame.Surface
+    so every draw call and Surface construction made by the game is counted.
+    """
+    PHASES = ("update", "header", "cells", "grid", "particles", "ui", "scanlines")
+
+    def __init__(self, history=PROFILER_HISTORY, trace_frames=PROFILER_TRACE_FRAMES):
+        self.enabled = False
+        self.samples = {name: deque(maxlen=history) for name in self.PHASES + ("frame",)}
+        self.draw_call_samples = deque(maxlen=history)
+        self.surface_samples = deque(maxlen=history)
+        # One list of Chrome-trace events per frame, oldest frames dropped first
+        self.trace = deque(maxlen=trace_frames)
+        self.draw_calls = 0
+        self.surface_allocs = 0
+        self._origin_ns = time.perf_counter_ns()
+        self._frame_start = None
+        self._frame_events = []
+        self._frame_phases = {}
+        self._originals = {}
+
+    def set_enabled(self, enabled):
+        if enabled == self.enabled:
+            return
+        self.enabled = enabled
+        if enabled:
+            self._install_counters()
+        else:
+            self._remove_counters()
+            self._frame_start = None
+
+    def _install_counters(self):
+        def counted(fn):
+            def wrapper(*args, **kwargs):
+                self.draw_calls += 1
+                return fn(*args, **kwargs)
+            return wrapper
+
+        for name in ("line", "lines", "aaline", "aalines", "rect", "circle", "ellipse", "polygon", "arc"):
+            fn = getattr(pygame.draw, name, None)
+            if fn is not None:
+                self._originals[name] = fn
+                setattr(pygame.draw, name, counted(fn))
+        self._originals["Surface"] = pygame.Surface
+        _CountingSurface.profiler = self
+        pygame.Surface = _CountingSurface
+
+    def _remove_counters(self):
+        pygame.Surface = self._originals.pop("Surface", pygame.Surface)
+        _CountingSurface.profiler = None
+        for name, fn in self._originals.items():
+            setattr(pygame.draw, name, fn)
+        self._originals.clear()
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self._frame_start = time.perf_counter_ns()
+        self._frame_events = []
+        self._frame_phases = {}
+        self.draw_calls = 0
+        self.surface_allocs = 0
+
+    def phase(self, name):
+        """Context manager timing one phase of the current frame."""
+        if not self.enabled:
+            return nullcontext()
+        return self._timed(name)
+
+    @contextmanager
+    def _timed(self, name):
+        if self._frame_start is None:
+            self.begin_frame()
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter_ns() - start
+            self._frame_phases[name] = self._frame_phases.get(name, 0) + elapsed
+            self._frame_events.append(self._trace_event(name, start, elapsed))
+
+    def _trace_event(self, name, start_ns, dur_ns):
+        return {"name": name, "ph": "X", "pid": 1, "tid": 1,
+                "ts": (start_ns - self._origin_ns) / 1000.0, "dur": dur_ns / 1000.0}
+
+    def end_frame(self):
+        if not self.enabled or self._frame_start is None:
+            return
+        end = time.perf_counter_ns()
+        for name in self.PHASES:
+            self.samples[name].append(self._frame_phases.get(name, 0))
+        self.samples["frame"].append(end - self._frame_start)
+        self.draw_call_samples.append(self.draw_calls)
+        self.surface_samples.append(self.surface_allocs)
+        self._frame_events.append(self._trace_event("frame", self._frame_start, end - self._frame_start))
+        self._frame_events.append({"name": "counters", "ph": "C", "pid": 1, "tid": 1,
+                                   "ts": (end - self._origin_ns) / 1000.0,
+                                   "args": {"draw_calls": self.draw_calls, "surfaces": self.surface_allocs}})
+        self.trace.append(self._frame_events)
+        self._frame_start = None
+
+    @staticmethod
+    def _percentile(values, pct):
+        if not values:
+            return 0
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+    def stats(self):
+        """Rolling p50/p99 per phase in milliseconds, plus per-frame counters."""
+        result = {}
+        for name, values in self.samples.items():
+            result[name] = (self._percentile(values, 50) / 1e6, self._percentile(values, 99) / 1e6)
+        result["draw_calls"] = (self._percentile(self.draw_call_samples, 50), self._percentile(self.draw_call_samples, 99))
+        result["surfaces"] = (self._percentile(self.surface_samples, 50), self._percentile(self.surface_samples, 99))
+        return result
+
+    def export_trace(self, path=PROFILER_TRACE_FILE):
+        """Write recorded frames as Chrome-trace JSON (chrome://tracing, Perfetto)."""
+        events = [event for frame in self.trace for event in frame]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return path
+
+    def draw_overlay(self, screen, font):
+        """Draw the rolling stats panel in the top-left corner."""
+        stats = self.stats()
+        lines = ["phase        p50 ms  p99 ms"]
+        for name in self.PHASES + ("frame",):
+            p50, p99 = stats[name]
+            lines.append(f"{name:<12}{p50:7.2f} {p99:7.2f}")
+        lines.append(f"{'draw calls':<12}{stats['draw_calls'][0]:7d} {stats['draw_calls'][1]:7d}")
+        lines.append(f"{'surfaces':<12}{stats['surfaces'][0]:7d} {stats['surfaces'][1]:7d}")
+        surfs = [font.render(line, True, COLOR["WHITE"]) for line in lines]
+        line_h = font.get_linesize()
+        width = max(s.get_width() for s in surfs) + 16
+        panel = pygame.Surface((width, line_h * len(surfs) + 12), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 180))
+        for i, surf in enumerate(surfs):
+            panel.blit(surf, (8, 6 + i * line_h))
+        screen.blit(panel, (8, 8))
+
 
 class Button:
     """A clickable UI button with hover effects."""
@@ -297,106 +524,167 @@ class Button:
 
 class Cell:
     """Represents a grid cell, handling its own state and drawing."""
-    def __init__(self, row, col):
+    glow_cache = {}  # (color, size) -> translucent halo behind orbiting orbs
+
+    def __init__(self, row, col, critical_mass, offset=0):
         self.row, self.col = row, col
         self.orbs, self.owner = 0, None
-        self.rect = pygame.Rect(col * CELL_SIZE, row * CELL_SIZE, CELL_SIZE, CELL_SIZE)
-        # Calculate critical mass correctly: corners=2, edges=3, centers=4
-        is_corner = (row in (0, GRID_HEIGHT - 1)) and (col in (0, GRID_WIDTH - 1))
-        is_edge = not is_corner and (row in (0, GRID_HEIGHT - 1) or col in (0, GRID_WIDTH - 1))
-        self.critical_mass = 2 if is_corner else (3 if is_edge else 4)
+        self.place(offset)
+        # Its neighbor count, from engine.Board: 2/3/4 on a rectangle, up to 6 on hex boards
+        self.critical_mass = critical_mass
+        self.is_hole = critical_mass == 0  # cut out of the board's shape
+        self.neighbors = ()  # filled in by Game.reset_game
 
         # For placement animation
         self.scale = 0
         self.is_placing = False
-        self.rotation = random.uniform(0, 2 * math.pi)
-        self.rotation_speed = random.uniform(0.8, 1.2)
+        # Previous simulation state, for render interpolation
+        self.prev_scale = self.scale
+
+    def place(self, offset=0):
+        """Board coordinates; Camera maps them onto the screen. offset shifts odd hex rows"""
+        self.rect = pygame.Rect(self.col * CELL_SIZE + offset, self.row * CELL_SIZE, CELL_SIZE, CELL_SIZE)
 
     def start_placement(self):
         self.is_placing = True
         self.scale = 0
+        self.prev_scale = 0
 
     def update(self, dt):
+        """Advance the placement animation; returns False once there is nothing left to animate."""
+        self.prev_scale = self.scale
         if self.is_placing:
             self.scale += dt / PLACE_ANIM_DURATION
             if self.scale >= 1:
                 self.scale = 1
                 self.is_placing = False
+        return self.is_placing
 
-        if self.orbs > 1:
-            self.rotation += self.rotation_speed * dt * math.pi
-            self.rotation %= (2 * math.pi)
-
-    def draw(self, screen):
+    def draw(self, screen, rect, zoom=1.0, interp=1.0, background=COLOR["GRID_DARK"]):
+        """Draw into a screen rect; zoom scales orb sizes. Orbits of two or more orbs are OrbitLayout's."""
         # Draw cell background - simple solid color for performance
-        pygame.draw.rect(screen, COLOR["GRID_DARK"], self.rect)
+        pygame.draw.rect(screen, background, rect)
         
         if self.owner is not None:
             color = PLAYER_COLORS[self.owner]
-            center = self.rect.center
+            center = rect.center
+            scale = self.prev_scale + (self.scale - self.prev_scale) * interp
             
             # Pulsating effect for critical cells
             pulse = 0
             if self.orbs == self.critical_mass - 1:
-                pulse = math.sin(pygame.time.get_ticks() * PULSATE_SPEED) * 2
+                pulse = math.sin(pygame.time.get_ticks() * PULSATE_SPEED) * 2 * zoom
             
-            base_radius = 14
-            animate_scale = (self.scale if self.is_placing else 1)
+            base_radius = 14 * zoom
+            animate_scale = (scale if self.is_placing else 1)
 
             if self.orbs == 1:
-                radius = max(6, int((base_radius + pulse) * animate_scale))
+                radius = max(int(6 * zoom), int((base_radius + pulse) * animate_scale))
                 pos = (int(center[0]), int(center[1]))
                 pygame.draw.circle(screen, (20, 20, 30), (pos[0] + 1, pos[1] + 2), radius + 1)
                 pygame.draw.circle(screen, color, pos, radius)
                 highlight_pos = (pos[0] - int(radius * 0.25), pos[1] - int(radius * 0.25))
                 highlight_color = tuple(min(255, int(c * 1.3)) for c in color)
-                pygame.draw.circle(screen, highlight_color, highlight_pos, max(3, int(radius * 0.3)))
+                pygame.draw.circle(screen, highlight_color, highlight_pos, int(max(3 * zoom, radius * 0.3)))
             else:
-                orbit_radius = 16 if self.orbs >= 3 else 12
-                orbit_radius += pulse * 0.5
-                orbit_radius *= animate_scale
-                orb_data = []
-                for idx in range(self.orbs):
-                    angle = self.rotation + (2 * math.pi * idx) / self.orbs
-                    depth = (math.sin(angle) + 1) * 0.5
-                    x = center[0] + math.cos(angle) * orbit_radius
-                    y = center[1] + math.sin(angle) * orbit_radius * 0.45
-                    scale = 0.8 + depth * 0.35
-                    orb_data.append({
-                        "pos": (x, y),
-                        "depth": depth,
-                        "scale": scale
-                    })
-
-                orb_data.sort(key=lambda item: item["depth"])
-
-                glow_surface = pygame.Surface((CELL_SIZE, CELL_SIZE), pygame.SRCALPHA)
-                pygame.draw.circle(glow_surface, (*color, 45), (CELL_SIZE // 2, CELL_SIZE // 2), CELL_SIZE // 2 - 4)
-                screen.blit(glow_surface, (self.rect.left, self.rect.top))
-
-                for item in orb_data:
-                    pos = (int(item["pos"][0]), int(item["pos"][1]))
-                    radius = max(5, int(base_radius * item["scale"]))
-                    shadow_offset = 2 - item["depth"]
-                    shadow_pos = (pos[0] + int(shadow_offset), pos[1] + int(shadow_offset * 1.5))
-                    pygame.draw.circle(screen, (25, 25, 40), shadow_pos, radius + 1)
-
-                    shade_factor = 0.75 + item["depth"] * 0.4
-                    shaded_color = tuple(min(255, int(c * shade_factor)) for c in color)
-                    pygame.draw.circle(screen, shaded_color, pos, radius)
-
-                    highlight_offset = (math.cos(self.rotation + item["depth"]) * radius * 0.25,
-                                        math.sin(self.rotation + item["depth"]) * radius * 0.25)
-                    highlight_pos = (pos[0] - int(highlight_offset[0]), pos[1] - int(highlight_offset[1]))
-                    highlight_color = tuple(min(255, int(c * 1.35)) for c in color)
-                    pygame.draw.circle(screen, highlight_color, highlight_pos, max(3, int(radius * 0.3)))
+                # The orbiting orbs themselves are drawn for the whole board at once by OrbitLayout
+                glow_surface = Cell.glow_cache.get((color, rect.size))
+                if glow_surface is None:
+                    glow_surface = pygame.Surface(rect.size, pygame.SRCALPHA)
+                    pygame.draw.circle(glow_surface, (*color, 45), (rect.width // 2, rect.height // 2), int(rect.width // 2 - 4 * zoom))
+                    if len(Cell.glow_cache) > 256:  # zooming makes new sizes; keep the set small
+                        Cell.glow_cache.clear()
+                    Cell.glow_cache[(color, rect.size)] = glow_surface
+                screen.blit(glow_surface, rect.topleft)
+
+class OrbitLayout:
+    """The orbiting orbs of every multi-orb cell, laid out in one NumPy pass.
+
+    Rotation phases and speeds live in arrays indexed like engine boards
+    (row * width + col), so a frame's angles are one array expression and
+    the orbs' positions, depths and shades follow from a few more. Orbs are
+    pre-rendered per color and depth bucket and the layer is one blits call.
+    """
+    def __init__(self, size):
+        rng = np.random.default_rng(random.getrandbits(32))
+        self.phase = rng.uniform(0, 2 * math.pi, size)
+        self.speed = rng.uniform(0.8, 1.2, size) * math.pi  # radians per simulated second
+        self.sprites = {}  # (color, depth bucket, zoom) -> (orb with shadow and highlight, center offset)
+
+    def sprite(self, color, bucket, zoom):
+        key = (color, bucket, zoom)
+        if key not in self.sprites:
+            if len(self.sprites) > 2048:  # zooming makes new sizes; keep the set small
+                self.sprites.clear()
+            self.sprites[key] = self.render_sprite(color, bucket, zoom)
+        return self.sprites[key]
+
+    @staticmethod
+    def render_sprite(color, bucket, zoom):
+        """(orb surface, center offset) for a color and depth bucket at a zoom."""
+        depth = (bucket + 0.5) / ORBIT_DEPTH_BUCKETS
+        radius = max(int(5 * zoom), int(14 * zoom * (0.8 + depth * 0.35)))
+        shadow = (2 - depth) * zoom
+        center = radius + 2
+        surf = pygame.Surface((center * 2 + int(shadow) + 1, center * 2 + int(shadow * 1.5) + 1), pygame.SRCALPHA)
+        pygame.draw.circle(surf, (25, 25, 40), (center + int(shadow), center + int(shadow * 1.5)), radius + 1)
+        shade = 0.75 + depth * 0.4
+        pygame.draw.circle(surf, tuple(min(255, int(c * shade)) for c in color), (center, center), radius)
+        highlight = (center - int(radius * 0.25), center - int(radius * 0.25))
+        pygame.draw.circle(surf, tuple(min(255, int(c * 1.35)) for c in color), highlight, int(max(3 * zoom, radius * 0.3)))
+        return surf, center
+
+    def draw(self, screen, cells, rects, zoom, spin, interp=1.0):
+        """Draw the orbs of cells (multi-orb, owned) into their screen rects; spin is the clock in seconds."""
+        if not cells:
+            return
+        zoom = round(zoom, 3)
+        n = len(cells)
+        index = np.fromiter((c.row * GRID_WIDTH + c.col for c in cells), np.intp, n)
+        counts = np.fromiter((c.orbs for c in cells), np.intp, n)
+        critical = np.fromiter((c.critical_mass for c in cells), np.intp, n)
+        grow = np.fromiter((c.prev_scale + (c.scale - c.prev_scale) * interp if c.is_placing else 1.0
+                            for c in cells), np.float64, n)
+        centers = np.array([r.center for r in rects], dtype=np.float64)
+
+        # Per cell: rotation and orbit radius (critical cells pulse, placed ones grow in)
+        rotation = self.phase[index] + self.speed[index] * spin
+        pulse = math.sin(pygame.time.get_ticks() * PULSATE_SPEED) * 2 * zoom
+        orbit = (np.where(counts >= 3, 16.0, 12.0) * zoom + np.where(counts == critical - 1, pulse * 0.5, 0.0)) * grow
+
+        # Per orb: k-th of its cell's orbs, spaced evenly round the orbit
+        cell = np.repeat(np.arange(n), counts)
+        k = np.arange(len(cell)) - np.repeat(np.cumsum(counts) - counts, counts)
+        angle = rotation[cell] + 2 * math.pi * k / counts[cell]
+        sin = np.sin(angle)
+        depth = (sin + 1) * 0.5
+        x = centers[cell, 0] + np.cos(angle) * orbit[cell]
+        y = centers[cell, 1] + sin * orbit[cell] * 0.45
+        bucket = np.minimum((depth * ORBIT_DEPTH_BUCKETS).astype(np.intp), ORBIT_DEPTH_BUCKETS - 1)
+
+        # Back to front, so nearer orbs overlap farther ones
+        order = np.argsort(depth, kind="stable")
+        colors = [PLAYER_COLORS[c.owner] for c in cells]
+        jobs = []
+        for i, b, px, py in zip(cell[order].tolist(), bucket[order].tolist(), x[order].tolist(), y[order].tolist()):
+            surf, center = self.sprite(colors[i], b, zoom)
+            jobs.append((surf, (int(px) - center, int(py) - center)))
+        screen.blits(jobs, False)
 
 class AnimatedOrb:
     """An orb that visually travels between cells."""
-    def __init__(self, start_cell, end_cell, player_id):
+    def __init__(self, start_cell, end_cell, player_id, wrap=False):
         self.start = pygame.Vector2(start_cell.rect.center)
         self.end = pygame.Vector2(end_cell.rect.center)
+        if wrap:
+            # Torus neighbors across an edge: fly off that edge rather than across the board
+            span_w, span_h = GRID_WIDTH * CELL_SIZE, GRID_HEIGHT * CELL_SIZE
+            if abs(self.end.x - self.start.x) > span_w / 2:
+                self.end.x += span_w if self.end.x < self.start.x else -span_w
+            if abs(self.end.y - self.start.y) > span_h / 2:
+                self.end.y += span_h if self.end.y < self.start.y else -span_h
         self.pos = self.start.copy()
+        self.prev_pos = self.start.copy()
         self.target_cell = end_cell
         self.player_id = player_id
         dist = self.start.distance_to(self.end)
@@ -404,6 +692,7 @@ class AnimatedOrb:
         self.progress = 0  # Animation progress 0 to 1
 
     def update(self, dt):
+        self.prev_pos = self.pos
         # Smooth acceleration/deceleration
         self.progress += dt * (1 / 0.3)  # 0.3 seconds travel time
         if self.progress > 1:
@@ -416,11 +705,14 @@ class AnimatedOrb:
         self.pos = self.start + (self.end - self.start) * ease
         return self.progress >= 1
 
-    def draw(self, screen):
+    def draw(self, screen, camera, interp=1.0):
+        render_pos = self.prev_pos.lerp(self.pos, interp)
+        if not camera.sees(render_pos.x, render_pos.y):
+            return
         color = PLAYER_COLORS[self.player_id]
-        radius = 14
-
-        pos = (int(self.pos.x), int(self.pos.y))
+        radius = max(2, int(14 * camera.orb_scale))
+        x, y = camera.to_screen(render_pos.x, render_pos.y)
+        pos = (int(x), int(y))
 
         # Simple animated orb - clean circle
         shadow_pos = (pos[0] + 1, pos[1] + 2)
@@ -433,7 +725,498 @@ class AnimatedOrb:
         # Small highlight
         highlight_pos = (pos[0] - int(radius * 0.25), pos[1] - int(radius * 0.25))
         highlight_color = tuple(min(255, int(c * 1.3)) for c in color)
-        pygame.draw.circle(screen, highlight_color, highlight_pos, max(3, int(radius * 0.3)))
+        pygame.draw.circle(screen, highlight_color, highlight_pos, int(max(3 * camera.orb_scale, radius * 0.3)))
+
+class Camera:
+    """Maps board coordinates (CELL_SIZE pixels per cell) onto the board viewport.
+
+    Boards that fit the window start at zoom 1 with the board filling the
+    viewport, which is the fixed layout of the presets; bigger boards start
+    zoomed out as far as MIN_CELL_PIXELS allows. Mouse wheel zooms around the
+    cursor, right/middle drag and the arrow keys pan, Home resets. Hex boards
+    are laid out as bricks, odd rows shifted right by half a cell.
+    """
+    def __init__(self, view, columns, rows, hex_rows=False):
+        self.view = pygame.Rect(view)
+        self.columns, self.rows = columns, rows
+        self.row_shift = CELL_SIZE / 2 if hex_rows else 0  # board x offset of odd rows
+        self.board_w, self.board_h = columns * CELL_SIZE + self.row_shift, rows * CELL_SIZE
+        fit = min(self.view.width / self.board_w, self.view.height / self.board_h)
+        self.min_zoom = min(1.0, max(MIN_CELL_PIXELS / CELL_SIZE, fit))
+        self.max_zoom = max(1.0, MAX_CELL_PIXELS / CELL_SIZE)
+        self.shake = (0, 0)  # screen-shake offset for the current frame
+        self.reset()
+
+    def reset(self):
+        self.zoom = self.min_zoom
+        self.x = (self.board_w - self.view.width / self.zoom) / 2
+        self.y = (self.board_h - self.view.height / self.zoom) / 2
+        self.clamp()
+
+    def clamp(self):
+        """Keep the board on screen: centered along an axis it fits, otherwise edge to edge."""
+        span_w, span_h = self.view.width / self.zoom, self.view.height / self.zoom
+        if span_w >= self.board_w:
+            self.x = (self.board_w - span_w) / 2
+        else:
+            self.x = min(max(self.x, 0.0), self.board_w - span_w)
+        if span_h >= self.board_h:
+            self.y = (self.board_h - span_h) / 2
+        else:
+            self.y = min(max(self.y, 0.0), self.board_h - span_h)
+
+    def pan(self, dx, dy):
+        """Move the board by a screen-pixel delta."""
+        self.x -= dx / self.zoom
+        self.y -= dy / self.zoom
+        self.clamp()
+
+    def zoom_at(self, factor, pos):
+        """Zoom by factor, keeping the board point under pos (or the view's center) in place."""
+        if not self.view.collidepoint(pos):
+            pos = self.view.center
+        x, y = self.to_board(pos)
+        self.zoom = min(self.max_zoom, max(self.min_zoom, self.zoom * factor))
+        self.x = x - (pos[0] - self.view.x) / self.zoom
+        self.y = y - (pos[1] - self.view.y) / self.zoom
+        self.clamp()
+
+    def to_screen(self, x, y):
+        return ((x - self.x) * self.zoom + self.view.x + self.shake[0],
+                (y - self.y) * self.zoom + self.view.y + self.shake[1])
+
+    def to_board(self, pos):
+        return ((pos[0] - self.view.x) / self.zoom + self.x,
+                (pos[1] - self.view.y) / self.zoom + self.y)
+
+    def sees(self, x, y, margin=None):
+        """Whether a board point (give or take margin, a cell by default) is inside the viewport."""
+        if margin is None:
+            margin = CELL_SIZE
+        span_w, span_h = self.view.width / self.zoom, self.view.height / self.zoom
+        return self.x - margin <= x <= self.x + span_w + margin and self.y - margin <= y <= self.y + span_h + margin
+
+    def cell_at(self, pos):
+        """(row, col) under a screen position, or None."""
+        if not self.view.collidepoint(pos):
+            return None
+        x, y = self.to_board(pos)
+        row = int(y // CELL_SIZE)
+        if row & 1:
+            x -= self.row_shift
+        col = int(x // CELL_SIZE)
+        if 0 <= col < self.columns and 0 <= row < self.rows and x >= 0 and y >= 0:
+            return row, col
+        return None
+
+    def cell_rect(self, row, col, rows=1, cols=1):
+        """Screen rect of a cell (or a rows x cols block, unshifted); neighbors share edges exactly."""
+        x = col * CELL_SIZE + (self.row_shift if rows == 1 and row & 1 else 0)
+        left, top = self.to_screen(x, row * CELL_SIZE)
+        right, bottom = self.to_screen(x + cols * CELL_SIZE, (row + rows) * CELL_SIZE)
+        left, top = round(left), round(top)
+        return pygame.Rect(left, top, round(right) - left, round(bottom) - top)
+
+    def visible_range(self):
+        """(first row, end row, first col, end col) of the cells overlapping the viewport."""
+        span_w, span_h = self.view.width / self.zoom, self.view.height / self.zoom
+        return (max(0, int(self.y // CELL_SIZE)), min(self.rows, int((self.y + span_h) // CELL_SIZE) + 1),
+                max(0, int((self.x - self.row_shift) // CELL_SIZE)),
+                min(self.columns, int((self.x + span_w) // CELL_SIZE) + 1))
+
+    @property
+    def orb_scale(self):
+        """Orb and particle size factor: zoom, shrunk further on boards with small cells."""
+        return self.zoom * min(1.0, CELL_SIZE / ORB_CELL_PIXELS)
+
+    @property
+    def tiles_only(self):
+        """Zoomed out too far to draw individual orbs."""
+        r0, r1, c0, c1 = self.visible_range()
+        return (r1 - r0) * (c1 - c0) > DETAIL_MAX_CELLS
+
+class TileMap:
+    """The board at one pixel per cell, scaled up for the zoomed-out view.
+
+    Cells are recolored only when they change (Game.touch), so a frame costs
+    one scale and blit however many cells are in view. On hex boards every
+    cell is two pixels wide, so odd rows can sit one pixel (half a cell) over.
+    """
+    def __init__(self, columns, rows, hex_rows=False):
+        self.hex_rows = hex_rows
+        self.surface = pygame.Surface((columns * 2 + 1, rows) if hex_rows else (columns, rows))
+        self.surface.fill(COLOR["BACKGROUND"])
+        self.dirty = set()
+        self.labels = {}  # (font size, orbs) -> rendered count
+
+    def repaint(self, grid):
+        """Recolor every cell at once (new or wholesale-changed boards)."""
+        colors = np.array([[self.tile_color(cell) for cell in row] for row in grid], dtype=np.uint8)
+        if self.hex_rows:
+            pixels = np.empty((len(grid), self.surface.get_width(), 3), dtype=np.uint8)
+            pixels[:] = COLOR["BACKGROUND"]
+            wide = colors.repeat(2, axis=1)
+            pixels[0::2, :-1] = wide[0::2]
+            pixels[1::2, 1:] = wide[1::2]
+            colors = pixels
+        pygame.surfarray.blit_array(self.surface, colors.transpose(1, 0, 2))
+        self.dirty.clear()
+
+    @staticmethod
+    def tile_color(cell):
+        if cell.is_hole:
+            return COLOR["BACKGROUND"]
+        if cell.owner is None:
+            return COLOR["GRID_DARK"]
+        # Brighter the closer the cell is to exploding
+        fill = 0.35 + 0.65 * min(1.0, cell.orbs / max(1, cell.critical_mass - 1))
+        return tuple(int(c * fill) for c in PLAYER_COLORS[cell.owner])
+
+    def label(self, size, orbs):
+        key = (size, orbs)
+        if key not in self.labels:
+            font = pygame.font.SysFont("monospace", size, bold=True)
+            self.labels[key] = font.render(str(orbs), True, COLOR["WHITE"])
+        return self.labels[key]
+
+    def draw(self, screen, camera, grid):
+        if len(self.dirty) > 1024:
+            self.repaint(grid)
+        for cell in self.dirty:
+            if self.hex_rows:
+                self.surface.fill(self.tile_color(cell), (cell.col * 2 + (cell.row & 1), cell.row, 2, 1))
+            else:
+                self.surface.set_at((cell.col, cell.row), self.tile_color(cell))
+        self.dirty.clear()
+        r0, r1, c0, c1 = camera.visible_range()
+        if r0 >= r1 or c0 >= c1:
+            return
+        if self.hex_rows:
+            # The block plus the half cell that odd rows stick out on the right
+            left, top = camera.to_screen(c0 * CELL_SIZE, r0 * CELL_SIZE)
+            right, bottom = camera.to_screen((c1 + 0.5) * CELL_SIZE, r1 * CELL_SIZE)
+            rect = pygame.Rect(round(left), round(top), round(right) - round(left), round(bottom) - round(top))
+            area = self.surface.subsurface((c0 * 2, r0, (c1 - c0) * 2 + 1, r1 - r0))
+        else:
+            rect = camera.cell_rect(r0, c0, r1 - r0, c1 - c0)
+            area = self.surface.subsurface((c0, r0, c1 - c0, r1 - r0))
+        screen.blit(pygame.transform.scale(area, rect.size), rect.topleft)
+
+        pixels = camera.zoom * CELL_SIZE
+        if pixels < TILE_LABEL_PIXELS:
+            return
+        size = int(pixels * 0.6)
+        # Cell centers step by a constant on screen, so no per-cell rect math
+        x0, y0 = camera.to_screen((c0 + 0.5) * CELL_SIZE, (r0 + 0.5) * CELL_SIZE)
+        jobs = []
+        for i, row in enumerate(range(r0, r1)):
+            y = y0 + i * pixels
+            x = x0 + (pixels / 2 if self.hex_rows and row & 1 else 0)
+            for j, cell in enumerate(grid[row][c0:c1]):
+                if cell.owner is not None:
+                    label = self.label(size, cell.orbs)
+                    jobs.append((label, (int(x + j * pixels) - label.get_width() // 2, int(y) - label.get_height() // 2)))
+        screen.blits(jobs, False)
+
+class BoardLayer:
+    """Cell backgrounds, glows and single orbs of the board in view, kept offscreen.
+
+    Cells are redrawn only when they change (Game.touch), animate or pulse;
+    moving the camera redraws everything in view. A frame blits the layer
+    once, offset by the screen shake. Orbiting orbs go on top (OrbitLayout).
+    """
+    def __init__(self, view):
+        self.view = pygame.Rect(view)
+        self.surface = pygame.Surface(self.view.size)
+        self.dirty = set()
+        self.camera_key = None  # (x, y, zoom) the layer was drawn at
+        self.hover = None  # cell drawn with the hover tint
+
+    def draw(self, screen, camera, grid, backdrop, hover, hover_color, animating, interp=1.0):
+        """Bring the layer up to date, blit it and return the visible cells with orbiting orbs."""
+        r0, r1, c0, c1 = camera.visible_range()
+        # Layer coordinates: the viewport's top left at (0, 0), no shake
+        dx, dy = -self.view.x - camera.shake[0], -self.view.y - camera.shake[1]
+        zoom = camera.orb_scale
+        redraw = self.dirty | animating
+        if hover is not self.hover:
+            redraw.update(c for c in (hover, self.hover) if c is not None)
+            self.hover = hover
+        full = self.camera_key != (camera.x, camera.y, camera.zoom)
+        if full:
+            self.camera_key = (camera.x, camera.y, camera.zoom)
+            self.surface.blit(backdrop, (0, 0), self.view)
+        orbiting = []
+        for row in range(r0, r1):
+            for cell in grid[row][c0:c1]:
+                if cell.owner is not None:
+                    if cell.orbs > 1:
+                        orbiting.append(cell)
+                    elif cell.orbs == cell.critical_mass - 1:
+                        redraw.add(cell)  # a pulsing single orb
+                if full and not cell.is_hole:
+                    self.draw_cell(cell, camera, dx, dy, zoom, hover_color, interp)
+        if not full:
+            for cell in redraw:
+                if r0 <= cell.row < r1 and c0 <= cell.col < c1 and not cell.is_hole:
+                    self.draw_cell(cell, camera, dx, dy, zoom, hover_color, interp)
+        self.dirty.clear()
+        screen.blit(self.surface, (self.view.x + camera.shake[0], self.view.y + camera.shake[1]))
+        return orbiting
+
+    def draw_cell(self, cell, camera, dx, dy, zoom, hover_color, interp):
+        rect = camera.cell_rect(cell.row, cell.col).move(dx, dy)
+        cell.draw(self.surface, rect, zoom, interp, hover_color if cell is self.hover else COLOR["GRID_DARK"])
+
+def make_retro_logo(size):
+    """Programmatic retro logo, used when assets/logo.png is missing."""
+    s = pygame.Surface((size, size), pygame.SRCALPHA)
+    cx = cy = size // 2
+    # layered neon circles
+    for i, alpha, rad_mul in [(0, 30, 1.0), (1, 60, 0.86), (2, 120, 0.72)]:
+        r = int(size * (0.5 * rad_mul))
+        col = tuple(min(255, int(c * (0.8 + i * 0.08))) for c in COLOR['ACCENT'])
+        pygame.draw.circle(s, (*col, alpha), (cx, cy), r)
+    # dark center
+    pygame.draw.circle(s, (6, 8, 14), (cx, cy), int(size * 0.42))
+    # big CR letters in blocky retro style
+    try:
+        f = pygame.font.Font(FONT_PATH, int(size * 0.36)) if FONT_PATH else pygame.font.SysFont(None, int(size * 0.36), bold=True)
+    except Exception:
+        f = pygame.font.SysFont(None, int(size * 0.36), bold=True)
+    txt = f.render('CR', True, (230, 240, 255))
+    tr = txt.get_rect(center=(cx, cy))
+    s.blit(txt, tr)
+    # small scanline overlay
+    for y in range(0, size, 4):
+        pygame.draw.line(s, (255, 255, 255, 6), (0, y), (size, y))
+    return s
+
+class MenuScene:
+    """The player-count menu, composed once.
+
+    The background, logo and title are baked into one backdrop, and each tile
+    keeps a small surface per state (idle, hover, selected). A frame blits
+    only the tiles whose state changed and returns their rects for
+    pygame.display.update.
+    """
+    IDLE, HOVER, SELECTED = range(3)
+
+    def __init__(self, background, title_font, options=range(2, 10)):
+        self.options = list(options)
+        # Tile sizing (slightly smaller)
+        tile_w = max(120, int(CELL_SIZE * 3.0))
+        tile_h = max(64, int(CELL_SIZE * 1.5))
+        self.cols = cols = 3
+        gap = max(14, int(CELL_SIZE * 0.4))
+
+        # Compute grid layout and centering
+        rows = (len(self.options) + cols - 1) // cols
+        grid_top = int(SCREEN_HEIGHT * 0.32)
+        # Shrink the tiles to fit small windows: each one is cut out of the backdrop
+        margin = 8
+        tile_w = min(tile_w, (SCREEN_WIDTH - 2 * margin - (cols - 1) * gap) // cols)
+        tile_h = min(tile_h, (SCREEN_HEIGHT - grid_top - margin - (rows - 1) * gap) // rows)
+
+        # Build rects for each option, centering incomplete last row
+        self.rects = []
+        for idx in range(len(self.options)):
+            r = idx // cols
+            c = idx % cols
+            # center last row
+            items_in_row = cols if (r < rows - 1 or len(self.options) % cols == 0) else (len(self.options) % cols)
+            row_grid_w = items_in_row * tile_w + (items_in_row - 1) * gap
+            row_left = (SCREEN_WIDTH - row_grid_w) // 2
+            x = row_left + c * (tile_w + gap)
+            y = grid_top + r * (tile_h + gap)
+            self.rects.append(pygame.Rect(x, y, tile_w, tile_h))
+
+        self.backdrop = background.copy()
+        self.draw_title(title_font)
+        label_font = self.label_font(tile_h)
+        self.tiles = [[self.render_tile(rect, f"{value} Players", label_font, state)
+                       for state in (self.IDLE, self.HOVER, self.SELECTED)]
+                      for rect, value in zip(self.rects, self.options)]
+        self.shown = None  # tile states on screen; None until the backdrop is up
+
+    def draw_title(self, title_font):
+        """Logo and the styled CHAIN REACTION title, onto the backdrop."""
+        header_text = "CHAIN REACTION"
+        spacing = max(8, int(CELL_SIZE * 0.3))  # Reduced gap for tighter alignment
+        logo_s = make_retro_logo(max(64, int(CELL_SIZE * 2.5)))
+        logo_w = logo_s.get_width()
+        logo_h = logo_s.get_height()
+        # Create styled title
+        menu_title_surf = title_font.render(header_text, True, COLOR['WHITE'])
+        # Drop shadow
+        menu_shadow = title_font.render(header_text, True, (20, 30, 60))
+        # Accent glow
+        menu_glow = title_font.render(header_text, True, COLOR['ACCENT'])
+        # Gradient overlay
+        grad = surfaces.vertical_gradient(*menu_title_surf.get_size(), COLOR['WHITE'], COLOR['ACCENT'], alpha=220)
+        menu_title_surf.blit(grad, (0, 0), special_flags=pygame.BLEND_RGBA_MULT)
+        # Center block for logo + title
+        title_w = menu_title_surf.get_width()
+        title_h = menu_title_surf.get_height()
+        combined_w = logo_w + spacing + title_w
+        top_y = int(SCREEN_HEIGHT * 0.055)  # Slightly less top padding
+        # Align logo and title to same vertical center
+        combined_h = max(logo_h, title_h)
+        logo_x = (SCREEN_WIDTH - combined_w) // 2
+        logo_y = top_y + (combined_h - logo_h) // 2
+        title_x = logo_x + logo_w + spacing
+        title_y = top_y + (combined_h - title_h) // 2
+        # Draw logo
+        logo_path = os.path.join('assets', 'logo.png')
+        if os.path.exists(logo_path):
+            try:
+                user_logo = pygame.image.load(logo_path).convert_alpha()
+                logo_s = pygame.transform.smoothscale(user_logo, (logo_w, logo_h))
+            except Exception:
+                pass
+        self.backdrop.blit(logo_s, (logo_x, logo_y))
+        # Draw styled title: shadow, glow, gradient
+        self.backdrop.blit(menu_shadow, (title_x + 3, title_y + 3))
+        for off in [(-3, -3), (3, -3), (-3, 3), (3, 3)]:
+            self.backdrop.blit(menu_glow, (title_x + off[0], title_y + off[1]))
+        self.backdrop.blit(menu_title_surf, (title_x, title_y))
+
+    @staticmethod
+    def label_font(tile_h):
+        size = max(14, int(tile_h * 0.26))
+        try:
+            return pygame.font.SysFont('Comic Sans MS', size, bold=True)
+        except Exception:
+            try:
+                return pygame.font.Font(os.path.join('assets', 'SpaceGrotesk-SemiBold.ttf'), size)
+            except Exception:
+                try:
+                    return pygame.font.Font(FONT_PATH, size) if FONT_PATH else pygame.font.SysFont(None, size, bold=True)
+                except Exception:
+                    return pygame.font.SysFont(None, size, bold=True)
+
+    def render_tile(self, rect, label, font, state):
+        """The tile over its patch of backdrop, in one state."""
+        s = self.backdrop.subsurface(rect).copy()
+        r = s.get_rect()
+        # tile background
+        base_col = COLOR['BUTTON'] if state == self.IDLE else COLOR['BUTTON_HOVER']
+        pygame.draw.rect(s, base_col, r, border_radius=12)
+        pygame.draw.rect(s, COLOR['ACCENT'], r, 2, border_radius=12)
+        # label (no orb preview) — center text inside tile with shadow + accent
+        txt_accent = font.render(label, True, COLOR['ACCENT'])
+        txt_shadow = font.render(label, True, (6, 8, 14))
+        txt = font.render(label, True, COLOR['WHITE'])
+        tx = (r.w - txt.get_width()) // 2
+        ty_label = (r.h - txt.get_height()) // 2
+        # subtle accent halo
+        txt_accent.set_alpha(120)
+        s.blit(txt_accent, (tx - 1, ty_label - 1))
+        # shadow and main text
+        s.blit(txt_shadow, (tx + 2, ty_label + 2))
+        s.blit(txt, (tx, ty_label))
+        # small hint for selected tile
+        if state == self.SELECTED:
+            hint = pygame.Surface(r.size, pygame.SRCALPHA)
+            pygame.draw.rect(hint, (255, 255, 255, 14), r, border_radius=12)
+            s.blit(hint, (0, 0))
+        return s
+
+    def tile_at(self, pos):
+        for i, r in enumerate(self.rects):
+            if r.collidepoint(pos):
+                return i
+        return None
+
+    def invalidate(self):
+        """Repaint everything on the next draw (e.g. the window was exposed)."""
+        self.shown = None
+
+    def draw(self, screen, hover_idx, select_idx):
+        """Blit what changed since the last draw; returns the screen rects touched."""
+        states = [self.SELECTED if i == select_idx else self.HOVER if i == hover_idx else self.IDLE
+                  for i in range(len(self.rects))]
+        if self.shown is None:
+            screen.blit(self.backdrop, (0, 0))
+            changed = range(len(states))
+            dirty = [screen.get_rect()]
+        else:
+            changed = [i for i, (old, new) in enumerate(zip(self.shown, states)) if old != new]
+            dirty = [self.rects[i] for i in changed]
+        for i in changed:
+            screen.blit(self.tiles[i][states[i]], self.rects[i])
+        self.shown = states
+        return dirty
+
+def load_fonts(cell_size):
+    """(font path, {attribute: font}) for the Game's text at a cell size."""
+    fonts = {}
+    font_path = None
+    # Try the pixel font for retro feel, then the other bundled fonts
+    for path in ("assets/GameFont.ttf", "assets/ChakraPetch-SemiBold.ttf", "assets/SpaceGrotesk-SemiBold.ttf"):
+        try:
+            # Responsive font sizes - reduced multipliers for smaller text
+            fonts["font_small"] = pygame.font.Font(path, max(10, int(cell_size * 0.4)))
+            fonts["font_medium"] = pygame.font.Font(path, max(14, int(cell_size * 0.8)))
+            fonts["font_large"] = pygame.font.Font(path, max(20, int(cell_size * 1.2)))
+            font_path = path
+            break
+        except FileNotFoundError:
+            continue
+    else:
+        # Final fallback to system font
+        fonts["font_small"] = pygame.font.SysFont("monospace", max(10, int(cell_size * 0.4)))
+        fonts["font_medium"] = pygame.font.SysFont("monospace", max(14, int(cell_size * 0.8)), bold=True)
+        fonts["font_large"] = pygame.font.SysFont("monospace", max(20, int(cell_size * 1.2)), bold=True)
+
+    if font_path:
+        fonts["font_tiny"] = pygame.font.Font(font_path, max(8, int(cell_size * 0.3)))
+    else:
+        fonts["font_tiny"] = pygame.font.SysFont("Arial", max(8, int(cell_size * 0.3)))
+
+    # Title font: use Comic Sans MS for all CHAIN REACTION titles
+    title_size = max(22, int(cell_size * 0.9))
+    try:
+        fonts["title_font"] = pygame.font.SysFont('Comic Sans MS', title_size, bold=True)
+    except Exception:
+        # Fallback if Comic Sans not available
+        try:
+            if os.path.exists("assets/ChakraPetch-SemiBold.ttf"):
+                fonts["title_font"] = pygame.font.Font("assets/ChakraPetch-SemiBold.ttf", title_size)
+            elif os.path.exists("assets/SpaceGrotesk-SemiBold.ttf"):
+                fonts["title_font"] = pygame.font.Font("assets/SpaceGrotesk-SemiBold.ttf", title_size)
+            elif font_path:
+                fonts["title_font"] = pygame.font.Font(font_path, title_size)
+            else:
+                fonts["title_font"] = pygame.font.SysFont("Arial", title_size, bold=True)
+        except Exception:
+            fonts["title_font"] = fonts["font_large"]
+    return font_path, fonts
+
+ASSETS_BAKED = pygame.event.custom_type()  # posted by the bake thread; wakes loops sleeping in event.wait()
+WINDOW_DISPLAY_CHANGED = getattr(pygame, "WINDOWDISPLAYCHANGED", None)  # pygame 2.1.3+
+
+def bake_layout_assets(orb_zoom, num_players):
+    """Everything drawn at a size tied to the layout, rebuilt for the current layout globals.
+
+    Runs on Game's bake thread after a resize and draws on no surface the
+    render loop uses. Pygame's font calls keep the GIL, and one bake runs at
+    a time, so fonts are safe to build here.
+    """
+    font_path, fonts = load_fonts(CELL_SIZE)
+    background = surfaces.vertical_gradient(SCREEN_WIDTH, SCREEN_HEIGHT,
+                                            COLOR["BACKGROUND_GRADIENT_TOP"], COLOR["BACKGROUND_GRADIENT_BOTTOM"])
+    scanlines = surfaces.scanlines(SCREEN_WIDTH, SCREEN_HEIGHT, spacing=4, thickness=2, alpha=30)
+    sprites = {(color, bucket, orb_zoom): OrbitLayout.render_sprite(color, bucket, orb_zoom)
+               for color in PLAYER_COLORS[:num_players] for bucket in range(ORBIT_DEPTH_BUCKETS)}
+    return {
+        "font_path": font_path,
+        "fonts": fonts,
+        "background": background,
+        "scanlines": scanlines,
+        "menu_scene": MenuScene(background, fonts["title_font"]),
+        "sprites": sprites,
+    }
 
 class Game:
     """Main class to manage game states, logic, and rendering."""
@@ -443,7 +1226,7 @@ class Game:
             ensure_assets()
         except Exception as e:
             print(f"Asset preparation warning: {e}")
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.RESIZABLE)
         pygame.display.set_caption("CHAIN REACTION - MODERN EDITION")
         self.clock = pygame.time.Clock()
         self.load_assets()
@@ -455,74 +1238,42 @@ class Game:
         # Pre-render CRT scanlines
         self.crt_scanline_surface = self._create_crt_scanline_surface()
         self.time = 0
+        self.profiler = FrameProfiler()
+        self.show_profiler = False
+        self.profiler_font = pygame.font.SysFont("monospace", 14)
+        self.preview_cache = None  # engine.PreviewCache, created on first hover
+        self.menu_scene = None  # MenuScene, composed on the first visit to the menu
+        self.show_threats = False  # heatmap of cells one orb from critical
+        self.archive = None  # archive.GameArchive, opened by run(); headless tools record nothing
+        # Network play (see server.py); None for local games
+        self.network = None
+        self.network_seat = None
+        self.network_status = ""
+        self.network_move_pending = False  # sent a move, waiting for the server's state
+        self.network_replica = None  # engine.GameState mirroring the server's position
+        self.network_seq = 0
+        self.network_moves = deque()  # server moves not yet animated on the grid
+        # External engines (see enginelink.py) playing seats of local games
+        self.engines = {}  # seat -> enginelink.EngineProcess
+        self.engine_replica = None  # engine.GameState a move ahead of the animation
+        self.engine_asked = None  # move number the engine to move was asked about
+        self.engine_move = None  # its answer, until the board is idle
+        # Window resizes (see resize): size-dependent assets are rebuilt on a worker thread
+        self.baker = None  # single-thread executor, started by the first resize
+        self.bake = None  # Future of the latest bake_layout_assets, until it is swapped in
 
     def _create_crt_scanline_surface(self):
         """Pre-render CRT scanline effect for better performance"""
-        scanline_surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-        for y in range(0, SCREEN_HEIGHT, 4):
-            pygame.draw.line(scanline_surface, (0, 0, 0, 30), (0, y), (SCREEN_WIDTH, y), 2)
-        return scanline_surface
+        return surfaces.scanlines(SCREEN_WIDTH, SCREEN_HEIGHT, spacing=4, thickness=2, alpha=30)
 
     def create_gradient_surface(self, width, height, top_color, bottom_color):
-        """Create a vertical gradient surface"""
-        surface = pygame.Surface((width, height))
-        for y in range(height):
-            ratio = y / height
-            r = int(top_color[0] * (1 - ratio) + bottom_color[0] * ratio)
-            g = int(top_color[1] * (1 - ratio) + bottom_color[1] * ratio)
-            b = int(top_color[2] * (1 - ratio) + bottom_color[2] * ratio)
-            pygame.draw.line(surface, (r, g, b), (0, y), (width, y))
-        return surface
+        """Create a vertical gradient surface (shared; see surfaces.py)"""
+        return surfaces.vertical_gradient(width, height, top_color, bottom_color)
 
     def load_assets(self):
         global FONT_PATH
-        try:
-            # Try to load pixel font for retro feel
-            FONT_PATH = "assets/GameFont.ttf"
-            # Responsive font sizes - reduced multipliers for smaller text
-            self.font_small = pygame.font.Font(FONT_PATH, max(10, int(CELL_SIZE * 0.4)))
-            self.font_medium = pygame.font.Font(FONT_PATH, max(14, int(CELL_SIZE * 0.8)))
-            self.font_large = pygame.font.Font(FONT_PATH, max(20, int(CELL_SIZE * 1.2)))
-        except FileNotFoundError:
-            try:
-                # Fallback to other fonts
-                FONT_PATH = "assets/ChakraPetch-SemiBold.ttf"
-                self.font_small = pygame.font.Font(FONT_PATH, max(10, int(CELL_SIZE * 0.4)))
-                self.font_medium = pygame.font.Font(FONT_PATH, max(14, int(CELL_SIZE * 0.8)))
-                self.font_large = pygame.font.Font(FONT_PATH, max(20, int(CELL_SIZE * 1.2)))
-            except FileNotFoundError:
-                try:
-                    FONT_PATH = "assets/SpaceGrotesk-SemiBold.ttf"
-                    self.font_small = pygame.font.Font(FONT_PATH, max(10, int(CELL_SIZE * 0.4)))
-                    self.font_medium = pygame.font.Font(FONT_PATH, max(14, int(CELL_SIZE * 0.8)))
-                    self.font_large = pygame.font.Font(FONT_PATH, max(20, int(CELL_SIZE * 1.2)))
-                except FileNotFoundError:
-                    # Final fallback to system font
-                    FONT_PATH = None
-                    self.font_small = pygame.font.SysFont("monospace", max(10, int(CELL_SIZE * 0.4)))
-                    self.font_medium = pygame.font.SysFont("monospace", max(14, int(CELL_SIZE * 0.8)), bold=True)
-                    self.font_large = pygame.font.SysFont("monospace", max(20, int(CELL_SIZE * 1.2)), bold=True)
-
-        if FONT_PATH:
-            self.font_tiny = pygame.font.Font(FONT_PATH, max(8, int(CELL_SIZE * 0.3)))
-        else:
-            self.font_tiny = pygame.font.SysFont("Arial", max(8, int(CELL_SIZE * 0.3)))
-        
-        # Title font: use Comic Sans MS for all CHAIN REACTION titles
-        try:
-            self.title_font = pygame.font.SysFont('Comic Sans MS', max(22, int(CELL_SIZE * 0.9)), bold=True)
-        except Exception:
-            # Fallback if Comic Sans not available
-            if os.path.exists("assets/ChakraPetch-SemiBold.ttf"):
-                self.title_font = pygame.font.Font("assets/ChakraPetch-SemiBold.ttf", max(22, int(CELL_SIZE * 0.9)))
-            elif os.path.exists("assets/SpaceGrotesk-SemiBold.ttf"):
-                self.title_font = pygame.font.Font("assets/SpaceGrotesk-SemiBold.ttf", max(22, int(CELL_SIZE * 0.9)))
-            elif FONT_PATH:
-                self.title_font = pygame.font.Font(FONT_PATH, max(22, int(CELL_SIZE * 0.9)))
-            else:
-                self.title_font = pygame.font.SysFont("Arial", max(22, int(CELL_SIZE * 0.9)), bold=True)
-        except Exception:
-            self.title_font = self.font_large
+        FONT_PATH, fonts = load_fonts(CELL_SIZE)
+        self.use_fonts(fonts)
 
         self.sounds = {}
         try:
@@ -556,52 +1307,502 @@ class Game:
             print(f"Sound loading error: {e}. Running without sound.")
             self.sounds = None
 
+    def use_fonts(self, fonts):
+        for name, font in fonts.items():
+            setattr(self, name, font)
+
+    def window_size_event(self, event):
+        """The window size a resize or display-change event asks for, else None."""
+        if event.type == pygame.VIDEORESIZE:
+            return event.size
+        if event.type == WINDOW_DISPLAY_CHANGED:
+            # Moved to another display, perhaps with another DPI and so another pixel size
+            return pygame.display.get_window_size()
+        return None
+
+    def resize(self, width, height):
+        """Lay everything out for a new window size without stalling a frame.
+
+        Layout, cell rects and camera change at once. The background,
+        scanlines, fonts, menu and orb sprites keep drawing (the surfaces
+        stretched) until the bake thread has rebuilt them; see poll_bake.
+        """
+        old_cell_size = CELL_SIZE
+        set_window_size(width, height)
+        size = (SCREEN_WIDTH, SCREEN_HEIGHT)
+        self.screen = pygame.display.set_mode(size, pygame.RESIZABLE)
+        self.background_gradient = pygame.transform.scale(self.background_gradient, size)
+        self.crt_scanline_surface = pygame.transform.scale(self.crt_scanline_surface, size)
+        self.menu_scene = None
+        orb_zoom = 1.0
+        if getattr(self, 'grid', None):
+            self.relayout_board(old_cell_size)
+            orb_zoom = round(self.camera.orb_scale, 3)
+
+        # A bake still queued is already out of date; one running finishes and is ignored
+        if self.bake is not None:
+            self.bake.cancel()
+        if self.baker is None:
+            self.baker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bake")
+        self.bake = self.baker.submit(bake_layout_assets, orb_zoom, max(2, self.num_players))
+        self.bake.add_done_callback(lambda _: pygame.event.post(pygame.event.Event(ASSETS_BAKED)))
+
+    def relayout_board(self, old_cell_size):
+        """Move the board onto the new CELL_SIZE: cell rects, camera, and orbs and particles in flight."""
+        hex_rows = BOARD_TOPOLOGY == "hex"
+        for row in self.grid:
+            for cell in row:
+                cell.place(CELL_SIZE // 2 if hex_rows and cell.row & 1 else 0)
+        ratio = CELL_SIZE / old_cell_size
+        for orb in self.animated_orbs:
+            orb.start, orb.end = orb.start * ratio, orb.end * ratio
+            orb.pos, orb.prev_pos = orb.pos * ratio, orb.prev_pos * ratio
+        for particle in self.particles:
+            particle.pos, particle.prev_pos = particle.pos * ratio, particle.prev_pos * ratio
+            particle.vel = particle.vel * ratio
+        self.camera = Camera((0, HEADER_HEIGHT, VIEW_WIDTH, VIEW_HEIGHT), GRID_WIDTH, GRID_HEIGHT, hex_rows)
+        self.layer = BoardLayer(self.camera.view)
+        self.dragging = False
+
+    def poll_bake(self):
+        """Swap in the assets of a finished bake; returns True if it did."""
+        global FONT_PATH
+        if self.bake is None or not self.bake.done():
+            return False
+        bake, self.bake = self.bake, None
+        try:
+            baked = bake.result()
+        except Exception as e:
+            # Keep drawing the stretched assets rather than losing the game; the
+            # menu and game-over screens compose themselves over them (bake is None)
+            print(f"Could not rebuild assets for the new window size: {e}")
+            return False
+        FONT_PATH = baked["font_path"]
+        self.use_fonts(baked["fonts"])
+        self.background_gradient = baked["background"]
+        self.crt_scanline_surface = baked["scanlines"]
+        self.menu_scene = baked["menu_scene"]
+        if getattr(self, 'grid', None):
+            self.orbits.sprites.update(baked["sprites"])
+            self.layer.camera_key = None  # redraw the layer over the new backdrop
+        return True
+
+    def quit(self):
+        # A bake may still be calling pygame; let it finish before pygame goes away
+        if self.baker is not None:
+            self.baker.shutdown(cancel_futures=True)
+        pygame.quit()
+        sys.exit()
+
     def play_sound(self, name):
         if self.sounds and name in self.sounds:
             self.sounds[name].play()
             
     def reset_game(self):
-        self.grid = [[Cell(row, col) for col in range(GRID_WIDTH)] for row in range(GRID_HEIGHT)]
+        from engine import Board, shape_holes
+        # Neighbor and critical-mass tables come from the engine, so both resolve cascades alike
+        self.board = Board.get(GRID_WIDTH, GRID_HEIGHT, BOARD_TOPOLOGY,
+                               shape_holes(BOARD_SHAPE, GRID_WIDTH, GRID_HEIGHT, BOARD_TOPOLOGY))
+        hex_rows = BOARD_TOPOLOGY == "hex"
+        self.grid = [[Cell(row, col, self.board.critical[row * GRID_WIDTH + col],
+                           CELL_SIZE // 2 if hex_rows and row & 1 else 0)
+                      for col in range(GRID_WIDTH)] for row in range(GRID_HEIGHT)]
+        cells = [c for row in self.grid for c in row]
+        for cell, neighbors in zip(cells, self.board.neighbors):
+            cell.neighbors = tuple(cells[n] for n in neighbors)
         self.current_player, self.turn_count, self.winner = 0, 0, None
         self.explosion_queue = deque()
         self.animated_orbs = []
         self.particles = []  # Add particle effects
         self.shake_duration = 0
         self.explosion_timer = 0  # Timer for explosion delay
+        self.chain_length = 0  # Explosions caused by the current move
+        self.premoves = deque(maxlen=PREMOVE_LIMIT)  # (row, col, player) clicked ahead of their turn
+        self.move_history = []  # cells played, for the game archive and engine seats
+        self.chain_history = []  # cascade length of each move
+        self.history_complete = True  # False once a server keyframe skips moves
         self.is_turn_processed = True # Flag to ensure next_turn is called only once
+        self.accumulator = 0.0  # Unsimulated frame time carried between frames
+        self.sim_time = 0.0  # Simulated seconds, the clock orbs spin by
+        self.animating = set()  # Cells mid placement animation; the only ones update() visits
+        self.camera = Camera((0, HEADER_HEIGHT, VIEW_WIDTH, VIEW_HEIGHT), GRID_WIDTH, GRID_HEIGHT, hex_rows)
+        self.dragging = False
+        self.tiles = TileMap(GRID_WIDTH, GRID_HEIGHT, hex_rows)
+        self.tiles.repaint(self.grid)
+        self.orbits = OrbitLayout(GRID_WIDTH * GRID_HEIGHT)
+        self.layer = BoardLayer(self.camera.view)
+        self.board_version = 0  # bumped by touch() whenever a cell changes
+        self.orb_totals = (-1, None)  # (board_version, orbs per player) for the UI
+        self.threat_cache = (-1, None)  # (board_version, preview) on boards too big to preview
+        if self.engines:
+            self.start_engine_game()
+
+    def touch(self, cell):
+        """Record that a cell's owner or orb count changed."""
+        self.tiles.dirty.add(cell)
+        self.layer.dirty.add(cell)
+        self.board_version += 1
 
     def get_neighbors(self, row, col):
-        neighbors = []
-        if row > 0: neighbors.append(self.grid[row-1][col])
-        if row < GRID_HEIGHT - 1: neighbors.append(self.grid[row+1][col])
-        if col > 0: neighbors.append(self.grid[row][col-1])
-        if col < GRID_WIDTH - 1: neighbors.append(self.grid[row][col+1])
-        return neighbors
+        return self.grid[row][col].neighbors
+
+    def handle_mouse(self, event):
+        """Left click plays, right/middle drag pans, the wheel zooms."""
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            if event.button == 1:
+                self.handle_click(event.pos)
+            elif event.button in (2, 3):
+                self.dragging = True
+        elif event.type == pygame.MOUSEBUTTONUP and event.button in (2, 3):
+            self.dragging = False
+        elif event.type == pygame.MOUSEMOTION and self.dragging:
+            self.camera.pan(*event.rel)
+        elif event.type == pygame.MOUSEWHEEL:
+            self.camera.zoom_at(ZOOM_STEP ** event.y, pygame.mouse.get_pos())
+
+    def pan_with_keys(self, dt):
+        keys = pygame.key.get_pressed()
+        dx = (keys[pygame.K_LEFT] - keys[pygame.K_RIGHT]) * PAN_SPEED * dt
+        dy = (keys[pygame.K_UP] - keys[pygame.K_DOWN]) * PAN_SPEED * dt
+        if dx or dy:
+            self.camera.pan(dx, dy)
 
     def handle_click(self, pos):
-        if self.explosion_queue or self.animated_orbs:
+        hit = self.camera.cell_at(pos)
+        if hit is None:
             return
+        row, col = hit
+        if self.is_busy() or not self.is_local_turn():
+            self.add_premove(row, col)
+        else:
+            self.submit_move(row, col)
 
-        col, row = pos[0] // CELL_SIZE, (pos[1] - HEADER_HEIGHT) // CELL_SIZE
-        if 0 <= col < GRID_WIDTH and 0 <= row < GRID_HEIGHT:
+    def is_busy(self):
+        """True while a move is still resolving, here or on the server."""
+        return bool(self.explosion_queue or self.animated_orbs or not self.is_turn_processed
+                    or self.network_moves or self.network_move_pending)
+
+    def submit_move(self, row, col):
+        """Play a move for the current player; returns False if the cell is not theirs."""
+        if self.network:
             cell = self.grid[row][col]
-            if cell.owner is None or cell.owner == self.current_player:
-                self.play_sound('place')
-                self.is_turn_processed = False
-                self.turn_count += 1
-                cell.owner = self.current_player
-                cell.orbs += 1
-                cell.start_placement()
-                if cell.orbs >= cell.critical_mass:
-                    self.explosion_queue.append(cell)
+            if cell.is_hole or (cell.owner is not None and cell.owner != self.current_player):
+                return False
+            # The server plays the move and sends back the new state
+            self.network.send({"type": "move", "cell": row * GRID_WIDTH + col})
+            self.network_move_pending = True
+            return True
+        return self.place_orb(row, col)
+
+    # --- Premoves ---
+    def add_premove(self, row, col):
+        """Buffer a click made before its player's turn; clicking the same cell again cancels it."""
+        player = self.network_seat if self.network else self.predict_next_player()
+        if player is None or (not self.network and player in self.engines):
+            return
+        for premove in self.premoves:
+            if premove[2] == player:
+                self.premoves.remove(premove)
+                if premove[:2] == (row, col):
+                    return
+                break
+        self.premoves.append((row, col, player))
+
+    def predict_next_player(self):
+        """Who moves after the current player, on the board as it stands (same rules as next_turn)."""
+        if self.is_turn_processed:
+            return self.current_player  # a move is pending elsewhere, not a cascade
+        player = self.current_player
+        for _ in range(self.num_players):
+            player = (player + 1) % self.num_players
+            if self.turn_count < self.num_players or any(c.owner == player for r in self.grid for c in r):
+                return player
+        return None
+
+    def play_premove(self):
+        """Apply the current player's buffered click as soon as the board is idle."""
+        if self.game_state != "playing" or not self.premoves or self.is_busy() or not self.is_local_turn():
+            return
+        player = self.current_player
+        for premove in list(self.premoves):
+            row, col, owner = premove
+            if owner == player:
+                self.premoves.remove(premove)
+                # The cascade may have taken the cell; an invalid premove is simply dropped
+                self.submit_move(row, col)
+                return
+
+    def is_local_turn(self):
+        """True when the player to move sits at this screen."""
+        if self.network is not None:
+            return self.current_player == self.network_seat
+        return self.current_player not in self.engines
+
+    # --- Network play ---
+    def join_server(self, address, num_players, room=None):
+        """Connect to a server.py server and wait in the lobby for a game."""
+        from net import NetworkClient, parse_address
+        host, port = parse_address(address)
+        self.network = NetworkClient(host, port)
+        message = {"type": "join", "players": num_players, "grid": [GRID_WIDTH, GRID_HEIGHT],
+                   "topology": BOARD_TOPOLOGY, "shape": BOARD_SHAPE}
+        if room:
+            message["room"] = room
+        self.network.send(message)
+        self.network_status = "Connecting..."
+        self.game_state = "lobby"
+
+    def leave_server(self):
+        if self.network:
+            self.network.close()
+        self.network = None
+        self.network_seat = None
+        self.network_move_pending = False
+        self.network_replica = None
+        self.network_moves.clear()
+
+    def poll_network(self):
+        if not self.network:
+            return
+        for message in self.network.poll():
+            kind = message.get("type")
+            if kind == "joined":
+                self.network_seat = message["seat"]
+                self.network_status = f"Joined {message['room']} as player {self.network_seat + 1}, waiting for players..."
+            elif kind == "start":
+                from engine import GameState
+                self.num_players = message["num_players"]
+                self.reset_game()
+                board = self.board
+                self.network_replica = GameState(board.width, board.height, self.num_players, board.topology, board.holes)
+                self.network_seq = 0
+                self.network_moves.clear()
+                self.game_state = "playing"
+            elif kind == "delta":
+                self.apply_server_delta(message)
+            elif kind == "keyframe":
+                self.apply_server_keyframe(message)
+            elif kind == "error":
+                self.network_status = f"Server: {message.get('message')}"
+                self.network_move_pending = False
+            elif kind in ("left", "disconnected"):
+                self.leave_server()
+                self.game_state = "menu"
+        self.play_network_moves()
+
+    def apply_server_delta(self, message):
+        """Replay a move from the server on the replica and queue it for animation."""
+        replica = self.network_replica
+        if replica is None or message["seq"] != self.network_seq + 1:
+            self.network.send({"type": "sync"})
+            return
+        self.network_seq = message["seq"]
+        self.network_move_pending = False
+        try:
+            replica.play(message["cell"])
+        except ValueError:
+            pass  # the digest check below asks for a keyframe
+        if replica.digest() != message["digest"]:
+            self.network.send({"type": "sync"})
+        self.network_moves.append(message["cell"])
+
+    def apply_server_keyframe(self, message):
+        """Snap the board to a full position from the server, unless we already match it."""
+        replica = self.network_replica
+        if replica is None:
+            return
+        from net import apply_keyframe
+        if message["seq"] == self.network_seq and replica.snapshot()[:2] == (tuple(message["orbs"]), tuple(message["owner"])):
+            return
+        apply_keyframe(replica, message)
+        self.network_seq = message["seq"]
+        self.history_complete = False
+        self.network_move_pending = False
+        self.network_moves.clear()
+        self.explosion_queue.clear()
+        self.animated_orbs.clear()
+        self.is_turn_processed = True
+        for idx, (orbs, owner) in enumerate(zip(replica.orbs, replica.owner)):
+            cell = self.grid[idx // GRID_WIDTH][idx % GRID_WIDTH]
+            cell.orbs = orbs
+            cell.owner = None if owner < 0 else owner
+            self.touch(cell)
+        self.current_player = replica.current_player
+        self.turn_count = replica.turn_count
+        if replica.winner is not None:
+            self.winner = replica.winner
+            self.game_state = "game_over"
+            self.play_sound('win')
+
+    def play_network_moves(self):
+        """Animate queued server moves one at a time, skipping ahead if they pile up."""
+        while self.network_moves and self.game_state == "playing":
+            if not self.is_turn_processed:
+                if len(self.network_moves) < NETWORK_MAX_BACKLOG:
+                    return
+                self.resolve_turn()
+                continue
+            row, col = divmod(self.network_moves.popleft(), GRID_WIDTH)
+            if not self.place_orb(row, col):
+                self.network.send({"type": "sync"})
+                self.network_moves.clear()
+        self.play_premove()
+
+    # --- Engine seats ---
+    def add_engine(self, seat, command, time_control):
+        """Hand a seat to an external engine process (enginelink.py) for every local game."""
+        from enginelink import EngineProcess
+        self.engines[seat] = EngineProcess(command, **time_control)
+
+    def start_engine_game(self):
+        board = self.board
+        from engine import GameState
+        self.engine_replica = GameState(board.width, board.height, self.num_players, board.topology, board.holes)
+        self.engine_asked = None
+        self.engine_move = None
+        for seat, engine in self.engines.items():
+            if seat < self.num_players:
+                engine.new_game(board.width, board.height, self.num_players, BOARD_TOPOLOGY, BOARD_SHAPE)
+
+    def poll_engines(self):
+        """Ask the engine to move as soon as its turn is known; play its answer once the board is idle."""
+        replica = self.engine_replica
+        if replica is None or self.game_state != "playing":
+            return
+        # The replica resolves moves instantly, so an engine thinks while the last cascade animates
+        for move in self.move_history[replica.turn_count:]:
+            replica.play(move)
+        seat = replica.current_player
+        engine = self.engines.get(seat)
+        if engine is None or replica.is_over:
+            return
+        from enginelink import EngineError
+        try:
+            if self.engine_asked != replica.turn_count:
+                self.engine_asked = replica.turn_count
+                self.engine_move = None
+                engine.request(self.move_history)
+            move = engine.poll()
+            if move is not None:
+                if not replica.is_legal(move):
+                    raise EngineError(f"{engine.name}: illegal move {move}")
+                self.engine_move = move
+        except EngineError as e:
+            print(f"{e}. Player {seat + 1} is played from this screen now.")
+            engine.close()
+            del self.engines[seat]
+            return
+        if self.engine_move is not None and not self.is_busy():
+            row, col = divmod(self.engine_move, GRID_WIDTH)
+            self.engine_move = None
+            self.place_orb(row, col)
+
+    def run_lobby(self):
+        while self.game_state == "lobby":
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT: self.quit()
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                    self.leave_server()
+                    self.game_state = "menu"
+                resize_to = self.window_size_event(event)
+                if resize_to:
+                    self.resize(*resize_to)
+            self.poll_bake()
+            self.poll_network()
+
+            self.screen.blit(self.background_gradient, (0, 0))
+            status = self.font_small.render(self.network_status, True, COLOR["WHITE"])
+            self.screen.blit(status, status.get_rect(center=(SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2)))
+            pygame.display.flip()
+            self.clock.tick(FPS)
+
+    def place_orb(self, row, col):
+        """Play the current player's move on a cell; returns False if it is not theirs to take."""
+        cell = self.grid[row][col]
+        if cell.is_hole or (cell.owner is not None and cell.owner != self.current_player):
+            return False
+        self.play_sound('place')
+        self.is_turn_processed = False
+        self.turn_count += 1
+        self.chain_length = 0
+        self.move_history.append(row * GRID_WIDTH + col)
+        cell.owner = self.current_player
+        cell.orbs += 1
+        cell.start_placement()
+        self.animating.add(cell)
+        self.touch(cell)
+        if cell.orbs >= cell.critical_mass:
+            self.explosion_queue.append(cell)
+        return True
+
+    def resolve_turn(self, max_steps=100000):
+        """Fast-forward animations until the move just played has fully resolved.
+
+        Used by headless tools (benchmarks, fuzzing, bots); returns the chain length.
+        """
+        steps = 0
+        while not self.is_turn_processed:
+            self.update(FAST_FORWARD_DT)
+            steps += 1
+            if steps > max_steps:
+                raise RuntimeError("cascade did not settle")
+        return self.chain_length
+
+    def handle_key(self, key):
+        """T toggles the threat heatmap, Home resets the camera, F3 the frame profiler overlay, F4 exports its Chrome trace."""
+        if key == pygame.K_t:
+            self.show_threats = not self.show_threats
+        elif key == pygame.K_HOME:
+            self.camera.reset()
+        elif key == pygame.K_F3:
+            self.show_profiler = not self.show_profiler
+            self.profiler.set_enabled(self.show_profiler)
+        elif key == pygame.K_F4 and self.profiler.trace:
+            path = self.profiler.export_trace()
+            print(f"Frame trace written to {path}")
+
+    def engine_state(self):
+        """The position on screen as an engine.GameState."""
+        from engine import GameState, EMPTY
+        board = self.board
+        state = GameState(board.width, board.height, self.num_players, board.topology, board.holes)
+        cells = [c for row in self.grid for c in row]
+        state.orbs = [c.orbs for c in cells]
+        state.owner = [EMPTY if c.owner is None else c.owner for c in cells]
+        for owner in state.owner:
+            if owner != EMPTY:
+                state.cells_owned[owner] += 1
+        state.current_player = self.current_player
+        state.turn_count = self.turn_count
+        return state
+
+    def move_preview(self):
+        """(outcome of every legal move, cells one orb from critical) for the idle board.
+
+        Computed once per position by engine.preview_moves and cached, so hovering
+        costs a dictionary lookup per frame.
+        """
+        if self.is_busy():
+            return None
+        if GRID_WIDTH * GRID_HEIGHT > PREVIEW_MAX_CELLS:
+            # Resolving every move of a big board takes far longer than a frame
+            if self.threat_cache[0] != self.board_version:
+                from engine import critical_cells
+                self.threat_cache = (self.board_version, ({}, critical_cells(self.engine_state())))
+            return self.threat_cache[1]
+        if self.preview_cache is None:
+            from engine import PreviewCache
+            self.preview_cache = PreviewCache()
+        return self.preview_cache.get(self.engine_state())
 
     def trigger_shake(self):
         self.shake_duration = SHAKE_DURATION
 
     def update(self, dt):
-        for row in self.grid:
-            for cell in row:
-                cell.update(dt)
+        self.sim_time += dt
+        still = {cell for cell in self.animating if cell.update(dt)}
+        self.layer.dirty |= self.animating - still  # draw where their animation ended
+        self.animating = still
 
         # Update particles
         self.particles = [p for p in self.particles if p.update(dt)]
@@ -617,24 +1818,14 @@ class Game:
         # Process explosions with delay for better visual feedback
         if self.explosion_queue and not self.animated_orbs and self.explosion_timer <= 0:
             cell = self.explosion_queue.popleft()
-            self.play_sound('explode')
-            self.trigger_shake()
-
-            # Create particle effects at explosion
-            color = PLAYER_COLORS[cell.owner]
-            for _ in range(15):
-                self.particles.append(Particle(cell.rect.center, color))
-
-            cell.orbs -= cell.critical_mass
-            if cell.orbs == 0:
-                cell.owner = None
-
-            for neighbor in self.get_neighbors(cell.row, cell.col):
-                self.animated_orbs.append(AnimatedOrb(cell, neighbor, self.current_player))
-
-            # Set timer for next explosion
-            if self.explosion_queue:
-                self.explosion_timer = EXPLOSION_DELAY
+            # Once the mover owns every orb the game is decided; on a crowded board
+            # the cascade would otherwise keep cycling forever
+            if self.turn_count >= self.num_players and self.owns_whole_board(self.current_player):
+                self.explosion_queue.clear()
+            # A cell can be queued more than once in one cascade; skip entries that an
+            # earlier explosion of the same cell has already resolved
+            elif cell.orbs >= cell.critical_mass:
+                self.explode(cell)
 
         # Update orb animations
         for orb in self.animated_orbs[:]:
@@ -643,13 +1834,43 @@ class Game:
                 target = orb.target_cell
                 target.owner = orb.player_id
                 target.orbs += 1
+                self.touch(target)
                 if target.orbs >= target.critical_mass:
                     self.explosion_queue.append(target)
 
         # Check if turn is over
         if not self.explosion_queue and not self.animated_orbs and not self.is_turn_processed:
+            self.chain_history.append(self.chain_length)
             self.next_turn()
             self.is_turn_processed = True
+            self.play_premove()
+
+    def owns_whole_board(self, player):
+        return all(c.owner is None or c.owner == player for r in self.grid for c in r)
+
+    def explode(self, cell):
+        """Burst a critical cell, sending one orb towards each neighbor."""
+        self.chain_length += 1
+        self.play_sound('explode')
+        self.trigger_shake()
+
+        # Create particle effects at explosion
+        color = PLAYER_COLORS[cell.owner]
+        for _ in range(15):
+            self.particles.append(Particle(cell.rect.center, color))
+
+        cell.orbs -= cell.critical_mass
+        if cell.orbs == 0:
+            cell.owner = None
+        self.touch(cell)
+
+        wrap = self.board.topology == "torus"
+        for neighbor in cell.neighbors:
+            self.animated_orbs.append(AnimatedOrb(cell, neighbor, self.current_player, wrap))
+
+        # Set timer for next explosion
+        if self.explosion_queue:
+            self.explosion_timer = EXPLOSION_DELAY
 
     def next_turn(self):
         if self.turn_count >= self.num_players:
@@ -658,66 +1879,136 @@ class Game:
                 self.winner = active.pop()
                 self.game_state = "game_over"
                 self.play_sound('win')
+                self.archive_game()
                 return
+            # Premoves of players the cascade eliminated (or a wrong guess of the mover) will never play
+            for premove in [p for p in self.premoves if p[2] not in active]:
+                self.premoves.remove(premove)
 
         while True:
             self.current_player = (self.current_player + 1) % self.num_players
             if self.turn_count < self.num_players: break
             if any(c.owner == self.current_player for r in self.grid for c in r): break
 
-    def draw(self):
+    def archive_game(self):
+        """Append the finished match to the game archive, if one is open."""
+        # Archive records only hold a grid size, so other boards would mix into its statistics
+        if self.archive is None or not self.history_complete or self.board.key != (GRID_WIDTH, GRID_HEIGHT, "rect", frozenset()):
+            return
+        try:
+            self.archive.append(GRID_WIDTH, GRID_HEIGHT, self.num_players,
+                                self.move_history, self.chain_history, self.winner)
+        except OSError as e:
+            print(f"Could not archive game: {e}")
+
+    def draw(self, interp=1.0):
+        """Render the board; interp blends the last two simulation steps (0..1)."""
         # Draw gradient background
         self.screen.blit(self.background_gradient, (0, 0))
 
+        profiler = self.profiler
+
         # Draw header with current turn
-        self.draw_header()
+        with profiler.phase("header"):
+            self.draw_header()
 
         offset = [0, 0]
         if self.shake_duration > 0:
             offset[0] = random.randint(-SHAKE_INTENSITY, SHAKE_INTENSITY)
             offset[1] = random.randint(-SHAKE_INTENSITY, SHAKE_INTENSITY)
+        camera = self.camera
+        camera.shake = offset
 
         # Get mouse position for hover effect
-        mouse_pos = pygame.mouse.get_pos()
         hover_cell = None
-        header_height = HEADER_HEIGHT
         if not self.explosion_queue and not self.animated_orbs:
-            col, row = mouse_pos[0] // CELL_SIZE, (mouse_pos[1] - header_height) // CELL_SIZE
-            if 0 <= col < GRID_WIDTH and 0 <= row < GRID_HEIGHT:
-                cell = self.grid[row][col]
-                if cell.owner is None or cell.owner == self.current_player:
+            hit = camera.cell_at(pygame.mouse.get_pos())
+            if hit is not None:
+                cell = self.grid[hit[0]][hit[1]]
+                if not cell.is_hole and (cell.owner is None or cell.owner == self.current_player) and self.is_local_turn():
                     hover_cell = cell
 
-        # Draw cells
-        for row in self.grid:
-            for cell in row:
-                cell.rect.topleft = (cell.col * CELL_SIZE + offset[0], cell.row * CELL_SIZE + offset[1] + header_height)
+        preview = self.move_preview() if hover_cell or self.show_threats else None
+        threats = preview[1] if preview and self.show_threats else ()
 
-                # Draw hover highlight
-                if cell == hover_cell:
-                    hover_color = PLAYER_COLORS[self.current_player]
-                    hover_alpha = tuple(int(c * 0.15) for c in hover_color)
-                    pygame.draw.rect(self.screen, hover_alpha, cell.rect)
-
-                cell.draw(self.screen)
+        # Only cells inside the viewport are drawn; the board never spills over the header or UI
+        self.screen.set_clip(camera.view)
+        r0, r1, c0, c1 = camera.visible_range()
+        with profiler.phase("cells"):
+            if camera.tiles_only:
+                self.tiles.draw(self.screen, camera, self.grid)
+            else:
+                # Hover highlight: the cell's background in a dim shade of the player's color
+                hover_color = tuple(int(c * 0.15) for c in PLAYER_COLORS[self.current_player])
+                orbiting = self.layer.draw(self.screen, camera, self.grid, self.background_gradient,
+                                           hover_cell, hover_color, self.animating, interp)
+                # Orbs spin with the clock, so idle cells need no per-step update
+                spin = self.sim_time - (1 - interp) * SIM_DT
+                self.orbits.draw(self.screen, orbiting, [camera.cell_rect(c.row, c.col) for c in orbiting],
+                                 camera.orb_scale, spin, interp)
+
+            # Threat heatmap: cells one orb from exploding, in their owner's color
+            for idx in threats:
+                row, col = divmod(idx, GRID_WIDTH)
+                if r0 <= row < r1 and c0 <= col < c1:
+                    heat = tuple(int(c * 0.7) for c in PLAYER_COLORS[self.grid[row][col].owner])
+                    pygame.draw.rect(self.screen, heat, camera.cell_rect(row, col).inflate(-2, -2), 3)
 
         # Draw 3D grid lines with player color
-        self.draw_3d_grid(offset)
+        with profiler.phase("grid"):
+            self.draw_3d_grid(camera)
+            self.draw_premoves()
+            if hover_cell and preview:
+                self.draw_move_preview(hover_cell, preview[0])
 
         # Draw particles (behind orbs)
-        for particle in self.particles:
-            particle.draw(self.screen)
-
-        for orb in self.animated_orbs:
-            orb.pos.x += offset[0]
-            orb.pos.y += offset[1]
-            orb.draw(self.screen)
-
-        self.draw_ui()
-        self.draw_crt_scanlines()
+        with profiler.phase("particles"):
+            for particle in self.particles:
+                particle.draw(self.screen, camera, interp)
+
+            for orb in self.animated_orbs:
+                orb.draw(self.screen, camera, interp)
+        self.screen.set_clip(None)
+
+        with profiler.phase("ui"):
+            self.draw_ui()
+        with profiler.phase("scanlines"):
+            self.draw_crt_scanlines()
+        profiler.end_frame()
+        if self.show_profiler:
+            self.profiler.draw_overlay(self.screen, self.profiler_font)
         pygame.display.flip()
         self.time += 1
     
+    def draw_move_preview(self, hover_cell, table):
+        """Outline the cells the hovered move would capture and summarize its outcome."""
+        outcome = table.get(hover_cell.row * GRID_WIDTH + hover_cell.col)
+        if outcome is None:
+            return
+        captured, gained, eliminated = outcome
+        color = PLAYER_COLORS[self.current_player]
+        for idx in captured:
+            rect = self.camera.cell_rect(*divmod(idx, GRID_WIDTH)).inflate(-4, -4)
+            pygame.draw.rect(self.screen, color, rect, 2, border_radius=4)
+        text = f"+{gained} orbs"
+        if captured:
+            text += f", {len(captured)} captured"
+        if eliminated:
+            text += ", eliminates " + " ".join(f"P{p + 1}" for p in eliminated)
+        label = self.font_tiny.render(text, True, COLOR["WHITE"])
+        rect = label.get_rect(midbottom=self.camera.cell_rect(hover_cell.row, hover_cell.col).midtop)
+        rect.clamp_ip(self.camera.view)
+        self.screen.fill((0, 0, 0), rect.inflate(6, 4))
+        self.screen.blit(label, rect)
+
+    def draw_premoves(self):
+        """Pulsing outline on each buffered premove, in its player's color."""
+        pulse = 0.6 + 0.4 * math.sin(self.time * 0.2)
+        for row, col, player in self.premoves:
+            rect = self.camera.cell_rect(row, col).inflate(-8, -8)
+            color = tuple(int(c * pulse) for c in PLAYER_COLORS[player])
+            pygame.draw.rect(self.screen, color, rect, 3, border_radius=6)
+
     def draw_crt_scanlines(self):
         """Blit pre-rendered CRT scanline surface"""
         self.screen.blit(self.crt_scanline_surface, (0, 0))
@@ -728,29 +2019,22 @@ class Game:
             length = abs(end[1] - start[1])
             if length == 0:
                 return
-            surf = pygame.Surface((width, length), pygame.SRCALPHA)
-            for i in range(length):
-                ratio = i / max(1, length - 1)
-                alpha = start_alpha + (end_alpha - start_alpha) * ratio
-                pygame.draw.line(surf, (*base_color, int(alpha)), (0, i), (width - 1, i))
+            surf = surfaces.gradient_line(int(length), width, tuple(base_color), start_alpha, end_alpha, True)
             top = min(start[1], end[1])
             self.screen.blit(surf, (int(start[0] - width // 2), int(top)))
         else:
             length = abs(end[0] - start[0])
             if length == 0:
                 return
-            surf = pygame.Surface((length, width), pygame.SRCALPHA)
-            for i in range(length):
-                ratio = i / max(1, length - 1)
-                alpha = start_alpha + (end_alpha - start_alpha) * ratio
-                pygame.draw.line(surf, (*base_color, int(alpha)), (i, 0), (i, width - 1))
+            surf = surfaces.gradient_line(int(length), width, tuple(base_color), start_alpha, end_alpha, False)
             left = min(start[0], end[0])
             self.screen.blit(surf, (int(left), int(start[1] - width // 2)))
     
-    def draw_3d_grid(self, offset):
+    def draw_3d_grid(self, camera):
         """Draw retro pixel grid lines with pulsing animation and transparency"""
+        if camera.tiles_only:
+            return
         player_color = PLAYER_COLORS[self.current_player]
-        header_height = HEADER_HEIGHT
         
         # Pulsing animation factor
         pulse = 0.85 + 0.25 * math.sin(self.time * 0.06)
@@ -762,19 +2046,29 @@ class Game:
         # Create a transparent surface for grid lines
         grid_surf = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
         
+        # Lines bounding the visible cells only
+        r0, r1, c0, c1 = camera.visible_range()
+        if self.board.holes or camera.row_shift:
+            # Shifted rows and holes break the long lines up; outline each cell instead
+            for row in range(r0, r1):
+                for cell in self.grid[row][c0:c1]:
+                    if not cell.is_hole:
+                        pygame.draw.rect(grid_surf, grid_bright + (120,), camera.cell_rect(row, cell.col).inflate(1, 1), 1)
+            self.screen.blit(grid_surf, (0, 0))
+            return
+        area = camera.cell_rect(r0, c0, r1 - r0, c1 - c0)
+
         # Vertical lines
-        for col in range(GRID_WIDTH + 1):
-            x = col * CELL_SIZE + offset[0]
+        for col in range(c0, c1 + 1):
+            x = camera.cell_rect(r0, col).left
             pygame.draw.line(grid_surf, grid_bright + (120,),  # Add alpha for transparency
-                             (x, offset[1] + header_height), 
-                             (x, GRID_HEIGHT * CELL_SIZE + offset[1] + header_height), 1)
+                             (x, area.top), (x, area.bottom), 1)
         
         # Horizontal lines
-        for row in range(GRID_HEIGHT + 1):
-            y = row * CELL_SIZE + offset[1] + header_height
+        for row in range(r0, r1 + 1):
+            y = camera.cell_rect(row, c0).top
             pygame.draw.line(grid_surf, grid_bright + (120,),  # Add alpha for transparency
-                             (offset[0], y),
-                             (GRID_WIDTH * CELL_SIZE + offset[0], y), 1)
+                             (area.left, y), (area.right, y), 1)
         
         # Blit the transparent grid to the screen
         self.screen.blit(grid_surf, (0, 0))
@@ -828,13 +2122,7 @@ class Game:
             glow_rect = glow.get_rect(topleft=(title_rect.left + off[0], title_rect.top + off[1]))
             self.screen.blit(glow, glow_rect)
         # Gradient overlay
-        grad = pygame.Surface(title_surf.get_size(), pygame.SRCALPHA)
-        for y in range(title_surf.get_height()):
-            ratio = y / title_surf.get_height()
-            r = int(COLOR["WHITE"][0] * (1 - ratio) + COLOR["ACCENT"][0] * ratio)
-            g = int(COLOR["WHITE"][1] * (1 - ratio) + COLOR["ACCENT"][1] * ratio)
-            b = int(COLOR["WHITE"][2] * (1 - ratio) + COLOR["ACCENT"][2] * ratio)
-            pygame.draw.line(grad, (r, g, b, 220), (0, y), (title_surf.get_width(), y))
+        grad = surfaces.vertical_gradient(*title_surf.get_size(), COLOR["WHITE"], COLOR["ACCENT"], alpha=220)
         title_surf.blit(grad, (0, 0), special_flags=pygame.BLEND_RGBA_MULT)
         self.screen.blit(title_surf, title_rect)
 
@@ -930,23 +2218,22 @@ class Game:
         ui_rect = pygame.Rect(0, ui_y, SCREEN_WIDTH, UI_HEIGHT)
 
         # Draw gradient background
-        for y in range(UI_HEIGHT):
-            ratio = y / UI_HEIGHT
-            r = int(COLOR["UI_GRADIENT_TOP"][0] * (1 - ratio) + COLOR["UI_GRADIENT_BOTTOM"][0] * ratio)
-            g = int(COLOR["UI_GRADIENT_TOP"][1] * (1 - ratio) + COLOR["UI_GRADIENT_BOTTOM"][1] * ratio)
-            b = int(COLOR["UI_GRADIENT_TOP"][2] * (1 - ratio) + COLOR["UI_GRADIENT_BOTTOM"][2] * ratio)
-            pygame.draw.line(self.screen, (r, g, b), (0, ui_y + y), (SCREEN_WIDTH, ui_y + y))
+        self.screen.blit(surfaces.vertical_gradient(SCREEN_WIDTH, UI_HEIGHT, COLOR["UI_GRADIENT_TOP"],
+                                                    COLOR["UI_GRADIENT_BOTTOM"]), (0, ui_y))
 
         # Top accent line
         pygame.draw.line(self.screen, COLOR["ACCENT"], ui_rect.topleft, ui_rect.topright, 3)
         pygame.draw.line(self.screen, (50, 60, 100), (0, ui_y + 1), (SCREEN_WIDTH, ui_y + 1), 1)
 
-        # Calculate orb counts for dominance bar
-        orb_counts = [0] * self.num_players
-        for row in self.grid:
-            for cell in row:
-                if cell.owner is not None:
-                    orb_counts[cell.owner] += cell.orbs
+        # Calculate orb counts for dominance bar (once per board change)
+        if self.orb_totals[0] != self.board_version:
+            orb_counts = [0] * self.num_players
+            for row in self.grid:
+                for cell in row:
+                    if cell.owner is not None:
+                        orb_counts[cell.owner] += cell.orbs
+            self.orb_totals = (self.board_version, orb_counts)
+        orb_counts = self.orb_totals[1]
 
         total_orbs = sum(orb_counts)
         
@@ -956,7 +2243,7 @@ class Game:
             bar_padding = max(12, int(CELL_SIZE * 0.5))
             max_w = SCREEN_WIDTH - (bar_padding * 2)
             # Slight overlap with grid bottom to remove visual gap
-            bar_y = HEADER_HEIGHT + GRID_HEIGHT * CELL_SIZE - (bar_h // 2)
+            bar_y = HEADER_HEIGHT + VIEW_HEIGHT - (bar_h // 2)
 
             bg_rect = pygame.Rect(bar_padding, bar_y, max_w, bar_h)
             # Rounded dark background
@@ -1043,89 +2330,56 @@ class Game:
             self.screen.blit(bar_s, (bar_padding, bar_y))
             self.screen.blit(wave_surf, (bar_padding, bar_y))
             
-    def run_menu(self):
-        # Fresh retro menu design
-        title_font = getattr(self, 'title_font', self.font_large)
-        header_text = "CHAIN REACTION"
-
-        # Menu options
-        options = list(range(2, 10))
-
-        # Tile sizing (slightly smaller)
-        tile_w = max(120, int(CELL_SIZE * 3.0))
-        tile_h = max(64, int(CELL_SIZE * 1.5))
-        cols = 3
-        gap = max(14, int(CELL_SIZE * 0.4))
-
-        # Compute grid layout and centering
-        rows = (len(options) + cols - 1) // cols
-        grid_w = cols * tile_w + (cols - 1) * gap
-        grid_h = rows * tile_h + (rows - 1) * gap
-        grid_left = (SCREEN_WIDTH - grid_w) // 2
-        grid_top = int(SCREEN_HEIGHT * 0.32)
-
-        # Build rects for each option, centering incomplete last row
-        rects = []
-        for idx, val in enumerate(options):
-            r = idx // cols
-            c = idx % cols
-            # center last row
-            items_in_row = cols if (r < rows - 1 or len(options) % cols == 0) else (len(options) % cols)
-            row_grid_w = items_in_row * tile_w + (items_in_row - 1) * gap
-            row_left = (SCREEN_WIDTH - row_grid_w) // 2
-            x = row_left + c * (tile_w + gap)
-            y = grid_top + r * (tile_h + gap)
-            rects.append(pygame.Rect(x, y, tile_w, tile_h))
+    def show_stretched(self, width, height):
+        """resize(), leaving the picture on screen stretched to the new size until a new one is composed."""
+        picture = self.screen.copy()
+        self.resize(width, height)
+        self.screen.blit(pygame.transform.scale(picture, self.screen.get_size()), (0, 0))
+        pygame.display.flip()
 
+    def run_menu(self):
+        # The scene only changes on input, so the loop sleeps in event.wait()
+        # and pushes just the tiles that changed to the display
+        scene = None
         hover_idx = None
         select_idx = 0
 
-        # helper: draw programmatic retro logo (returns surface)
-        def make_retro_logo(size):
-            s = pygame.Surface((size, size), pygame.SRCALPHA)
-            cx = cy = size // 2
-            # layered neon circles
-            for i, alpha, rad_mul in [(0, 30, 1.0), (1, 60, 0.86), (2, 120, 0.72)]:
-                r = int(size * (0.5 * rad_mul))
-                col = tuple(min(255, int(c * (0.8 + i * 0.08))) for c in COLOR['ACCENT'])
-                pygame.draw.circle(s, (*col, alpha), (cx, cy), r)
-            # dark center
-            pygame.draw.circle(s, (6, 8, 14), (cx, cy), int(size * 0.42))
-            # big CR letters in blocky retro style
-            try:
-                f = pygame.font.Font(FONT_PATH, int(size * 0.36)) if FONT_PATH else pygame.font.SysFont(None, int(size * 0.36), bold=True)
-            except Exception:
-                f = pygame.font.SysFont(None, int(size * 0.36), bold=True)
-            txt = f.render('CR', True, (230, 240, 255))
-            tr = txt.get_rect(center=(cx, cy))
-            s.blit(txt, tr)
-            # small scanline overlay
-            for y in range(0, size, 4):
-                pygame.draw.line(s, (255, 255, 255, 6), (0, y), (size, y))
-            return s
-
-        logo_s = make_retro_logo(max(64, int(CELL_SIZE * 2.5)))
-
-        instructions_font = self.font_small if hasattr(self, 'font_small') else self.font
-
         while self.game_state == 'menu':
-            for event in pygame.event.get():
+            if self.menu_scene is None and self.bake is None:
+                # First visit, or the bake failed: compose it here over the stretched background
+                self.menu_scene = MenuScene(self.background_gradient, getattr(self, 'title_font', self.font_large))
+            if scene is not self.menu_scene:
+                # First frame, or a resize: None until the bake thread has composed the new scene
+                scene = self.menu_scene
+                if scene is None:
+                    self.screen.blit(self.background_gradient, (0, 0))
+                    pygame.display.flip()
+                else:
+                    scene.invalidate()
+            if scene is not None:
+                dirty = scene.draw(self.screen, hover_idx, select_idx)
+                if dirty:
+                    pygame.display.update(dirty)
+            resize_to = None
+            for event in [pygame.event.wait()] + pygame.event.get():
                 if event.type == pygame.QUIT:
-                    pygame.quit(); sys.exit()
+                    self.quit()
+                resize_to = self.window_size_event(event) or resize_to
+                if scene is None:
+                    continue
+                options, cols = scene.options, scene.cols
+                if event.type in (pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE):
+                    scene.invalidate()
                 elif event.type == pygame.MOUSEMOTION:
-                    hover_idx = None
-                    for i, r in enumerate(rects):
-                        if r.collidepoint(event.pos):
-                            hover_idx = i
-                            break
+                    hover_idx = scene.tile_at(event.pos)
                 elif event.type == pygame.MOUSEBUTTONDOWN:
-                    for i, r in enumerate(rects):
-                        if r.collidepoint(event.pos):
-                            select_idx = i
-                            self.num_players = options[i]
-                            self.reset_game()
-                            self.game_state = 'playing'
-                            break
+                    i = scene.tile_at(event.pos)
+                    if i is not None:
+                        select_idx = i
+                        self.num_players = options[i]
+                        self.reset_game()
+                        self.game_state = 'playing'
+                        break
                 elif event.type == pygame.KEYDOWN:
                     if event.key in (pygame.K_RIGHT, pygame.K_d):
                         select_idx = min(len(options) - 1, select_idx + 1)
@@ -1139,144 +2393,136 @@ class Game:
                         self.num_players = options[select_idx]
                         self.reset_game()
                         self.game_state = 'playing'
+                        break
+            if resize_to:
+                self.show_stretched(*resize_to)
+            self.poll_bake()
 
-            # Draw
-            self.screen.blit(self.background_gradient, (0, 0))
-
-            # Modern, beautiful CHAIN REACTION title with logo
-            spacing = max(8, int(CELL_SIZE * 0.3))  # Reduced gap for tighter alignment
-            logo_w = logo_s.get_width()
-            logo_h = logo_s.get_height()
-            # Create styled title
-            menu_title_font = getattr(self, 'title_font', self.font_large)
-            menu_title_surf = menu_title_font.render(header_text, True, COLOR['WHITE'])
-            # Drop shadow
-            menu_shadow = menu_title_font.render(header_text, True, (20, 30, 60))
-            # Accent glow
-            menu_glow = menu_title_font.render(header_text, True, COLOR['ACCENT'])
-            # Gradient overlay
-            grad = pygame.Surface(menu_title_surf.get_size(), pygame.SRCALPHA)
-            for y in range(menu_title_surf.get_height()):
-                ratio = y / menu_title_surf.get_height()
-                r = int(COLOR['WHITE'][0] * (1 - ratio) + COLOR['ACCENT'][0] * ratio)
-                g = int(COLOR['WHITE'][1] * (1 - ratio) + COLOR['ACCENT'][1] * ratio)
-                b = int(COLOR['WHITE'][2] * (1 - ratio) + COLOR['ACCENT'][2] * ratio)
-                pygame.draw.line(grad, (r, g, b, 220), (0, y), (menu_title_surf.get_width(), y))
-            menu_title_surf.blit(grad, (0, 0), special_flags=pygame.BLEND_RGBA_MULT)
-            # Center block for logo + title
-            title_w = menu_title_surf.get_width()
-            title_h = menu_title_surf.get_height()
-            combined_w = logo_w + spacing + title_w
-            top_y = int(SCREEN_HEIGHT * 0.055)  # Slightly less top padding
-            # Align logo and title to same baseline (centered block, minimal gap)
-            combined_h = max(logo_h, title_h)
-            start_x = (SCREEN_WIDTH - combined_w) // 2
-            logo_x = start_x
-            # Align logo and title to same vertical center
-            logo_y = top_y + (combined_h - logo_h) // 2
-            title_x = logo_x + logo_w + spacing
-            title_y = top_y + (combined_h - title_h) // 2
-            # Draw logo
-            logo_path = os.path.join('assets', 'logo.png')
-            if os.path.exists(logo_path):
-                try:
-                    user_logo = pygame.image.load(logo_path).convert_alpha()
-                    us = pygame.transform.smoothscale(user_logo, (logo_w, logo_s.get_height()))
-                    self.screen.blit(us, (logo_x, logo_y))
-                except Exception:
-                    self.screen.blit(logo_s, (logo_x, logo_y))
-            else:
-                self.screen.blit(logo_s, (logo_x, logo_y))
-            # Draw styled title: shadow, glow, gradient
-            shadow_rect = menu_shadow.get_rect(topleft=(title_x + 3, title_y + 3))
-            self.screen.blit(menu_shadow, shadow_rect)
-            for off in [(-3, -3), (3, -3), (-3, 3), (3, 3)]:
-                glow_rect = menu_glow.get_rect(topleft=(title_x + off[0], title_y + off[1]))
-                self.screen.blit(menu_glow, glow_rect)
-            self.screen.blit(menu_title_surf, (title_x, title_y))
-
-            # draw grid of tiles
-            for i, r in enumerate(rects):
-                is_hover = (hover_idx == i)
-                is_selected = (select_idx == i)
-                # tile background
-                base_col = COLOR['BUTTON_HOVER'] if is_hover or is_selected else COLOR['BUTTON']
-                pygame.draw.rect(self.screen, base_col, r, border_radius=12)
-                pygame.draw.rect(self.screen, COLOR['ACCENT'], r, 2, border_radius=12)
-                # label (no orb preview) — center text inside tile with shadow + accent
-                label = f"{options[i]} Players"
-                try:
-                    lf = pygame.font.SysFont('Comic Sans MS', max(14, int(tile_h * 0.26)), bold=True)
-                except Exception:
-                    try:
-                        menu_font_path = os.path.join('assets', 'SpaceGrotesk-SemiBold.ttf')
-                        lf = pygame.font.Font(menu_font_path, max(14, int(tile_h * 0.26)))
-                    except Exception:
-                        try:
-                            lf = pygame.font.Font(FONT_PATH, max(14, int(tile_h * 0.26))) if FONT_PATH else pygame.font.SysFont(None, max(14, int(tile_h * 0.26)), bold=True)
-                        except Exception:
-                            lf = pygame.font.SysFont(None, max(14, int(tile_h * 0.26)), bold=True)
-                txt_accent = lf.render(label, True, COLOR['ACCENT'])
-                txt_shadow = lf.render(label, True, (6, 8, 14))
-                txt = lf.render(label, True, COLOR['WHITE'])
-                tx = r.left + (r.w - txt.get_width()) // 2
-                ty_label = r.top + (r.h - txt.get_height()) // 2
-                # subtle accent halo
-                acc_s = txt_accent.copy()
-                try:
-                    acc_s.set_alpha(120)
-                except Exception:
-                    pass
-                self.screen.blit(acc_s, (tx - 1, ty_label - 1))
-                # shadow and main text
-                self.screen.blit(txt_shadow, (tx + 2, ty_label + 2))
-                self.screen.blit(txt, (tx, ty_label))
-
-                # small hint for selected tile
-                if is_selected:
-                    s = pygame.Surface((r.w, r.h), pygame.SRCALPHA)
-                    pygame.draw.rect(s, (255,255,255,14), s.get_rect(), border_radius=12)
-                    self.screen.blit(s, (r.left, r.top))
-
-            # (instructions removed for cleaner look)
-
-            pygame.display.flip()
-            self.clock.tick(FPS)
-
-    def run_game_over(self):
+    def compose_game_over(self):
+        """(menu button, {hovered: finished frame}) for the current layout."""
         winner_text = self.font_large.render(f"PLAYER {self.winner + 1} WINS!", True, PLAYER_COLORS[self.winner])
         winner_rect = winner_text.get_rect(center=(SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2 - 60))
         menu_button = Button((0,0,250,50), "MAIN MENU")
         menu_button.rect.center = (SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2 + 60)
 
+        # One finished frame per button state; only hovering changes the picture
+        backdrop = self.background_gradient.copy()
+        backdrop.blit(winner_text, winner_rect)
+        frames = {}
+        for hovered in (False, True):
+            frames[hovered] = backdrop.copy()
+            menu_button.is_hovered = hovered
+            menu_button.draw(frames[hovered])
+        menu_button.is_hovered = menu_button.rect.collidepoint(pygame.mouse.get_pos())
+        return menu_button, frames
+
+    def run_game_over(self):
+        menu_button, frames = self.compose_game_over()
+        shown = None
         while self.game_state == "game_over":
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT: pygame.quit(); sys.exit()
+            if frames is not None and shown != menu_button.is_hovered:
+                shown = menu_button.is_hovered
+                self.screen.blit(frames[shown], (0, 0))
+                pygame.display.flip()
+            resize_to = None
+            for event in [pygame.event.wait()] + pygame.event.get():
+                if event.type == pygame.QUIT: self.quit()
+                resize_to = self.window_size_event(event) or resize_to
+                if event.type in (pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE):
+                    shown = None
                 if menu_button.handle_event(event):
+                    self.leave_server()
                     self.game_state = "menu"
-            
-            # Draw gradient background
-            self.screen.blit(self.background_gradient, (0, 0))
-            
-            # Draw simple winner text
-            self.screen.blit(winner_text, winner_rect)
-            
-            menu_button.draw(self.screen)
-            pygame.display.flip()
-            self.clock.tick(FPS)
+                    break
+            if resize_to:
+                # The old frames stay up, stretched, until the new fonts and background are baked
+                self.show_stretched(*resize_to)
+                frames = None
+            # A failed bake leaves the stretched assets in place; compose over those
+            if self.poll_bake() or (frames is None and self.bake is None):
+                menu_button, frames = self.compose_game_over()
+                shown = None
 
     def run(self):
+        try:
+            from archive import GameArchive
+            self.archive = GameArchive(ARCHIVE_DIR)
+        except (ImportError, OSError, ValueError) as e:
+            print(f"Game archive unavailable: {e}. Matches will not be recorded.")
         while True:
             if self.game_state == "menu": self.run_menu()
+            elif self.game_state == "lobby": self.run_lobby()
             elif self.game_state == "playing":
-                dt = self.clock.tick(FPS) / 1000.0
+                frame_dt = min(self.clock.tick(FPS) / 1000.0, MAX_FRAME_TIME)
+                self.accumulator += frame_dt
+                self.profiler.begin_frame()
+                resize_to = None
                 for event in pygame.event.get():
-                    if event.type == pygame.QUIT: pygame.quit(); sys.exit()
-                    if event.type == pygame.MOUSEBUTTONDOWN: self.handle_click(event.pos)
-                self.update(dt)
-                self.draw()
+                    if event.type == pygame.QUIT: self.quit()
+                    if event.type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.MOUSEMOTION, pygame.MOUSEWHEEL):
+                        self.handle_mouse(event)
+                    if event.type == pygame.KEYDOWN: self.handle_key(event.key)
+                    # A drag sends a stream of sizes; only the last one is laid out
+                    resize_to = self.window_size_event(event) or resize_to
+                if resize_to:
+                    self.resize(*resize_to)
+                self.poll_bake()
+                self.pan_with_keys(frame_dt)
+                self.poll_network()
+                self.poll_engines()
+                # Fixed-step simulation: a slow frame runs several steps and skips
+                # the renders in between rather than stretching a single dt
+                with self.profiler.phase("update"):
+                    while self.accumulator >= SIM_DT and self.game_state == "playing":
+                        self.update(SIM_DT)
+                        self.accumulator -= SIM_DT
+                self.draw(self.accumulator / SIM_DT)
             elif self.game_state == "game_over": self.run_game_over()
 
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Chain Reaction")
+    parser.add_argument("--connect", metavar="HOST:PORT", help="play online on a server.py server")
+    parser.add_argument("--players", type=int, default=2, help="players in the online game")
+    parser.add_argument("--room", help="join or create a named room instead of matchmaking")
+    parser.add_argument("--grid", metavar="WIDTHxHEIGHT", help=f"board size, up to {MAX_GRID_SIZE}x{MAX_GRID_SIZE}")
+    parser.add_argument("--topology", choices=("rect", "torus", "hex"), default="rect",
+                        help="torus wraps the edges around, hex gives inner cells six neighbors")
+    parser.add_argument("--shape", default="full",
+                        help='diamond, ring, cross, or a mask of rows joined by "/" with # for holes')
+    parser.add_argument("--engine", action="append", default=[], metavar="SEAT=COMMAND",
+                        help="let an external engine play a seat; see enginelink.py")
+    from enginelink import time_control_args, time_control
+    time_control_args(parser)
+    args = parser.parse_args()
+
+    if args.grid:
+        try:
+            width, height = (int(v) for v in args.grid.lower().split("x"))
+        except ValueError:
+            parser.error(f"grid must look like 10x12, not {args.grid!r}")
+        if not (2 <= width <= MAX_GRID_SIZE and 2 <= height <= MAX_GRID_SIZE):
+            parser.error(f"grid sides must be between 2 and {MAX_GRID_SIZE}")
+        set_grid_size(width, height)
+    from engine import Board, shape_holes
+    try:
+        Board.get(GRID_WIDTH, GRID_HEIGHT, args.topology, shape_holes(args.shape, GRID_WIDTH, GRID_HEIGHT, args.topology))
+    except ValueError as e:
+        parser.error(str(e))
+    set_board_shape(args.topology, args.shape)
+
+    engines = {}
+    for spec in args.engine:
+        seat, _, command = spec.partition("=")
+        if not seat.isdigit() or not 1 <= int(seat) <= len(PLAYER_COLORS) or not command:
+            parser.error(f"--engine must look like 2=COMMAND, not {spec!r}")
+        engines[int(seat) - 1] = command
+    if engines and args.connect:
+        parser.error("engine seats are for local games")
+
     game = Game()
+    for seat, command in engines.items():
+        game.add_engine(seat, command, time_control(args))
+    if args.connect:
+        game.join_server(args.connect, args.players, args.room)
     game.run()
\ No newline at end of file
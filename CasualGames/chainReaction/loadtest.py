@@ -0,0 +1,250 @@
+"""Load generator for server.py: thousands of scripted clients on one event loop.
+
+Starts a server in a subprocess (or targets one with --connect), opens
+--clients connections that matchmake into rooms and play bot moves until
+--duration runs out, then reports moves/s, move latency percentiles (move
+sent to its delta received) and server memory per room. Moves come from
+seeded bots.py policies, so a given seed replays the same games.
+
+    python loadtest.py --clients 2000 --players 2 --duration 30
+    python loadtest.py --connect 10.0.0.5:7777 --clients 500 --policy greedy --json load.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import subprocess
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+import net  # noqa: E402
+from bots import POLICIES, make_policy  # noqa: E402
+from engine import GameState  # noqa: E402
+from tournament import parse_grid, DEFAULT_GRID  # noqa: E402
+
+CONNECT_BATCH = 200  # connections opened at once while ramping up
+STATS_INTERVAL = 1.0
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+def raise_fd_limit():
+    """Each client needs a socket; lift the soft open-file limit to the hard one."""
+    try:
+        import resource
+    except ImportError:  # not available on Windows
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind((net.DEFAULT_HOST, 0))
+        return sock.getsockname()[1]
+
+
+class Stats:
+    def __init__(self):
+        self.moves = 0
+        self.games = 0
+        self.errors = 0
+        self.desyncs = 0
+        self.latencies = []
+        self.server = []  # stats messages sampled while running
+
+
+class SimulatedClient:
+    """One seated player: keeps a replica from the server's deltas and moves on its turn."""
+
+    def __init__(self, host, port, args, seed, stats):
+        self.host, self.port = host, port
+        self.args = args
+        self.rng = random.Random(seed)
+        self.policy = make_policy(args.policy)
+        self.stats = stats
+        self.state = None
+        self.seat = None
+        self.sent_at = None
+
+    async def run(self, deadline):
+        reader, writer = await asyncio.open_connection(self.host, self.port, limit=1 << 20)
+        try:
+            while time.perf_counter() < deadline:
+                await self.play_game(reader, writer, deadline)
+        finally:
+            writer.close()
+
+    async def play_game(self, reader, writer, deadline):
+        width, height = self.args.grid
+        self.state = None
+        writer.write(net.encode({"type": "join", "players": self.args.players, "grid": [width, height]}))
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return
+            try:
+                line = await asyncio.wait_for(reader.readline(), remaining)
+            except asyncio.TimeoutError:
+                return
+            if not line:
+                raise ConnectionError("server closed the connection")
+            message = net.decode(line)
+            kind = message["type"]
+            if kind == "joined":
+                self.seat = message["seat"]
+            elif kind == "start":
+                self.state = GameState(width, height, message["num_players"])
+            elif kind == "keyframe":
+                net.apply_keyframe(self.state, message)
+            elif kind == "delta":
+                if self.sent_at is not None and self.state.current_player == self.seat:
+                    self.stats.latencies.append(time.perf_counter() - self.sent_at)
+                    self.sent_at = None
+                self.stats.moves += 1
+                self.state.play(message["cell"])
+                if self.state.digest() != message["digest"]:
+                    self.stats.desyncs += 1
+                    writer.write(net.encode({"type": "sync"}))
+            elif kind == "error":
+                self.stats.errors += 1
+                self.sent_at = None
+            elif kind == "left":
+                return
+            if self.state is None:
+                continue
+            if self.state.is_over:
+                if self.seat == 0:
+                    self.stats.games += 1
+                return
+            if self.state.current_player == self.seat and self.sent_at is None:
+                move = self.policy.choose(self.state, self.rng)
+                self.sent_at = time.perf_counter()
+                writer.write(net.encode({"type": "move", "cell": move}))
+
+
+async def sample_server(host, port, stats, deadline):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while True:
+            writer.write(net.encode({"type": "stats"}))
+            stats.server.append(net.decode(await reader.readline()))
+            if time.perf_counter() >= deadline:
+                return
+            await asyncio.sleep(STATS_INTERVAL)
+    finally:
+        writer.close()
+
+
+async def load_test(host, port, args):
+    stats = Stats()
+    start = time.perf_counter()
+    deadline = start + args.duration
+    sampler = asyncio.ensure_future(sample_server(host, port, stats, deadline + 0.5))
+    # The idle reading must come back before anyone connects
+    while not stats.server:
+        if sampler.done():
+            await sampler  # raises why the server could not be sampled
+        await asyncio.sleep(0.01)
+    clients = [SimulatedClient(host, port, args, args.seed + i, stats) for i in range(args.clients)]
+    tasks = []
+    for i in range(0, len(clients), CONNECT_BATCH):
+        tasks += [asyncio.ensure_future(c.run(deadline)) for c in clients[i:i + CONNECT_BATCH]]
+        await asyncio.sleep(0.05)  # stay under the server's listen backlog
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    await sampler
+    failures = [r for r in results if isinstance(r, Exception)]
+    return report(args, stats, elapsed, failures)
+
+
+def report(args, stats, elapsed, failures):
+    idle = stats.server[0]
+    busiest = max(stats.server, key=lambda s: s["rooms"])
+    rooms = busiest["rooms"]
+    result = {
+        "clients": args.clients,
+        "players": args.players,
+        "grid": list(args.grid),
+        "policy": args.policy,
+        "seed": args.seed,
+        "seconds": elapsed,
+        "moves": stats.moves // args.players,  # every seat sees each delta
+        "games": stats.games,
+        "errors": stats.errors,
+        "desyncs": stats.desyncs,
+        "client_failures": len(failures),
+        "latency_ms": {f"p{q}": percentile(stats.latencies, q) * 1000 for q in (50, 90, 99, 99.9)},
+        "rooms": rooms,
+        "bytes_out": stats.server[-1].get("bytes_out", 0),
+    }
+    result["moves_per_s"] = result["moves"] / elapsed if elapsed else 0.0
+    if "rss_kb" in idle:
+        result["server_rss_kb"] = stats.server[-1]["rss_kb"]
+        result["kb_per_room"] = (busiest["rss_kb"] - idle["rss_kb"]) / rooms if rooms else 0.0
+    if failures:
+        result["first_failure"] = repr(failures[0])
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test a Chain Reaction server")
+    parser.add_argument("--connect", metavar="HOST:PORT", help="existing server (default: start one)")
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--players", type=int, default=2, help="players per room (2-9)")
+    parser.add_argument("--grid", type=parse_grid, default=DEFAULT_GRID, help="WIDTHxHEIGHT")
+    parser.add_argument("--policy", default="random", help=f"bot policy ({', '.join(sorted(POLICIES))})")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds to run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+    if args.policy not in POLICIES:
+        parser.error(f"unknown policy {args.policy!r}")
+    if not 2 <= args.players <= 9 or args.clients % args.players:
+        parser.error("--clients must fill rooms of --players (2-9) exactly")
+
+    raise_fd_limit()
+    server = None
+    if args.connect:
+        host, port = net.parse_address(args.connect)
+    else:
+        host, port = net.DEFAULT_HOST, free_port()
+        server = subprocess.Popen([sys.executable, "-u", os.path.join(HERE, "server.py"), "--port", str(port)],
+                                  stdout=subprocess.PIPE)
+        server.stdout.readline()  # wait for the listening banner
+    try:
+        result = asyncio.run(load_test(host, port, args))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    latency = result["latency_ms"]
+    print(f"{result['clients']} clients in {result['rooms']} rooms of {args.players} on "
+          f"{args.grid[0]}x{args.grid[1]}: {result['moves']} moves, {result['games']} games "
+          f"in {result['seconds']:.1f}s ({result['moves_per_s']:.0f} moves/s)")
+    print("latency ms  " + "  ".join(f"{q}: {v:.2f}" for q, v in latency.items()))
+    if "kb_per_room" in result:
+        print(f"server rss {result['server_rss_kb'] / 1024:.1f} MiB, {result['kb_per_room']:.1f} KiB per room, "
+              f"{result['bytes_out'] / max(1, result['moves']):.0f} bytes broadcast per move")
+    if result["errors"] or result["desyncs"] or result["client_failures"]:
+        print(f"{result['errors']} errors, {result['desyncs']} desyncs, "
+              f"{result['client_failures']} failed clients", file=sys.stderr)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Network protocol shared by server.py and its clients.
+
+Messages are JSON objects, one per line. Clients send:
+
+    {"type": "join", "players": 2, "grid": [10, 12], "room": "optional-name",
+     "topology": "rect", "shape": "full"}
+    {"type": "move", "cell": 17}
+    {"type": "spectate", "room": "name"}
+    {"type": "sync"}
+    {"type": "stats"}
+
+and the server answers with "joined", "start", "keyframe", "delta", "error",
+"left" and "stats" messages. Game traffic is delta-encoded: every accepted
+move is broadcast as
+
+    {"type": "delta", "seq": 41, "cell": 17, "digest": 2915384271}
+
+The cascade is deterministic, so a client replays the move on its own copy
+of the position (engine.GameState, or Game.place_orb to animate it) and
+compares the board digest. A "keyframe" carrying the full board is sent when
+a game starts, to new spectators, every KEYFRAME_INTERVAL moves and in reply
+to "sync", which a client sends when a seq gap or digest mismatch shows its
+copy has drifted. Once a game ends the room closes and its players may
+join again. NetworkClient is the blocking client used by the pygame
+game, with a reader thread so the render loop never waits on the socket.
+"""
+import json
+import queue
+import socket
+import threading
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 7777
+KEYFRAME_INTERVAL = 50  # moves between full-board keyframes
+
+
+def encode(message):
+    return (json.dumps(message, separators=(",", ":")) + "\n").encode()
+
+
+def decode(line):
+    return json.loads(line)
+
+
+def apply_keyframe(state, message):
+    """Overwrite an engine.GameState with a keyframe's position."""
+    state.orbs[:] = message["orbs"]
+    state.owner[:] = message["owner"]
+    state.cells_owned[:] = [0] * state.num_players
+    for owner in state.owner:
+        if owner >= 0:
+            state.cells_owned[owner] += 1
+    state.current_player = message["current_player"]
+    state.turn_count = message["turn_count"]
+    state.winner = message["winner"]
+
+
+def parse_address(text):
+    host, _, port = text.rpartition(":")
+    return (host or DEFAULT_HOST), int(port or DEFAULT_PORT)
+
+
+class NetworkClient:
+    """Socket connection to a game server; incoming messages are queued for poll()."""
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, timeout=5):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.settimeout(None)
+        self.incoming = queue.Queue()
+        self.connected = True
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._reader.start()
+
+    def _read_loop(self):
+        try:
+            with self.sock.makefile("rb") as stream:
+                for line in stream:
+                    self.incoming.put(decode(line))
+        except (OSError, ValueError):
+            pass
+        self.connected = False
+        self.incoming.put({"type": "disconnected"})
+
+    def send(self, message):
+        try:
+            self.sock.sendall(encode(message))
+        except OSError:
+            self.connected = False
+
+    def poll(self):
+        """Messages received since the last call, without blocking."""
+        messages = []
+        while True:
+            try:
+                messages.append(self.incoming.get_nowait())
+            except queue.Empty:
+                return messages
+
+    def close(self):
+        self.connected = False
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
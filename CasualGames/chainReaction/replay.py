@@ -0,0 +1,267 @@
+"""Render an archived match to video, headless and in parallel.
+
+Replays a game from the archive (archive.py) through game.Game, with the same
+Game.draw visuals, under the SDL dummy driver. The timeline is cut into
+segments that a process pool renders; segments come back in order and their
+frames are piped as raw RGB into ffmpeg, which encodes the video or animated
+GIF. No frame touches the disk.
+
+    python replay.py match.mp4                      # the archive's latest game
+    python replay.py chain.gif --game longest --fps 20 --scale 0.5
+    python replay.py clip.webm --game 42 --start 10 --end 25 --workers 8
+    python replay.py - --game 42 | ffplay -f rawvideo -pixel_format rgb24 -video_size WxH -
+
+Every move reseeds the randomness (particles, shake) and the clock is derived
+from the frame number, so a frame looks the same whichever worker renders it.
+"""
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import subprocess
+import multiprocessing
+from collections import deque
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")  # stdout may carry the frames
+
+# Game loads its assets relative to the working directory
+HERE = os.path.dirname(os.path.abspath(__file__))
+os.chdir(HERE)
+sys.path.insert(0, HERE)
+
+import pygame  # noqa: E402
+import game  # noqa: E402
+
+DEFAULT_FPS = 30
+SEGMENT_FRAMES = 30  # frames per render task; bounds the memory a finished segment holds
+HOLD_SECONDS = 0.3  # pause after each move settles
+END_HOLD_SECONDS = 2.0  # on the final position
+HIGHLIGHT_LEAD = 3  # moves shown before the longest cascade with --game longest
+
+_worker = None  # per-process ReplayWorker
+
+
+class ReplayWorker:
+    """A headless Game that can jump to any move of one match and film it."""
+
+    def __init__(self, width, height, num_players, moves, seed, fps, size):
+        game.set_grid_size(width, height)
+        self.num_players = num_players
+        self.moves = moves
+        self.seed = seed
+        self.fps = fps
+        self.size = size
+        self.game = game.Game()
+        self.game.sounds = None
+        # No pointer in a replay, and pulses follow the replay clock instead of the wall clock
+        pygame.mouse.get_pos = lambda: (-1, -1)
+        pygame.time.get_ticks = lambda: int(self.game.sim_time * 1000)
+        self.next_move = None  # index of the next move; the board is settled before it
+
+    def seek(self, move):
+        """Settle the board just before move, fast-forwarding without drawing."""
+        g = self.game
+        if self.next_move is None or move < self.next_move:
+            random.seed(self.seed)  # orbit phases
+            g.num_players = self.num_players
+            g.reset_game()
+            g.game_state = "playing"
+            self.next_move = 0
+        elif not g.is_turn_processed:
+            g.resolve_turn()  # finish a move filmed only partway
+        while self.next_move < move:
+            row, col = divmod(self.moves[self.next_move], game.GRID_WIDTH)
+            if not g.place_orb(row, col):
+                raise ValueError(f"move {self.next_move} ({row}, {col}) is illegal; is this the right archive?")
+            g.resolve_turn()
+            self.next_move += 1
+        # Let placement flashes and particles run out, so a move starts from the same picture on any worker
+        while g.animating or g.particles or g.shake_duration > 0:
+            g.update(game.FAST_FORWARD_DT)
+
+    def frames(self, move, start_frame, hold):
+        """Play move animated; yields (frame number within the move, interp) for every frame."""
+        g = self.game
+        self.seek(move)
+        random.seed(f"{self.seed}:{move}")
+        g.sim_time = start_frame / self.fps
+        row, col = divmod(self.moves[move], game.GRID_WIDTH)
+        if not g.place_orb(row, col):
+            raise ValueError(f"move {move} ({row}, {col}) is illegal; is this the right archive?")
+        self.next_move = move + 1
+        accumulator = 0.0
+        frame = 0
+        held = None  # frame the board settled on
+        while held is None or frame < held + int(hold * self.fps):
+            g.time = start_frame + frame  # header and UI pulses
+            yield frame, accumulator / game.SIM_DT
+            frame += 1
+            # Same fixed-step loop as Game.run, with a frame every 1 / fps seconds
+            accumulator += 1.0 / self.fps
+            while accumulator >= game.SIM_DT:
+                g.update(game.SIM_DT)
+                accumulator -= game.SIM_DT
+            if held is None and g.is_turn_processed and not (g.animating or g.particles or g.shake_duration > 0):
+                held = frame
+
+    def count(self, move, hold):
+        return sum(1 for _ in self.frames(move, 0, hold))
+
+    def render(self, move, start_frame, hold, lo, hi):
+        """Frames lo..hi-1 of move, as one bytes object of raw RGB frames."""
+        out = []
+        for frame, interp in self.frames(move, start_frame, hold):
+            if frame >= hi:
+                break
+            if frame >= lo:
+                # draw() shakes the screen with random offsets; its own seed keeps the
+                # simulation's draws the same as in the frame count, which does not draw
+                state = random.getstate()
+                random.seed(f"{self.seed}:{move}:{frame}")
+                self.game.draw(interp)
+                random.setstate(state)
+                surface = self.game.screen
+                if surface.get_size() != self.size:
+                    surface = pygame.transform.smoothscale(surface, self.size)
+                out.append(pygame.image.tobytes(surface, "RGB"))
+        return b"".join(out)
+
+
+def _init_worker(*args):
+    global _worker
+    _worker = ReplayWorker(*args)
+
+
+def _plan(task):
+    """Frame counts for a run of consecutive moves."""
+    moves, holds = task
+    return [_worker.count(move, hold) for move, hold in zip(moves, holds)]
+
+
+def _render(task):
+    return _worker.render(*task)
+
+
+def plan_segments(frame_counts, first_move, holds, segment_frames=SEGMENT_FRAMES):
+    """Render tasks (move, start frame, hold, lo, hi), in timeline order."""
+    tasks = []
+    start = 0
+    for offset, (count, hold) in enumerate(zip(frame_counts, holds)):
+        for lo in range(0, count, segment_frames):
+            tasks.append((first_move + offset, start, hold, lo, min(count, lo + segment_frames)))
+        start += count
+    return tasks
+
+
+def open_encoder(path, size, fps):
+    """A writable binary stream for raw rgb24 frames, and the encoder process (None for stdout)."""
+    if path == "-":
+        # Frames get the real stdout; anything printed (pygame's banner, warnings,
+        # from this process or the workers it spawns) goes to stderr instead
+        sys.stdout.flush()
+        stream = os.fdopen(os.dup(1), "wb")
+        os.dup2(2, 1)
+        return stream, None
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        raise SystemExit("ffmpeg not found on PATH; write raw frames with '-' and encode them elsewhere")
+    command = [ffmpeg, "-loglevel", "error", "-y", "-f", "rawvideo", "-pix_fmt", "rgb24",
+               "-s", f"{size[0]}x{size[1]}", "-r", str(fps), "-i", "-"]
+    if path.lower().endswith(".gif"):
+        # One palette for the whole clip, built from its own frames
+        command += ["-vf", "split[a][b];[a]palettegen[p];[b][p]paletteuse"]
+    else:
+        command += ["-pix_fmt", "yuv420p"]
+    process = subprocess.Popen(command + [path], stdin=subprocess.PIPE)
+    return process.stdin, process
+
+
+def load_match(path, which):
+    """(width, height, players, moves, chains) of an archived game: an index, "last" or "longest"."""
+    from archive import open_index, open_column
+    index = open_index(path)
+    if len(index) == 0:
+        raise SystemExit(f"no games in {path}")
+    if which == "last":
+        number = len(index) - 1
+    elif which == "longest":
+        number = int(index["max_chain"].argmax())
+    else:
+        number = int(which)
+    record = index[number]
+    lo, hi = int(record["offset"]), int(record["offset"]) + int(record["moves"])
+    moves = [int(m) for m in open_column(path, "moves.bin")[lo:hi]]
+    chains = [int(c) for c in open_column(path, "chains.bin")[lo:hi]]
+    return int(record["width"]), int(record["height"]), int(record["players"]), moves, chains
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render an archived Chain Reaction match to video")
+    parser.add_argument("output", help="video or .gif file for ffmpeg, or - for raw rgb24 frames on stdout")
+    parser.add_argument("--archive", default=game.ARCHIVE_DIR, help="archive directory")
+    parser.add_argument("--game", default="last", help='game number, "last" or "longest" (biggest cascade)')
+    parser.add_argument("--start", type=int, help="first move to film (earlier ones are fast-forwarded)")
+    parser.add_argument("--end", type=int, help="stop before this move")
+    parser.add_argument("--fps", type=int, default=DEFAULT_FPS)
+    parser.add_argument("--scale", type=float, default=1.0, help="output size relative to the game window")
+    parser.add_argument("--seed", type=int, default=0, help="seed for particles and shake")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    width, height, players, moves, chains = load_match(args.archive, args.game)
+    start, end = args.start, args.end
+    if args.game == "longest" and start is None and end is None:
+        peak = max(range(len(chains)), key=chains.__getitem__)
+        start, end = max(0, peak - HIGHLIGHT_LEAD), peak + 1
+    start, end, _ = slice(start, end).indices(len(moves))
+    if start >= end:
+        parser.error("no moves to film")
+    film = range(start, end)
+    holds = [END_HOLD_SECONDS if move == film[-1] else HOLD_SECONDS for move in film]
+
+    game.set_grid_size(width, height)
+    # Even sides, which yuv420p encoders require
+    size = (max(2, int(game.SCREEN_WIDTH * args.scale) // 2 * 2), max(2, int(game.SCREEN_HEIGHT * args.scale) // 2 * 2))
+    initargs = (width, height, players, moves, args.seed, args.fps, size)
+
+    stream, encoder = open_encoder(args.output, size, args.fps)
+    started = time.perf_counter()
+    # Spawned rather than forked workers, so each gets its own SDL state; see fuzz.py
+    ctx = multiprocessing.get_context("spawn")
+    workers = max(1, min(args.workers, len(film)))
+    pool = ctx.Pool(workers, initializer=_init_worker, initargs=initargs)
+    frames = 0
+    try:
+        # Count each move's frames first, in runs of consecutive moves so a worker seeks once per run
+        run = -(-len(film) // (workers * 4))
+        plan = [(film[i:i + run], holds[i:i + run]) for i in range(0, len(film), run)]
+        counts = [n for part in pool.map(_plan, plan) for n in part]
+        tasks = plan_segments(counts, start, holds)
+        # In order, with at most a few segments finished ahead of the encoder
+        pending = deque()
+        for task in tasks:
+            pending.append(pool.apply_async(_render, (task,)))
+            if len(pending) > workers * 2:
+                stream.write(pending.popleft().get())
+        while pending:
+            stream.write(pending.popleft().get())
+        frames = sum(counts)
+    finally:
+        pool.close()
+        pool.join()
+        stream.close()
+        if encoder is not None:
+            encoder.wait()
+    elapsed = time.perf_counter() - started
+    print(f"moves {start}-{end - 1}: {frames} frames ({frames / args.fps:.1f}s of video at "
+          f"{size[0]}x{size[1]}) in {elapsed:.1f}s with {workers} workers", file=sys.stderr)
+    if encoder is not None and encoder.returncode:
+        sys.exit(encoder.returncode)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""Self-play training data written to memory-mapped .npy shards.
+
+Bots from bots.py play games with the engine rules across a process pool.
+Every position a bot moved from is stored as one fixed-size record:
+
+    board    int8 (2, height, width)  orbs, and owner relative to the mover
+                                      (0 empty, 1 mover, 2+ opponents in turn order)
+    move     int16                    cell played
+    outcome  int8                     +1 the mover went on to win, -1 lost, 0 unfinished
+    players  int8                     player count
+
+Each worker writes whole shards (a structured-dtype .npy, renamed into place
+when complete). The parent appends one line per finished shard to index.jsonl,
+so a dataset only ever grows and an interrupted run loses at most the shards
+in flight. SelfPlayDataset opens the shards with np.load(mmap_mode="r"), so
+reading fields and slices is zero-copy.
+
+    python selfplay.py --out selfplay_data --games 20000 --policy greedy --explore 0.1
+    python selfplay.py --out selfplay_data --summary
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import multiprocessing
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from engine import Board, GameState, EMPTY  # noqa: E402
+from bots import POLICIES, make_policy  # noqa: E402
+from tournament import parse_grid, DEFAULT_GRID  # noqa: E402
+
+INDEX_FILE = "index.jsonl"
+MAX_MOVES = 1000  # games still running after this many moves are stored as unfinished
+_policies = {}  # per-process policy instances
+
+
+def record_dtype(width, height):
+    return np.dtype([("board", np.int8, (2, height, width)), ("move", np.int16),
+                     ("outcome", np.int8), ("players", np.int8)])
+
+
+def relative_owners(state):
+    """Owners renumbered from the mover's seat: 0 empty, 1 mover, 2+ the others in turn order."""
+    n, mover = state.num_players, state.current_player
+    return [0 if owner == EMPTY else (owner - mover) % n + 1 for owner in state.owner]
+
+
+def play_game(grid, num_players, policy_name, explore, rng):
+    """One self-play game; returns ([(orbs, relative owners, move, seat)], winner)."""
+    if policy_name not in _policies:
+        _policies[policy_name] = make_policy(policy_name)
+    policy = _policies[policy_name]
+    state = GameState(grid[0], grid[1], num_players)
+    samples = []
+    while not state.is_over and state.turn_count < MAX_MOVES:
+        if rng.random() < explore:
+            move = rng.choice(state.legal_moves())
+        else:
+            move = policy.choose(state, rng)
+        samples.append((state.orbs[:], relative_owners(state), move, state.current_player))
+        state.play(move)
+    return samples, state.winner
+
+
+def write_shard(job):
+    """Play a job's games and write them as one shard; returns its index entry."""
+    out, shard_id, seeds, grid, num_players, policy_name, explore = job
+    width, height = grid
+    games = []
+    for seed in seeds:
+        games.append(play_game(grid, num_players, policy_name, explore, random.Random(seed)))
+    count = sum(len(samples) for samples, _ in games)
+
+    name = f"shard-{shard_id:06d}.npy"
+    partial = os.path.join(out, name + ".partial")
+    records = np.lib.format.open_memmap(partial, mode="w+", dtype=record_dtype(width, height), shape=(count,))
+    i = 0
+    for samples, winner in games:
+        n = len(samples)
+        board = records["board"][i:i + n]
+        board[:, 0] = np.array([orbs for orbs, _, _, _ in samples], dtype=np.int8).reshape(n, height, width)
+        board[:, 1] = np.array([owners for _, owners, _, _ in samples], dtype=np.int8).reshape(n, height, width)
+        records["move"][i:i + n] = [move for _, _, move, _ in samples]
+        seats = np.array([seat for _, _, _, seat in samples])
+        records["outcome"][i:i + n] = 0 if winner is None else np.where(seats == winner, 1, -1)
+        records["players"][i:i + n] = num_players
+        i += n
+    records.flush()
+    del records
+    os.replace(partial, os.path.join(out, name))
+    return {"shard": shard_id, "file": name, "samples": count, "games": len(seeds), "grid": [width, height],
+            "players": num_players, "policy": policy_name, "explore": explore, "seeds": [seeds[0], seeds[-1]]}
+
+
+def read_index(out):
+    path = os.path.join(out, INDEX_FILE)
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class SelfPlayDataset:
+    """All shards listed in a dataset's index, memory-mapped read-only."""
+
+    def __init__(self, out):
+        self.entries = read_index(out)
+        if not self.entries:
+            raise ValueError(f"no shards indexed in {out}")
+        grids = {tuple(e["grid"]) for e in self.entries}
+        if len(grids) > 1:
+            raise ValueError(f"{out} mixes grid sizes {sorted(grids)}")
+        self.grid = grids.pop()
+        self.board = Board.get(*self.grid)
+        self.shards = [np.load(os.path.join(out, e["file"]), mmap_mode="r") for e in self.entries]
+        self.offsets = np.cumsum([0] + [len(s) for s in self.shards])
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    def sample(self, batch_size, rng):
+        """Random records (copied out of the shards) from a numpy Generator."""
+        picks = np.sort(rng.integers(0, len(self), batch_size))
+        shard_of = np.searchsorted(self.offsets, picks, side="right") - 1
+        parts = [self.shards[s][picks[shard_of == s] - self.offsets[s]] for s in np.unique(shard_of)]
+        return np.concatenate(parts)
+
+    def features(self, records):
+        """evaluator.py feature planes for a batch of records."""
+        from evaluator import encode_records
+        return encode_records(records["board"][:, 0], records["board"][:, 1], self.board)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate self-play training shards")
+    parser.add_argument("--out", default="selfplay_data", help="dataset directory")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--games-per-shard", type=int, default=100)
+    parser.add_argument("--grid", type=parse_grid, default=DEFAULT_GRID, help="WIDTHxHEIGHT")
+    parser.add_argument("--players", type=int, default=2, help="players per game (2-9)")
+    parser.add_argument("--policy", default="greedy", help=f"bot policy ({', '.join(sorted(POLICIES))})")
+    parser.add_argument("--explore", type=float, default=0.1, help="chance of a random move instead")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, help="first game seed (default: continue after the last run)")
+    parser.add_argument("--summary", action="store_true", help="describe the dataset and exit")
+    args = parser.parse_args()
+
+    if args.summary:
+        dataset = SelfPlayDataset(args.out)
+        outcomes = np.concatenate([s["outcome"] for s in dataset.shards])
+        print(f"{len(dataset.shards)} shards, {len(dataset)} samples on "
+              f"{dataset.grid[0]}x{dataset.grid[1]}, {sum(e['games'] for e in dataset.entries)} games; "
+              f"outcomes +1: {np.mean(outcomes == 1):.1%}  -1: {np.mean(outcomes == -1):.1%}  "
+              f"0: {np.mean(outcomes == 0):.1%}")
+        return
+    if args.policy not in POLICIES:
+        parser.error(f"unknown policy {args.policy!r}")
+    if not 2 <= args.players <= 9:
+        parser.error("--players must be 2-9")
+
+    os.makedirs(args.out, exist_ok=True)
+    existing = read_index(args.out)
+    if existing and list(args.grid) != existing[0]["grid"]:
+        parser.error(f"{args.out} holds {existing[0]['grid'][0]}x{existing[0]['grid'][1]} games")
+    # Shards finish out of order, so number new ones after the highest indexed
+    first_shard = max((e["shard"] + 1 for e in existing), default=0)
+    seed = args.seed if args.seed is not None else max((e["seeds"][1] + 1 for e in existing), default=0)
+    jobs = []
+    for start in range(0, args.games, args.games_per_shard):
+        seeds = list(range(seed + start, seed + min(args.games, start + args.games_per_shard)))
+        jobs.append((args.out, first_shard + len(jobs), seeds, args.grid, args.players, args.policy, args.explore))
+
+    begin = time.perf_counter()
+    samples = 0
+    with open(os.path.join(args.out, INDEX_FILE), "a") as index, multiprocessing.Pool(args.workers) as pool:
+        for entry in pool.imap_unordered(write_shard, jobs):
+            index.write(json.dumps(entry) + "\n")
+            index.flush()
+            samples += entry["samples"]
+    elapsed = time.perf_counter() - begin
+    print(f"{args.games} games, {samples} samples in {len(jobs)} shards in {elapsed:.1f}s "
+          f"({samples / elapsed:.0f} samples/s)")
+
+
+if __name__ == "__main__":
+    main()
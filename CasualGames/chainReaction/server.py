@@ -0,0 +1,323 @@
+"""Authoritative asyncio game server for networked Chain Reaction.
+
+Hosts any number of concurrent rooms. Every room validates moves against its
+own headless engine.GameState (the rules fuzz.py checks against Game.update)
+and relays each accepted move to its players and spectators as a few-byte
+delta; the cascade is deterministic, so clients replay it themselves. Full
+keyframes go out on join and every net.KEYFRAME_INTERVAL moves. The protocol
+is described in net.py.
+
+    python server.py --port 7777
+    python game.py --connect 127.0.0.1:7777 --players 2
+"""
+import os
+import sys
+import asyncio
+import argparse
+import itertools
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import net  # noqa: E402
+from engine import Board, GameState, shape_holes  # noqa: E402
+
+MAX_LINE = 4096  # longest message a client may send
+MAX_WRITE_BUFFER = 256 * 1024  # clients that stop reading are dropped past this
+MAX_GRID_SIDE = 200
+DEFAULT_GRID = (10, 12)
+
+
+class Client:
+    """One connection; a player in at most one room, or a spectator."""
+    __slots__ = ("writer", "room", "seat")
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.room = None
+        self.seat = None  # None for spectators
+
+    def send(self, data):
+        transport = self.writer.transport
+        if transport.is_closing():
+            return
+        if transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+            transport.abort()
+            return
+        self.writer.write(data)
+
+
+class Room:
+    """A game in progress or waiting for players."""
+    __slots__ = ("name", "shape", "state", "seats", "spectators", "started", "seq")
+
+    def __init__(self, name, width, height, num_players, topology="rect", shape="full"):
+        self.name = name
+        self.shape = shape
+        self.state = GameState(width, height, num_players, topology, shape_holes(shape, width, height, topology))
+        self.seats = [None] * num_players
+        self.spectators = set()
+        self.started = False
+        self.seq = 0  # moves played; numbers the deltas
+
+    @property
+    def key(self):
+        return (self.state.num_players,) + self.state.board.key
+
+    def is_full(self):
+        return all(seat is not None for seat in self.seats)
+
+    def is_empty(self):
+        return not self.spectators and all(seat is None for seat in self.seats)
+
+    def broadcast(self, data):
+        """Send one encoded message to everyone in the room; returns bytes queued."""
+        sent = 0
+        for client in self.seats:
+            if client is not None:
+                client.send(data)
+                sent += len(data)
+        for client in self.spectators:
+            client.send(data)
+            sent += len(data)
+        return sent
+
+    def start_message(self):
+        board = self.state.board
+        return {"type": "start", "room": self.name, "num_players": self.state.num_players,
+                "width": board.width, "height": board.height, "topology": board.topology,
+                "shape": self.shape}
+
+    def keyframe_message(self):
+        state = self.state
+        return {"type": "keyframe", "seq": self.seq, "orbs": state.orbs, "owner": state.owner,
+                "current_player": state.current_player, "turn_count": state.turn_count,
+                "winner": state.winner}
+
+    def delta_message(self, cell):
+        # Who moved and the whole cascade follow from the previous position
+        return {"type": "delta", "seq": self.seq, "cell": cell, "digest": self.state.digest()}
+
+
+class GameServer:
+    def __init__(self):
+        self.rooms = {}
+        self.waiting = {}  # (players, *Board.key) -> room accepting players
+        self.clients = 0
+        self.moves = 0
+        self.bytes_out = 0  # game traffic broadcast to rooms
+        self._room_ids = itertools.count(1)
+
+    async def handle(self, reader, writer):
+        client = Client(writer)
+        self.clients += 1
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, asyncio.LimitOverrunError):
+                    break  # oversized message
+                if not line:
+                    break
+                try:
+                    message = net.decode(line)
+                except ValueError:
+                    self.error(client, "malformed message")
+                    continue
+                await self.dispatch(client, message)
+        except ConnectionError:
+            pass
+        finally:
+            self.clients -= 1
+            self.leave(client)
+            writer.close()
+
+    async def dispatch(self, client, message):
+        kind = message.get("type") if isinstance(message, dict) else None
+        handler = {"join": self.join, "move": self.move, "sync": self.sync,
+                   "spectate": self.spectate, "stats": self.stats}.get(kind)
+        if handler is None:
+            self.error(client, f"unknown message type {kind!r}")
+        elif kind == "join":
+            await handler(client, message)
+        else:
+            handler(client, message)
+
+    def error(self, client, text):
+        client.send(net.encode({"type": "error", "message": text}))
+
+    async def join(self, client, message):
+        if client.room is not None:
+            return self.error(client, "already in a room")
+        try:
+            players = int(message.get("players", 2))
+            width, height = (int(v) for v in message.get("grid", DEFAULT_GRID))
+            topology = str(message.get("topology", "rect"))
+            shape = str(message.get("shape", "full"))
+        except (TypeError, ValueError):
+            return self.error(client, "bad join parameters")
+        if not 2 <= players <= 9 or not (2 <= width <= MAX_GRID_SIDE and 2 <= height <= MAX_GRID_SIDE):
+            return self.error(client, "unsupported player count or grid size")
+        try:
+            # A big masked board takes a good fraction of a second to lay out; the other rooms play on meanwhile
+            holes = await asyncio.get_running_loop().run_in_executor(None, _build_board, width, height, topology, shape)
+        except ValueError as e:
+            return self.error(client, str(e))
+        if client.room is not None:
+            return self.error(client, "already in a room")
+
+        name = message.get("room")
+        if name is not None:
+            room = self.rooms.get(str(name))
+            if room is None:
+                room = self.rooms[str(name)] = Room(str(name), width, height, players, topology, shape)
+            elif room.started or room.is_full():
+                return self.error(client, "room is full")
+            elif room.key != (players, width, height, topology, holes):
+                return self.error(client, "room uses a different player count or grid")
+        else:
+            key = (players, width, height, topology, holes)
+            room = self.waiting.get(key)
+            if room is None or room.started:
+                name = f"room-{next(self._room_ids)}"
+                while name in self.rooms:  # a client may have picked this name for its own room
+                    name = f"room-{next(self._room_ids)}"
+                room = self.rooms[name] = self.waiting[key] = Room(name, width, height, players, topology, shape)
+
+        seat = room.seats.index(None)
+        room.seats[seat] = client
+        client.room, client.seat = room, seat
+        board = room.state.board
+        client.send(net.encode({"type": "joined", "room": room.name, "seat": seat,
+                                "num_players": room.state.num_players,
+                                "width": board.width, "height": board.height}))
+        if room.is_full():
+            room.started = True
+            if self.waiting.get(room.key) is room:
+                del self.waiting[room.key]
+            room.broadcast(net.encode(room.start_message()))
+            self.bytes_out += room.broadcast(net.encode(room.keyframe_message()))
+
+    def move(self, client, message):
+        room = client.room
+        if room is None or client.seat is None:
+            return self.error(client, "not seated in a room")
+        state = room.state
+        if not room.started or state.is_over:
+            return self.error(client, "game is not in progress")
+        if client.seat != state.current_player:
+            return self.error(client, "not your turn")
+        cell = message.get("cell")
+        if not isinstance(cell, int) or isinstance(cell, bool) or not 0 <= cell < state.board.size or not state.is_legal(cell):
+            return self.error(client, "illegal move")
+        state.play(cell)
+        room.seq += 1
+        self.moves += 1
+        self.bytes_out += room.broadcast(net.encode(room.delta_message(cell)))
+        if state.is_over:
+            self.close_room(room)
+        elif room.seq % net.KEYFRAME_INTERVAL == 0:
+            self.bytes_out += room.broadcast(net.encode(room.keyframe_message()))
+
+    def close_room(self, room):
+        """Free everyone in a finished room to join another game."""
+        for client in list(room.seats) + list(room.spectators):
+            if client is not None:
+                client.room, client.seat = None, None
+        room.seats = [None] * len(room.seats)
+        room.spectators.clear()
+        self.rooms.pop(room.name, None)
+
+    def sync(self, client, message):
+        """Resend the full position to a client whose replica has drifted."""
+        room = client.room
+        if room is None or not room.started:
+            return self.error(client, "no game to sync")
+        client.send(net.encode(room.keyframe_message()))
+
+    def spectate(self, client, message):
+        room = self.rooms.get(str(message.get("room")))
+        if room is None or client.room is not None:
+            return self.error(client, "no such room")
+        room.spectators.add(client)
+        client.room, client.seat = room, None
+        if room.started:
+            client.send(net.encode(room.start_message()))
+            client.send(net.encode(room.keyframe_message()))
+
+    def stats(self, client, message):
+        stats = {"type": "stats", "rooms": len(self.rooms), "clients": self.clients,
+                 "moves": self.moves, "bytes_out": self.bytes_out}
+        rss_kb = current_rss_kb()
+        if rss_kb is not None:
+            stats["rss_kb"] = rss_kb
+        client.send(net.encode(stats))
+
+    def leave(self, client):
+        room = client.room
+        if room is None:
+            return
+        seat = client.seat
+        client.room, client.seat = None, None
+        if seat is None:
+            room.spectators.discard(client)
+        else:
+            room.seats[seat] = None
+            if room.started and not room.state.is_over:
+                # A player walking out ends the game for everyone in the room
+                room.broadcast(net.encode({"type": "left", "room": room.name, "seat": seat}))
+                self.close_room(room)
+        if room.is_empty():
+            self.rooms.pop(room.name, None)
+            if self.waiting.get(room.key) is room:
+                del self.waiting[room.key]
+
+
+def current_rss_kb():
+    """Resident memory right now (not the lifetime peak), or None where it cannot be read."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError, AttributeError):  # no procfs (macOS, Windows)
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss // 1024
+
+
+def _build_board(width, height, topology, shape):
+    """The holes of a shape, with its Board built and cached (off the event loop)."""
+    holes = shape_holes(shape, width, height, topology)
+    Board.get(width, height, topology, holes)
+    return holes
+
+
+async def serve(host=net.DEFAULT_HOST, port=net.DEFAULT_PORT):
+    """Start a server; returns (GameServer, asyncio.Server) for embedding in tools."""
+    game_server = GameServer()
+    server = await asyncio.start_server(game_server.handle, host, port, limit=MAX_LINE)
+    return game_server, server
+
+
+async def _main(host, port):
+    _, server = await serve(host, port)
+    addresses = ", ".join(str(sock.getsockname()) for sock in server.sockets)
+    print(f"Chain Reaction server listening on {addresses}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chain Reaction game server")
+    parser.add_argument("--host", default=net.DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=net.DEFAULT_PORT)
+    args = parser.parse_args()
+    try:
+        asyncio.run(_main(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
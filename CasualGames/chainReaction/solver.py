@@ -0,0 +1,204 @@
+"""Exact win/loss search for small or sparse Chain Reaction positions.
+
+Positions are expanded with engine.GameState, the same rules as Game.update,
+and results are memoized in an engine.PositionCache under canonical_form(),
+so transpositions, mirror images and positions revisited on later moves are
+solved once. With more than two
+players the search is paranoid: a position is a WIN for a player only if
+they can force the win against every combination of replies.
+
+    python solver.py --grid 3x3 --players 2
+    python solver.py --grid 4x4 --moves 0,15,5 --nodes 500000
+
+In code, best_move(state) serves as a hint and bots.py's "solver" policy
+uses it as its backend.
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from engine import GameState, EMPTY, PositionCache, SHARED_CACHE, canonical_form  # noqa: E402
+from bots import material  # noqa: E402
+
+WIN, LOSS, UNKNOWN = 1, -1, 0
+RESULT_NAMES = {WIN: "win", LOSS: "loss", UNKNOWN: "unknown"}
+DEFAULT_NODES = 100000
+MAX_DEPTH = 64
+SMALL_BOARD = 16  # cells; boards this size are searched from the first move
+FEW_MOVES = 12  # legal moves at which bigger boards are worth searching
+
+
+class SearchBudgetExceeded(Exception):
+    pass
+
+
+def occupied_cells(state):
+    return sum(1 for owner in state.owner if owner != EMPTY)
+
+
+def worth_solving(state):
+    """Small boards, or endgames where the player to move has few options."""
+    return state.board.size <= SMALL_BOARD or len(state.legal_moves()) <= FEW_MOVES
+
+
+class Solver:
+    """Depth-first proof search memoizing (result, depth searched) per position.
+
+    The memo defaults to engine.SHARED_CACHE, so every solver in a process
+    (and the move previews) share one table.
+    """
+
+    def __init__(self, max_nodes=DEFAULT_NODES, memo=None, mirrors=True):
+        self.max_nodes = max_nodes
+        self.memo = SHARED_CACHE if memo is None else memo
+        self.mirrors = mirrors
+        self.nodes = 0
+
+    def solve(self, state, player=None, max_depth=MAX_DEPTH):
+        """WIN, LOSS or UNKNOWN (out of depth or nodes) for player, by default the one to move."""
+        player = state.current_player if player is None else player
+        self.nodes = 0
+        result = UNKNOWN
+        try:
+            for depth in range(1, max_depth + 1):
+                result = self._search(state, player, depth)
+                if result != UNKNOWN:
+                    break
+        except SearchBudgetExceeded:
+            pass
+        return result
+
+    def rank_moves(self, state, max_depth=MAX_DEPTH):
+        """[(result, move)] for every legal move, proven wins first."""
+        player = state.current_player
+        self.nodes = 0
+        children = []
+        for move in state.legal_moves():
+            child = state.copy()
+            child.play(move)
+            children.append((move, child))
+        children.sort(key=lambda item: material(item[1], player), reverse=True)
+        results = {move: UNKNOWN for move, _ in children}
+        try:
+            # Iterative deepening: shallow wins are found before deep lines are explored
+            for depth in range(max_depth):
+                for move, child in children:
+                    if results[move] == UNKNOWN:
+                        results[move] = self._search(child, player, depth)
+                        if results[move] == WIN:
+                            break
+                if WIN in results.values() or UNKNOWN not in results.values():
+                    break
+        except SearchBudgetExceeded:
+            pass
+        order = {move: i for i, (move, _) in enumerate(children)}
+        return sorted(((results[m], m) for m in results), key=lambda rm: (-rm[0], order[rm[1]]))
+
+    def _search(self, state, player, depth):
+        if state.winner is not None:
+            return WIN if state.winner == player else LOSS
+        if depth <= 0:
+            return UNKNOWN
+        key = (canonical_form(state, self.mirrors)[0], player)
+        entry = self.memo.get("solve", key)
+        if entry is not None and (entry[0] != UNKNOWN or entry[1] >= depth):
+            return entry[0]
+        self.nodes += 1
+        if self.nodes > self.max_nodes:
+            raise SearchBudgetExceeded
+
+        maximizing = state.current_player == player
+        children = []
+        for move in state.legal_moves():
+            child = state.copy()
+            child.play(move)
+            children.append(child)
+        # Try the moves that look best for whoever is choosing first; cut-offs come sooner
+        children.sort(key=lambda child: material(child, player), reverse=maximizing)
+
+        result = LOSS if maximizing else WIN
+        for child in children:
+            value = self._search(child, player, depth - 1)
+            if value == (WIN if maximizing else LOSS):
+                result = value
+                break
+            if value == UNKNOWN:
+                result = UNKNOWN
+        self.memo.put("solve", key, (result, depth))
+        return result
+
+
+def best_move(state, solver=None, max_nodes=DEFAULT_NODES):
+    """Hint for the player to move: (move, result), preferring proven wins, then unproven moves."""
+    solver = solver or Solver(max_nodes)
+    ranked = solver.rank_moves(state)
+    return ranked[0][1], ranked[0][0]
+
+
+def check_shared_cache(width, height, num_players, moves, max_nodes=DEFAULT_NODES):
+    """Moves ranked differently by a fresh cache and by one holding other player counts' solves.
+
+    A shared cache must only return entries for the same game: the solves of
+    every other player count go into it first, then the results for
+    num_players are compared with those of a fresh cache. Returns
+    [(move, fresh result, shared result), ...], empty when they agree.
+    """
+    def position(players):
+        state = GameState(width, height, players)
+        for move in moves:
+            if not state.is_legal(move):
+                return None
+            state.play(move)
+        return state
+
+    fresh = dict((move, result) for result, move in Solver(max_nodes, PositionCache()).rank_moves(position(num_players)))
+    shared = PositionCache()
+    for players in range(2, 10):
+        other = position(players) if players != num_players else None
+        if other is not None and not other.is_over:
+            Solver(max_nodes, shared).rank_moves(other)
+    ranked = Solver(max_nodes, shared).rank_moves(position(num_players))
+    return [(move, fresh.get(move), result) for result, move in ranked if fresh.get(move) != result]
+
+
+def parse_moves(text):
+    return [int(m) for m in text.split(",") if m.strip()]
+
+
+def main():
+    from tournament import parse_grid
+    parser = argparse.ArgumentParser(description="Solve a Chain Reaction position exactly")
+    parser.add_argument("--grid", type=parse_grid, default=(3, 3), help="WIDTHxHEIGHT")
+    parser.add_argument("--players", type=int, default=2)
+    parser.add_argument("--moves", type=parse_moves, default=[], help="cell indices played from the start, e.g. 0,8,4")
+    parser.add_argument("--nodes", type=int, default=DEFAULT_NODES * 10, help="search budget")
+    parser.add_argument("--no-symmetry", action="store_true", help="memoize mirror images separately (for comparison)")
+    parser.add_argument("--check-cache", action="store_true",
+                        help="check that a cache shared with the other player counts gives the same results")
+    args = parser.parse_args()
+
+    if args.check_cache:
+        mismatches = check_shared_cache(*args.grid, args.players, args.moves, args.nodes)
+        for move, fresh, shared in mismatches:
+            print(f"  move {move:>4}: {RESULT_NAMES[fresh]} with a fresh cache, {RESULT_NAMES[shared]} with a shared one")
+        print("shared cache: " + (f"{len(mismatches)} mismatches" if mismatches else "ok"))
+        sys.exit(1 if mismatches else 0)
+
+    state = GameState(args.grid[0], args.grid[1], args.players)
+    for move in args.moves:
+        state.play(move)
+    solver = Solver(args.nodes, PositionCache(), mirrors=not args.no_symmetry)
+    start = time.perf_counter()
+    ranked = solver.rank_moves(state)
+    elapsed = time.perf_counter() - start
+    print(f"player {state.current_player + 1} to move, {occupied_cells(state)} occupied cells")
+    for result, move in ranked:
+        print(f"  move {move:>4} (row {move // args.grid[0]}, col {move % args.grid[0]}): {RESULT_NAMES[result]}")
+    print(f"{solver.nodes} nodes, {len(solver.memo)} memo entries in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
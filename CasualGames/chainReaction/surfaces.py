@@ -0,0 +1,62 @@
+"""Procedural surfaces: gradients and scanlines built with NumPy.
+
+Each builder fills its pixels in one pass through pygame.surfarray instead
+of drawing a line per row, and is memoized on its arguments (size and
+colors), so a surface is generated once and then only blitted. The surfaces
+returned are shared: blit them, or copy() before drawing on one.
+"""
+import functools
+
+import numpy as np
+import pygame
+
+
+def _blend_rows(length, start, end):
+    """length x 3 colors fading from start to end, truncated like int() per channel."""
+    ratio = np.arange(length) / length
+    return (np.outer(1 - ratio, start) + np.outer(ratio, end)).astype(np.uint8)
+
+
+@functools.lru_cache(maxsize=32)
+def vertical_gradient(width, height, top, bottom, alpha=None):
+    """width x height fading from the top color to the bottom one; per-pixel alpha when alpha is given."""
+    flags = 0 if alpha is None else pygame.SRCALPHA
+    if not (width and height):
+        return pygame.Surface((width, height), flags)
+    # One column of colors, stretched sideways: scale() is nearest-neighbor, so every column is exact
+    column = pygame.Surface((1, height), flags)
+    pygame.surfarray.blit_array(column, _blend_rows(height, top, bottom)[None])
+    if alpha is not None:
+        pixels = pygame.surfarray.pixels_alpha(column)
+        pixels[:] = alpha
+        del pixels  # unlocks the surface
+    return pygame.transform.scale(column, (width, height))
+
+
+@functools.lru_cache(maxsize=8)
+def scanlines(width, height, spacing=4, thickness=2, color=(0, 0, 0), alpha=30):
+    """Transparent surface with a thickness-pixel line of color every spacing rows, from the top."""
+    surface = pygame.Surface((width, height), pygame.SRCALPHA)
+    surface.fill((*color, 0))
+    pixels = pygame.surfarray.pixels_alpha(surface)
+    for offset in range(thickness):
+        pixels[:, offset::spacing] = alpha
+    del pixels
+    return surface
+
+
+@functools.lru_cache(maxsize=64)
+def gradient_line(length, width, color, start_alpha, end_alpha, vertical):
+    """A width-pixel line of color along length, its alpha fading from start_alpha to end_alpha."""
+    size = (width, length) if vertical else (length, width)
+    surface = pygame.Surface(size, pygame.SRCALPHA)
+    surface.fill(color)
+    ratio = np.arange(length) / max(1, length - 1)
+    fade = (start_alpha + (end_alpha - start_alpha) * ratio).astype(np.uint8)
+    pixels = pygame.surfarray.pixels_alpha(surface)
+    if vertical:
+        pixels[:] = fade[None, :]
+    else:
+        pixels[:] = fade[:, None]
+    del pixels
+    return surface
@@ -0,0 +1,230 @@
+"""Headless bot-vs-bot tournaments on the real rules.
+
+Games are played with engine.GameState (checked against Game.update and
+next_turn by fuzz.py) and spread over a process pool. Reports Elo ratings,
+per-seat win rates for each player count and games per second.
+
+    python tournament.py --policies random greedy search --players 2 3 4
+    python tournament.py --format swiss --rounds 6 --policies random greedy search --players 4
+    python tournament.py --policies greedy search --games 500 --archive game_archive
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import itertools
+import multiprocessing
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from engine import GameState  # noqa: E402
+from bots import POLICIES, make_policy  # noqa: E402
+
+DEFAULT_GRID = (10, 12)
+MAX_MOVES = 1000  # games still running after this many moves are scored as draws
+ELO_START = 1500
+ELO_K = 16
+
+_policies = {}  # per-process policy instances
+
+
+def parse_grid(text):
+    try:
+        width, height = (int(v) for v in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"grid must look like 10x12, not {text!r}")
+    return width, height
+
+
+def play_game(job):
+    """Play one game; returns (seats, winning seat or None, moves, history).
+
+    history is (cells played, cascade length of each) when the job asks to
+    record it, otherwise None.
+    """
+    seats, grid, seed, record = job
+    rng = random.Random(seed)
+    bots = []
+    for name in seats:
+        if name not in _policies:
+            _policies[name] = make_policy(name)
+        bots.append(_policies[name])
+    state = GameState(grid[0], grid[1], len(seats))
+    moves, chains = [], []
+    while not state.is_over and state.turn_count < MAX_MOVES:
+        move = bots[state.current_player].choose(state, rng)
+        chain = state.play(move)
+        if record:
+            moves.append(move)
+            chains.append(chain)
+    return seats, state.winner, state.turn_count, (moves, chains) if record else None
+
+
+def rotations(table):
+    """Every seating of a table where each entrant takes each seat once."""
+    return [table[i:] + table[:i] for i in range(len(table))]
+
+
+def round_robin_tables(names, num_players):
+    if len(names) >= num_players:
+        return [list(t) for t in itertools.combinations(names, num_players)]
+    return [list(t) for t in itertools.combinations_with_replacement(names, num_players)]
+
+
+def swiss_tables(names, num_players, standings):
+    """Group entrants with similar standings, filling short tables from the top."""
+    ranked = sorted(names, key=lambda n: standings[n], reverse=True)
+    tables = []
+    for i in range(0, len(ranked), num_players):
+        table = ranked[i:i + num_players]
+        fill = itertools.cycle(ranked)
+        while len(table) < num_players:
+            table.append(next(fill))
+        tables.append(table)
+    return tables
+
+
+class Ratings:
+    """Multiplayer Elo: the winner beats every other seat; a draw splits every pair."""
+
+    def __init__(self, names):
+        self.elo = {name: float(ELO_START) for name in names}
+
+    def update(self, seats, winner):
+        before = dict(self.elo)
+        delta = defaultdict(float)
+        for a, b in itertools.combinations(range(len(seats)), 2):
+            pa, pb = seats[a], seats[b]
+            if pa == pb:
+                continue
+            if winner is None:
+                score = 0.5
+            elif winner == a:
+                score = 1.0
+            elif winner == b:
+                score = 0.0
+            else:
+                continue  # two losers: no information
+            expected = 1 / (1 + 10 ** ((before[pb] - before[pa]) / 400))
+            delta[pa] += ELO_K * (score - expected)
+            delta[pb] -= ELO_K * (score - expected)
+        for name, d in delta.items():
+            self.elo[name] += d
+
+
+class Results:
+    def __init__(self, names):
+        self.ratings = Ratings(names)
+        self.games = defaultdict(int)
+        self.wins = defaultdict(int)
+        self.draws = 0
+        self.total_games = 0
+        self.total_moves = 0
+        # player count -> seat -> [wins, games]
+        self.seats = defaultdict(lambda: defaultdict(lambda: [0, 0]))
+
+    def record(self, seats, winner, moves):
+        self.total_games += 1
+        self.total_moves += moves
+        self.ratings.update(seats, winner)
+        for seat, name in enumerate(seats):
+            self.games[name] += 1
+            self.seats[len(seats)][seat][1] += 1
+        if winner is None:
+            self.draws += 1
+        else:
+            self.wins[seats[winner]] += 1
+            self.seats[len(seats)][winner][0] += 1
+
+    def standings(self):
+        return {name: (self.wins[name] / max(1, self.games[name]), elo)
+                for name, elo in self.ratings.elo.items()}
+
+    def to_dict(self, elapsed):
+        return {
+            "games": self.total_games,
+            "draws": self.draws,
+            "moves": self.total_moves,
+            "seconds": elapsed,
+            "games_per_s": self.total_games / elapsed if elapsed else 0.0,
+            "policies": {name: {"games": self.games[name], "wins": self.wins[name],
+                                "win_rate": self.wins[name] / max(1, self.games[name]), "elo": round(elo, 1)}
+                         for name, elo in self.ratings.elo.items()},
+            "seat_win_rates": {str(count): {str(seat + 1): wins / games for seat, (wins, games) in sorted(seats.items())}
+                               for count, seats in sorted(self.seats.items())},
+        }
+
+
+def run_jobs(pool, jobs, results, archive=None):
+    # imap keeps job order, so ratings are reproducible for a given seed
+    for (seats, grid, _, _), (_, winner, moves, history) in zip(jobs, pool.imap(play_game, jobs, chunksize=8)):
+        results.record(seats, winner, moves)
+        if archive is not None:
+            archive.append(grid[0], grid[1], len(seats), *history, winner)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chain Reaction bot tournaments")
+    parser.add_argument("--policies", nargs="+", default=sorted(POLICIES),
+                        help=f"registered policies ({', '.join(sorted(POLICIES))})")
+    parser.add_argument("--players", nargs="+", type=int, default=[2],
+                        help="player counts to play (2-9)")
+    parser.add_argument("--format", choices=("round-robin", "swiss"), default="round-robin")
+    parser.add_argument("--rounds", type=int, default=5, help="Swiss rounds")
+    parser.add_argument("--games", type=int, default=10, help="games per seating")
+    parser.add_argument("--grid", type=parse_grid, default=DEFAULT_GRID, help="WIDTHxHEIGHT")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write results to this file")
+    parser.add_argument("--archive", metavar="DIR", help="append every game to this archive (see archive.py)")
+    args = parser.parse_args()
+
+    for name in args.policies:
+        if name not in POLICIES:
+            parser.error(f"unknown policy {name!r}")
+    for count in args.players:
+        if not 2 <= count <= 9:
+            parser.error("player counts must be between 2 and 9")
+
+    results = Results(args.policies)
+    archive = None
+    if args.archive:
+        from archive import GameArchive
+        archive = GameArchive(args.archive)
+    seeds = itertools.count(args.seed)
+    start = time.perf_counter()
+    with multiprocessing.Pool(args.workers) as pool:
+        for count in args.players:
+            if args.format == "round-robin":
+                rounds = [round_robin_tables(args.policies, count)]
+            else:
+                rounds = range(args.rounds)
+            for tables in rounds:
+                if args.format == "swiss":
+                    tables = swiss_tables(args.policies, count, results.standings())
+                jobs = [(tuple(seating), args.grid, next(seeds), archive is not None)
+                        for table in tables for seating in rotations(table) for _ in range(args.games)]
+                run_jobs(pool, jobs, results, archive)
+    elapsed = time.perf_counter() - start
+    if archive is not None:
+        archive.close()
+
+    report = results.to_dict(elapsed)
+    print(f"{args.format}: {report['games']} games ({report['draws']} draws) on "
+          f"{args.grid[0]}x{args.grid[1]} in {elapsed:.1f}s, {report['games_per_s']:.1f} games/s")
+    print(f"{'policy':<12}{'games':>7}{'wins':>7}{'win%':>8}{'elo':>8}")
+    for name, row in sorted(report["policies"].items(), key=lambda kv: -kv[1]["elo"]):
+        print(f"{name:<12}{row['games']:>7}{row['wins']:>7}{row['win_rate']:>8.1%}{row['elo']:>8.0f}")
+    for count, seats in report["seat_win_rates"].items():
+        rates = "  ".join(f"seat {seat}: {rate:.1%}" for seat, rate in seats.items())
+        print(f"{count} players  {rates}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()